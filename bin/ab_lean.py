@@ -0,0 +1,64 @@
+"""
+A/B-сравнение lean- и full-режимов process_user_nickname: для каждого
+ника оба режима по очереди (порядок чередуется), печатается задержка и
+длина ответа.
+
+    python -m bin.ab_lean narhipovd durov --rounds 3 --prompt "..."
+    python -m bin.ab_lean nick --base-url http://127.0.0.1:8081  # стенд vox.fake_server
+"""
+
+import argparse
+import asyncio
+import time
+
+from config import VOX_TOKEN
+from prompts import prediction_prompt
+from vox.asyncapi import AsyncVoxAPI
+from vox.metrics import Summaries
+from vox_executable import process_user_nickname
+
+
+async def run(nicknames, prompt, rounds, base_url):
+    # Без кэша ai_analytics: full-режим честно платит за лишний поход в VOX
+    vox = AsyncVoxAPI(token=VOX_TOKEN, base_url=base_url)
+    results = Summaries()
+    try:
+        for round_no in range(rounds):
+            for index, nickname in enumerate(nicknames):
+                modes = (True, False) if (round_no + index) % 2 == 0 else (False, True)
+                for lean in modes:
+                    mode = "lean" if lean else "full"
+                    started = time.monotonic()
+                    try:
+                        answer = await process_user_nickname(
+                            vox, nickname, prompt, lean=lean
+                        )
+                    except Exception as e:
+                        print(f"{nickname:<20}{mode:<6} error: {e}")
+                        continue
+                    seconds = time.monotonic() - started
+                    results.observe(f"{mode}.seconds", seconds)
+                    results.observe(f"{mode}.chars", len(answer or ""))
+                    print(
+                        f"{nickname:<20}{mode:<6}{seconds:>8.2f}s{len(answer or ''):>8} chars"
+                    )
+    finally:
+        await vox.close()
+
+    print()
+    for key, summary in sorted(results.as_dict().items()):
+        print(f"{key:<14}{summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lean vs full custom_report A/B")
+    parser.add_argument("nicknames", nargs="+")
+    parser.add_argument("--prompt", default=prediction_prompt)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--base-url", default="https://api.vox-lab.com/")
+    args = parser.parse_args()
+    asyncio.run(run(args.nicknames, args.prompt, args.rounds, args.base_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Сравнение стоимости разбора ответов VOX: сырой dict, полная валидация
+pydantic, ленивый LazyModel и trusted-режим (без валидации).
+
+    python -m bin.bench_models [повторов]
+"""
+
+import sys
+import timeit
+
+from vox.lazy import LazyModel
+from vox.models import AIAnalytics, UserProfile
+
+
+def analytics_payload() -> dict:
+    return {
+        "type": "USER",
+        "id": 123456,
+        "message_count": 4200,
+        "report": "Отчёт " * 400,
+        "embedding": [i / 1536 for i in range(1536)],
+        "date": "2025-01-01T00:00:00",
+        "version": 3,
+    }
+
+
+def profile_payload() -> dict:
+    return {
+        "id": 123456,
+        "full_name": "Test User",
+        "alias": "test_user",
+        "about": "about",
+        "account_age": 1234.5,
+        "pic": "",
+        "groups": [
+            {
+                "id": i,
+                "name": f"group {i}",
+                "about": "about",
+                "members_count": i * 10,
+                "alias": f"group_{i}",
+            }
+            for i in range(50)
+        ],
+        "actions": [],
+    }
+
+
+# Типичный сценарий бота: из ответа читается одно-два поля
+ACCESS = {
+    AIAnalytics: ("report", "date"),
+    UserProfile: ("alias", "full_name"),
+}
+
+
+def cases(model, payload):
+    fields = ACCESS[model]
+
+    def raw():
+        for name in fields:
+            payload.get(name)
+
+    def validated():
+        obj = model.model_validate(payload)
+        for name in fields:
+            getattr(obj, name)
+
+    def lazy():
+        obj = LazyModel(model, payload)
+        for name in fields:
+            getattr(obj, name)
+
+    def trusted():
+        obj = LazyModel(model, payload, trusted=True)
+        for name in fields:
+            getattr(obj, name)
+
+    return {"dict": raw, "model_validate": validated, "lazy": lazy, "trusted": trusted}
+
+
+def main(number: int = 2000):
+    print(f"{'model':<14}{'mode':<16}{'us/op':>10}")
+    for model, payload in (
+        (AIAnalytics, analytics_payload()),
+        (UserProfile, profile_payload()),
+    ):
+        for mode, func in cases(model, payload).items():
+            seconds = timeit.timeit(func, number=number)
+            print(f"{model.__name__:<14}{mode:<16}{seconds / number * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
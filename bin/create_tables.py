@@ -1,6 +1,7 @@
 from db import database
 from db.User import User
+from db.VoxCache import VoxCache
 
 if __name__ == "__main__":
     database.connect()
-    database.create_tables([User], safe=True)
+    database.create_tables([User, VoxCache], safe=True)
@@ -1,6 +1,7 @@
 from db import database
 from db.User import User
+from db.VoxCache import VoxCache
 
 if __name__ == "__main__":
     database.connect()
-    database.drop_tables([User])
+    database.drop_tables([User, VoxCache])
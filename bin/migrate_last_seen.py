@@ -0,0 +1,10 @@
+from db import database
+
+if __name__ == "__main__":
+    database.connect()
+    database.execute_sql(
+        'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP'
+    )
+    database.execute_sql(
+        'CREATE INDEX IF NOT EXISTS user_last_seen ON "user" (last_seen)'
+    )
@@ -14,4 +14,36 @@ BOT_TOKEN = os.environ["BOT_TOKEN"]
 
 MIXPANEL_TOKEN = os.getenv("MIXPANEL_TOKEN")
 
+# Зеркала VOX через запятую; hedging включается перцентилем задержки (например 95)
+VOX_BASE_URLS = os.getenv("VOX_BASE_URLS", "https://api.vox-lab.com/").split(",")
+VOX_HEDGE_PERCENTILE = (
+    float(os.environ["VOX_HEDGE_PERCENTILE"])
+    if os.getenv("VOX_HEDGE_PERCENTILE")
+    else None
+)
+# Доля чтений (0..1) в lean-режиме: custom_report без предварительного ai_analytics
+VOX_LEAN_RATIO = float(os.getenv("VOX_LEAN_RATIO", "0"))
+# Через сколько секунд без ответа VOX параллельно запускать GPT, по сценариям:
+# READING_DEADLINES="prediction=6,question=5,compatibility=8"; нет сценария - без гонки
+READING_DEADLINES = {
+    flow.strip(): float(seconds)
+    for flow, seconds in (
+        item.split("=", 1)
+        for item in os.getenv("READING_DEADLINES", "").split(",")
+        if item
+    )
+}
+# Бюджет custom_prompt в байтах URL (percent-encoded, кириллица - 6 байт на букву;
+# отчёты ai_analytics сжимаются под него):
+# PROMPT_BUDGETS="compatibility=24000,question=14000"; остальные - PROMPT_BUDGET_DEFAULT
+PROMPT_BUDGET_DEFAULT = int(os.getenv("PROMPT_BUDGET_DEFAULT", "16000"))
+PROMPT_BUDGETS = {
+    flow.strip(): int(size)
+    for flow, size in (
+        item.split("=", 1)
+        for item in os.getenv("PROMPT_BUDGETS", "").split(",")
+        if item
+    )
+}
+
 ERROR_CHAT_ID = int(os.environ["ERROR_CHAT_ID"])
@@ -12,6 +12,8 @@ class User(peewee_async.AioModel):
     name = peewee.TextField(null=True)
     birth_date = peewee.DateField(null=True)
     zodiac_sign = peewee.TextField(null=True)
+    # UTC, обновляется не чаще раза в час (utils.login_requied)
+    last_seen = peewee.DateTimeField(null=True, index=True)
 
     class Meta:
         database = database
@@ -0,0 +1,64 @@
+import json
+import time
+
+import peewee
+import peewee_async
+
+from db import database
+
+
+class VoxCache(peewee_async.AioModel):
+    """Общий (между процессами) кэш ответов VOX: ключ -> JSON."""
+
+    key = peewee.TextField(primary_key=True)
+    value = peewee.TextField(null=True)
+    updated_at = peewee.DoubleField()
+
+    class Meta:
+        database = database
+        table_name = "vox_cache"
+
+
+class VoxCacheStore:
+    """Хранилище второго уровня для кэшей из vox.cache."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str):
+        row = await VoxCache.aio_get_or_none(VoxCache.key == self._key(key))
+        if row is None:
+            return None
+        value = json.loads(row.value) if row.value is not None else None
+        return value, row.updated_at
+
+    async def set(self, key: str, value) -> None:
+        data = json.dumps(value, ensure_ascii=False) if value is not None else None
+        await (
+            VoxCache.insert(key=self._key(key), value=data, updated_at=time.time())
+            .on_conflict(
+                conflict_target=[VoxCache.key],
+                update={VoxCache.value: data, VoxCache.updated_at: time.time()},
+            )
+            .aio_execute()
+        )
+
+    async def delete(self, key: str) -> None:
+        await VoxCache.delete().where(VoxCache.key == self._key(key)).aio_execute()
+
+    async def purge(self, older_than: float, key_like: str = "%") -> int:
+        """
+        Удаляет записи пространства имён, обновлённые раньше older_than
+        (unix time), с ключом по LIKE-шаблону key_like. Возвращает их число.
+        """
+        return await (
+            VoxCache.delete()
+            .where(
+                (VoxCache.key % self._key(key_like))
+                & (VoxCache.updated_at < older_than)
+            )
+            .aio_execute()
+        )
@@ -14,10 +14,14 @@ import re
 import json
 import html
 import os
+from functools import partial
 
 from vox.asyncapi import AsyncVoxAPI
 from vox.exceptions import NotFoundError
 from vox_executable import process_user_nickname, process_user_nicknames
+from utils.reading_cache import CachePolicy
+from utils.progressive import ProgressiveEditor
+from utils.openai_gpt import ask_gpt_progressive
 from prompts import (
     prediction_prompt,
     qualities_prompt,
@@ -56,6 +60,21 @@ def escape_nickname_for_markdown(nickname: str) -> str:
     return nickname.replace("_", "\\_")
 
 
+def _progress_editor(callback: CallbackQuery, prefix: str):
+    """ProgressiveEditor для сообщения колбэка: inline или обычного."""
+    bot = callback.bot
+    if callback.inline_message_id and bot is not None:
+        return ProgressiveEditor(
+            partial(
+                bot.edit_message_text, inline_message_id=callback.inline_message_id
+            ),
+            prefix=prefix,
+        )
+    if callback.message and hasattr(callback.message, "edit_text"):
+        return ProgressiveEditor(callback.message.edit_text, prefix=prefix)  # type: ignore[attr-defined]
+    return None
+
+
 class VoxMiddleware:
     def __init__(self, vox: AsyncVoxAPI):
         self.vox = vox
@@ -71,13 +90,14 @@ async def inline_prediction_handler(inline_query: InlineQuery, vox: AsyncVoxAPI)
     results: list[InlineQueryResultUnion] = []
     query = inline_query.query.strip()
     user_id = inline_query.from_user.id if inline_query.from_user else None
-    logger.info(
-        f"[INLINE] Получен запрос: '{query}' от user_id={user_id}"
+    logger.info(f"[INLINE] Получен запрос: '{query}' от user_id={user_id}")
+    query_type = (
+        "nickname"
+        if query.startswith("@")
+        or (query and all(c.isalnum() or c == "_" for c in query) and len(query) < 30)
+        else "question"
     )
-    query_type = 'nickname' if query.startswith("@") or (
-        query and all(c.isalnum() or c == "_" for c in query) and len(query) < 30
-    ) else 'question'
-    
+
     if mp:
         mp.track(
             distinct_id=str(user_id) if user_id else "anonymous",
@@ -85,7 +105,7 @@ async def inline_prediction_handler(inline_query: InlineQuery, vox: AsyncVoxAPI)
             properties={
                 "telegram_user_id": user_id,
                 "query": query,
-                "query_type": query_type
+                "query_type": query_type,
             },
         )
 
@@ -261,19 +281,25 @@ async def inline_prediction_handler(inline_query: InlineQuery, vox: AsyncVoxAPI)
 @router.callback_query(lambda c: c.data.startswith("get_pred_"))
 async def handle_get_prediction(callback: CallbackQuery, vox: AsyncVoxAPI):
     await callback.answer()
-    nickname = decode_nickname(callback.data.replace("get_pred_", "")) if callback.data else ""
+    nickname = (
+        decode_nickname(callback.data.replace("get_pred_", "")) if callback.data else ""
+    )
     logger.info(f"[CALLBACK] Получение предсказания для @{nickname}")
-    
+
     if mp:
         mp.track(
-            distinct_id=str(callback.from_user.id) if callback.from_user else "anonymous",
+            distinct_id=(
+                str(callback.from_user.id) if callback.from_user else "anonymous"
+            ),
             event_name="inline_prediction",
             properties={
-                "telegram_user_id": callback.from_user.id if callback.from_user else None,
-                "target_nickname": nickname
+                "telegram_user_id": (
+                    callback.from_user.id if callback.from_user else None
+                ),
+                "target_nickname": nickname,
             },
         )
-    
+
     bot = callback.bot
     try:
         if callback.inline_message_id and bot is not None:
@@ -285,10 +311,23 @@ async def handle_get_prediction(callback: CallbackQuery, vox: AsyncVoxAPI):
         elif callback.message and hasattr(callback.message, "edit_text"):
             await callback.message.edit_text(f"<b>🔮 Получаем предсказание для @{nickname}...</b>\n\n⏳ Пожалуйста, подождите...", parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
         daily_prompt = daily_prediction_prompt
+        progress = _progress_editor(
+            callback, f"<b>🔮 Предсказание на день для @{nickname}</b>\n\n"
+        )
         try:
-            prediction = await process_user_nickname(vox, nickname, daily_prompt)
+            prediction = await process_user_nickname(
+                vox,
+                nickname,
+                daily_prompt,
+                fallback_prompt=daily_prediction_prompt_gpt,
+                cache_policy=CachePolicy.DAILY,
+                progress=progress,
+                flow="prediction",
+            )
             if prediction:
-                formatted = f"<b>🔮 Предсказание на день для @{nickname}</b>\n\n{prediction}"
+                formatted = (
+                    f"<b>🔮 Предсказание на день для @{nickname}</b>\n\n{prediction}"
+                )
                 if callback.inline_message_id and bot is not None:
                     await bot.edit_message_text(
                         formatted,
@@ -312,22 +351,26 @@ async def handle_get_prediction(callback: CallbackQuery, vox: AsyncVoxAPI):
             logger.info(f"Переключаемся на GPT для пользователя {nickname}")
             # Отправляем ошибку в чат ошибок
             import traceback
+
             error_text = f"<b>❗️ Ошибка в инлайн-режиме (предсказание):</b>\n<b>Пользователь не найден:</b> {nickname}\n<b>Ошибка:</b> {e}\n<b>User ID:</b> {callback.from_user.id if callback.from_user else 'unknown'}"
-            chat_id = os.getenv('ERROR_CHAT_ID')
+            chat_id = os.getenv("ERROR_CHAT_ID")
             if chat_id and bot:
                 try:
                     await bot.send_message(chat_id, error_text)
                 except Exception as send_error:
                     logger.error(f"Не удалось отправить ошибку в чат: {send_error}")
             else:
-                logger.error('ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат')
+                logger.error(
+                    "ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат"
+                )
             # Fallback на GPT
-            from utils.openai_gpt import ask_gpt
-            import asyncio
-            loop = asyncio.get_running_loop()
-            prediction = await loop.run_in_executor(None, ask_gpt, daily_prediction_prompt_gpt)
+            prediction = await ask_gpt_progressive(
+                daily_prediction_prompt_gpt, progress
+            )
             if prediction:
-                formatted = f"<b>🔮 Предсказание на день для @{nickname}</b>\n\n{prediction}"
+                formatted = (
+                    f"<b>🔮 Предсказание на день для @{nickname}</b>\n\n{prediction}"
+                )
                 if callback.inline_message_id and bot is not None:
                     await bot.edit_message_text(
                         formatted,
@@ -366,17 +409,21 @@ async def handle_get_question(callback: CallbackQuery, vox: AsyncVoxAPI):
     await callback.answer()
     question = callback.data.replace("get_q_", "") if callback.data else ""
     logger.info(f"[CALLBACK] Получение ответа на вопрос: {question}")
-    
+
     if mp:
         mp.track(
-            distinct_id=str(callback.from_user.id) if callback.from_user else "anonymous",
+            distinct_id=(
+                str(callback.from_user.id) if callback.from_user else "anonymous"
+            ),
             event_name="inline_question",
             properties={
-                "telegram_user_id": callback.from_user.id if callback.from_user else None,
-                "question": question[:100]  # Ограничиваем длину вопроса
+                "telegram_user_id": (
+                    callback.from_user.id if callback.from_user else None
+                ),
+                "question": question[:100],  # Ограничиваем длину вопроса
             },
         )
-    
+
     bot = callback.bot
     user_nick = (
         callback.from_user.username
@@ -393,8 +440,17 @@ async def handle_get_question(callback: CallbackQuery, vox: AsyncVoxAPI):
         elif callback.message and hasattr(callback.message, "edit_text"):
             await callback.message.edit_text(f"<b>🔮 Получаем ответ на вопрос...</b>\n\n⏳ Пожалуйста, подождите...", parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
         question_prompt = f"Вопрос: {question}" + answers_prompt
+        progress = _progress_editor(
+            callback, f"<b>🔮 Вопрос:</b> {question}\n\n<b>Ответ:</b>\n"
+        )
         try:
-            answer = await process_user_nickname(vox, user_nick, question_prompt)
+            answer = await process_user_nickname(
+                vox,
+                user_nick,
+                question_prompt,
+                fallback_prompt=f"Вопрос: {question}" + answers_prompt_gpt,
+                progress=progress,
+            )
             if answer:
                 formatted = f"<b>🔮 Вопрос:</b> {question}\n\n<b>Ответ:</b>\n{answer}"
                 if callback.inline_message_id and bot is not None:
@@ -420,21 +476,21 @@ async def handle_get_question(callback: CallbackQuery, vox: AsyncVoxAPI):
             logger.info(f"Переключаемся на GPT для пользователя {user_nick}")
             # Отправляем ошибку в чат ошибок
             import traceback
+
             error_text = f"<b>❗️ Ошибка в инлайн-режиме (вопрос):</b>\n<b>Пользователь не найден:</b> {user_nick}\n<b>Вопрос:</b> {question}\n<b>Ошибка:</b> {e}\n<b>User ID:</b> {callback.from_user.id if callback.from_user else 'unknown'}"
-            chat_id = os.getenv('ERROR_CHAT_ID')
+            chat_id = os.getenv("ERROR_CHAT_ID")
             if chat_id and bot:
                 try:
                     await bot.send_message(chat_id, error_text)
                 except Exception as send_error:
                     logger.error(f"Не удалось отправить ошибку в чат: {send_error}")
             else:
-                logger.error('ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат')
+                logger.error(
+                    "ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат"
+                )
             # Fallback на GPT
-            from utils.openai_gpt import ask_gpt
-            import asyncio
-            loop = asyncio.get_running_loop()
             question_prompt_gpt = f"Вопрос: {question}" + answers_prompt_gpt
-            answer = await loop.run_in_executor(None, ask_gpt, question_prompt_gpt)
+            answer = await ask_gpt_progressive(question_prompt_gpt, progress)
             if answer:
                 formatted = f"<b>🔮 Вопрос:</b> {question}\n\n<b>Ответ:</b>\n{answer}"
                 if callback.inline_message_id and bot is not None:
@@ -471,19 +527,25 @@ async def handle_get_question(callback: CallbackQuery, vox: AsyncVoxAPI):
 @router.callback_query(lambda c: c.data.startswith("get_qual_"))
 async def handle_get_qualities(callback: CallbackQuery, vox: AsyncVoxAPI):
     await callback.answer()
-    nickname = decode_nickname(callback.data.replace("get_qual_", "")) if callback.data else ""
+    nickname = (
+        decode_nickname(callback.data.replace("get_qual_", "")) if callback.data else ""
+    )
     logger.info(f"[CALLBACK] Получение анализа качеств для @{nickname}")
-    
+
     if mp:
         mp.track(
-            distinct_id=str(callback.from_user.id) if callback.from_user else "anonymous",
+            distinct_id=(
+                str(callback.from_user.id) if callback.from_user else "anonymous"
+            ),
             event_name="inline_qualities",
             properties={
-                "telegram_user_id": callback.from_user.id if callback.from_user else None,
-                "target_nickname": nickname
+                "telegram_user_id": (
+                    callback.from_user.id if callback.from_user else None
+                ),
+                "target_nickname": nickname,
             },
         )
-    
+
     bot = callback.bot
     try:
         if callback.inline_message_id and bot is not None:
@@ -494,9 +556,17 @@ async def handle_get_qualities(callback: CallbackQuery, vox: AsyncVoxAPI):
             )
         elif callback.message and hasattr(callback.message, "edit_text"):
             await callback.message.edit_text(f"<b>🔮 Анализируем качества @{nickname}...</b>\n\n⏳ Пожалуйста, подождите...", parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
+        progress = _progress_editor(
+            callback, f"<b>🔮 Анализ качеств @{nickname}</b>\n\n"
+        )
         try:
             result = await process_user_nickname(
-                vox, nickname, qualities_prompt["people_qualities"]
+                vox,
+                nickname,
+                qualities_prompt["people_qualities"],
+                fallback_prompt=qualities_prompt_gpt["people_qualities"],
+                cache_policy=CachePolicy.WEEKLY,
+                progress=progress,
             )
             if result:
                 formatted = f"<b>🔮 Анализ качеств @{nickname}</b>\n\n{result}"
@@ -509,7 +579,9 @@ async def handle_get_qualities(callback: CallbackQuery, vox: AsyncVoxAPI):
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(formatted, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
             else:
-                error_text = "❌ Не удалось проанализировать качества. Попробуйте позже."
+                error_text = (
+                    "❌ Не удалось проанализировать качества. Попробуйте позже."
+                )
                 if callback.inline_message_id and bot is not None:
                     await bot.edit_message_text(
                         error_text,
@@ -523,20 +595,22 @@ async def handle_get_qualities(callback: CallbackQuery, vox: AsyncVoxAPI):
             logger.info(f"Переключаемся на GPT для пользователя {nickname}")
             # Отправляем ошибку в чат ошибок
             import traceback
+
             error_text = f"<b>❗️ Ошибка в инлайн-режиме (качества):</b>\n<b>Пользователь не найден:</b> {nickname}\n<b>Ошибка:</b> {e}\n<b>User ID:</b> {callback.from_user.id if callback.from_user else 'unknown'}"
-            chat_id = os.getenv('ERROR_CHAT_ID')
+            chat_id = os.getenv("ERROR_CHAT_ID")
             if chat_id and bot:
                 try:
                     await bot.send_message(chat_id, error_text)
                 except Exception as send_error:
                     logger.error(f"Не удалось отправить ошибку в чат: {send_error}")
             else:
-                logger.error('ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат')
+                logger.error(
+                    "ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат"
+                )
             # Fallback на GPT
-            from utils.openai_gpt import ask_gpt
-            import asyncio
-            loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(None, ask_gpt, qualities_prompt_gpt["people_qualities"])
+            result = await ask_gpt_progressive(
+                qualities_prompt_gpt["people_qualities"], progress
+            )
             if result:
                 formatted = f"<b>🔮 Анализ качеств @{nickname}</b>\n\n{result}"
                 if callback.inline_message_id and bot is not None:
@@ -548,7 +622,9 @@ async def handle_get_qualities(callback: CallbackQuery, vox: AsyncVoxAPI):
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(formatted, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
             else:
-                error_text = "❌ Не удалось проанализировать качества. Попробуйте позже."
+                error_text = (
+                    "❌ Не удалось проанализировать качества. Попробуйте позже."
+                )
                 if callback.inline_message_id and bot is not None:
                     await bot.edit_message_text(
                         error_text,
@@ -558,7 +634,9 @@ async def handle_get_qualities(callback: CallbackQuery, vox: AsyncVoxAPI):
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(error_text, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
     except Exception as e:
-        logger.exception(f"[CALLBACK] Ошибка при получении анализа качеств для @{nickname}: {e}")
+        logger.exception(
+            f"[CALLBACK] Ошибка при получении анализа качеств для @{nickname}: {e}"
+        )
         error_text = "❌ Произошла ошибка при анализе качеств."
         if callback.inline_message_id and bot is not None:
             await bot.edit_message_text(
@@ -575,17 +653,21 @@ async def handle_get_yesno(callback: CallbackQuery, vox: AsyncVoxAPI):
     await callback.answer()
     question = callback.data.replace("get_yesno_", "") if callback.data else ""
     logger.info(f"[CALLBACK] Получение ответа да/нет на вопрос: {question}")
-    
+
     if mp:
         mp.track(
-            distinct_id=str(callback.from_user.id) if callback.from_user else "anonymous",
+            distinct_id=(
+                str(callback.from_user.id) if callback.from_user else "anonymous"
+            ),
             event_name="inline_yesno",
             properties={
-                "telegram_user_id": callback.from_user.id if callback.from_user else None,
-                "question": question[:100]  # Ограничиваем длину вопроса
+                "telegram_user_id": (
+                    callback.from_user.id if callback.from_user else None
+                ),
+                "question": question[:100],  # Ограничиваем длину вопроса
             },
         )
-    
+
     bot = callback.bot
     user_nick = (
         callback.from_user.username
@@ -605,10 +687,24 @@ async def handle_get_yesno(callback: CallbackQuery, vox: AsyncVoxAPI):
             f"Вопрос: {question}\n\nДай ответ Да или Нет с подробным объяснением."
             + yes_no_prompt
         )
+        progress = _progress_editor(
+            callback, f"<b>🔮 Вопрос:</b> {question}\n\n<b>Ответ Да/Нет:</b>\n"
+        )
         try:
-            answer = await process_user_nickname(vox, user_nick, yesno_prompt_full)
+            answer = await process_user_nickname(
+                vox,
+                user_nick,
+                yesno_prompt_full,
+                fallback_prompt=(
+                    f"Вопрос: {question}\n\nДай ответ Да или Нет с подробным объяснением."
+                    + yes_no_prompt_gpt
+                ),
+                progress=progress,
+            )
             if answer:
-                formatted = f"<b>🔮 Вопрос:</b> {question}\n\n<b>Ответ Да/Нет:</b>\n{answer}"
+                formatted = (
+                    f"<b>🔮 Вопрос:</b> {question}\n\n<b>Ответ Да/Нет:</b>\n{answer}"
+                )
                 if callback.inline_message_id and bot is not None:
                     await bot.edit_message_text(
                         formatted,
@@ -632,26 +728,28 @@ async def handle_get_yesno(callback: CallbackQuery, vox: AsyncVoxAPI):
             logger.info(f"Переключаемся на GPT для пользователя {user_nick}")
             # Отправляем ошибку в чат ошибок
             import traceback
+
             error_text = f"<b>❗️ Ошибка в инлайн-режиме (да/нет):</b>\n<b>Пользователь не найден:</b> {user_nick}\n<b>Вопрос:</b> {question}\n<b>Ошибка:</b> {e}\n<b>User ID:</b> {callback.from_user.id if callback.from_user else 'unknown'}"
-            chat_id = os.getenv('ERROR_CHAT_ID')
+            chat_id = os.getenv("ERROR_CHAT_ID")
             if chat_id and bot:
                 try:
                     await bot.send_message(chat_id, error_text)
                 except Exception as send_error:
                     logger.error(f"Не удалось отправить ошибку в чат: {send_error}")
             else:
-                logger.error('ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат')
+                logger.error(
+                    "ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат"
+                )
             # Fallback на GPT
-            from utils.openai_gpt import ask_gpt
-            import asyncio
-            loop = asyncio.get_running_loop()
             yesno_prompt_gpt_full = (
                 f"Вопрос: {question}\n\nДай ответ Да или Нет с подробным объяснением."
                 + yes_no_prompt_gpt
             )
-            answer = await loop.run_in_executor(None, ask_gpt, yesno_prompt_gpt_full)
+            answer = await ask_gpt_progressive(yesno_prompt_gpt_full, progress)
             if answer:
-                formatted = f"<b>🔮 Вопрос:</b> {question}\n\n<b>Ответ Да/Нет:</b>\n{answer}"
+                formatted = (
+                    f"<b>🔮 Вопрос:</b> {question}\n\n<b>Ответ Да/Нет:</b>\n{answer}"
+                )
                 if callback.inline_message_id and bot is not None:
                     await bot.edit_message_text(
                         formatted,
@@ -686,81 +784,129 @@ async def handle_get_yesno(callback: CallbackQuery, vox: AsyncVoxAPI):
 @router.callback_query(lambda c: c.data.startswith("get_comp_"))
 async def handle_get_compatibility(callback: CallbackQuery, vox: AsyncVoxAPI):
     await callback.answer()
-    target_nick = decode_nickname(callback.data.replace("get_comp_", "")) if callback.data else ""
-    user_nick = callback.from_user.username if callback.from_user and callback.from_user.username else str(callback.from_user.id) if callback.from_user else "user"
+    target_nick = (
+        decode_nickname(callback.data.replace("get_comp_", "")) if callback.data else ""
+    )
+    user_nick = (
+        callback.from_user.username
+        if callback.from_user and callback.from_user.username
+        else str(callback.from_user.id) if callback.from_user else "user"
+    )
     logger.info(f"[CALLBACK] Получение совместимости @{user_nick} и @{target_nick}")
-    
+
     if mp:
         mp.track(
-            distinct_id=str(callback.from_user.id) if callback.from_user else "anonymous",
+            distinct_id=(
+                str(callback.from_user.id) if callback.from_user else "anonymous"
+            ),
             event_name="inline_compatibility",
             properties={
-                "telegram_user_id": callback.from_user.id if callback.from_user else None,
+                "telegram_user_id": (
+                    callback.from_user.id if callback.from_user else None
+                ),
                 "user_nickname": user_nick,
-                "target_nickname": target_nick
+                "target_nickname": target_nick,
             },
         )
-    
+
     bot = callback.bot
     try:
         if callback.inline_message_id and bot is not None:
             await bot.edit_message_text(
                 f"<b>❤️ Анализируем совместимость @{user_nick} и @{target_nick}...</b>\n\n⏳ Пожалуйста, подождите...",
                 inline_message_id=callback.inline_message_id,
-                parse_mode=ParseMode.HTML
+                parse_mode=ParseMode.HTML,
             )
         elif callback.message and hasattr(callback.message, "edit_text"):
             await callback.message.edit_text(f"<b>❤️ Анализируем совместимость @{user_nick} и @{target_nick}...</b>\n\n⏳ Пожалуйста, подождите...", parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
+        progress = _progress_editor(
+            callback, f"<b>❤️ Совместимость @{user_nick} и @{target_nick}</b>\n\n"
+        )
         try:
-            report = await process_user_nicknames(vox, user_nick, target_nick, compatibility_prompt)
+            report = await process_user_nicknames(
+                vox,
+                user_nick,
+                target_nick,
+                compatibility_prompt,
+                fallback_prompt=compatibility_prompt_gpt,
+                progress=progress,
+            )
             if report:
-                formatted = f"<b>❤️ Совместимость @{user_nick} и @{target_nick}</b>\n\n{report}"
+                formatted = (
+                    f"<b>❤️ Совместимость @{user_nick} и @{target_nick}</b>\n\n{report}"
+                )
                 if callback.inline_message_id and bot is not None:
-                    await bot.edit_message_text(formatted, inline_message_id=callback.inline_message_id, parse_mode=ParseMode.HTML)
+                    await bot.edit_message_text(
+                        formatted,
+                        inline_message_id=callback.inline_message_id,
+                        parse_mode=ParseMode.HTML,
+                    )
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(formatted, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
             else:
                 error_text = "❌ Не удалось получить совместимость. Попробуйте позже."
                 if callback.inline_message_id and bot is not None:
-                    await bot.edit_message_text(error_text, inline_message_id=callback.inline_message_id, parse_mode=ParseMode.HTML)
+                    await bot.edit_message_text(
+                        error_text,
+                        inline_message_id=callback.inline_message_id,
+                        parse_mode=ParseMode.HTML,
+                    )
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(error_text, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
         except NotFoundError as e:
-            logger.warning(f"Один из пользователей ({user_nick} или {target_nick}) не найден в VOX API: {e}")
+            logger.warning(
+                f"Один из пользователей ({user_nick} или {target_nick}) не найден в VOX API: {e}"
+            )
             logger.info(f"Переключаемся на GPT для анализа совместимости")
             # Отправляем ошибку в чат ошибок
             import traceback
+
             error_text = f"<b>❗️ Ошибка в инлайн-режиме (совместимость):</b>\n<b>Пользователи:</b> {user_nick} и {target_nick}\n<b>Ошибка:</b> {e}\n<b>User ID:</b> {callback.from_user.id if callback.from_user else 'unknown'}"
-            chat_id = os.getenv('ERROR_CHAT_ID')
+            chat_id = os.getenv("ERROR_CHAT_ID")
             if chat_id and bot:
                 try:
                     await bot.send_message(chat_id, error_text)
                 except Exception as send_error:
                     logger.error(f"Не удалось отправить ошибку в чат: {send_error}")
             else:
-                logger.error('ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат')
+                logger.error(
+                    "ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат"
+                )
             # Fallback на GPT
-            from utils.openai_gpt import ask_gpt
-            import asyncio
-            loop = asyncio.get_running_loop()
-            report = await loop.run_in_executor(None, ask_gpt, compatibility_prompt_gpt)
+            report = await ask_gpt_progressive(compatibility_prompt_gpt, progress)
             if report:
-                formatted = f"<b>❤️ Совместимость @{user_nick} и @{target_nick}</b>\n\n{report}"
+                formatted = (
+                    f"<b>❤️ Совместимость @{user_nick} и @{target_nick}</b>\n\n{report}"
+                )
                 if callback.inline_message_id and bot is not None:
-                    await bot.edit_message_text(formatted, inline_message_id=callback.inline_message_id, parse_mode=ParseMode.HTML)
+                    await bot.edit_message_text(
+                        formatted,
+                        inline_message_id=callback.inline_message_id,
+                        parse_mode=ParseMode.HTML,
+                    )
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(formatted, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
             else:
                 error_text = "❌ Не удалось получить совместимость. Попробуйте позже."
                 if callback.inline_message_id and bot is not None:
-                    await bot.edit_message_text(error_text, inline_message_id=callback.inline_message_id, parse_mode=ParseMode.HTML)
+                    await bot.edit_message_text(
+                        error_text,
+                        inline_message_id=callback.inline_message_id,
+                        parse_mode=ParseMode.HTML,
+                    )
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(error_text, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
     except Exception as e:
-        logger.exception(f"[CALLBACK] Ошибка при получении совместимости @{user_nick} и @{target_nick}: {e}")
+        logger.exception(
+            f"[CALLBACK] Ошибка при получении совместимости @{user_nick} и @{target_nick}: {e}"
+        )
         error_text = "❌ Произошла ошибка при анализе совместимости."
         if callback.inline_message_id and bot is not None:
-            await bot.edit_message_text(error_text, inline_message_id=callback.inline_message_id, parse_mode=ParseMode.HTML)
+            await bot.edit_message_text(
+                error_text,
+                inline_message_id=callback.inline_message_id,
+                parse_mode=ParseMode.HTML,
+            )
         elif callback.message and hasattr(callback.message, "edit_text"):
             await callback.message.edit_text(error_text, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
 
@@ -791,18 +937,22 @@ async def handle_get_compatibility_two(callback: CallbackQuery, vox: AsyncVoxAPI
         "Не ссылайся на активность человека в конкретных каналах и чатах.\n"
         "Оформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй <html> и <body> теги."
     )
-    
+
     if mp:
         mp.track(
-            distinct_id=str(callback.from_user.id) if callback.from_user else "anonymous",
+            distinct_id=(
+                str(callback.from_user.id) if callback.from_user else "anonymous"
+            ),
             event_name="inline_compatibility_two",
             properties={
-                "telegram_user_id": callback.from_user.id if callback.from_user else None,
+                "telegram_user_id": (
+                    callback.from_user.id if callback.from_user else None
+                ),
                 "nickname1": nick1,
-                "nickname2": nick2
+                "nickname2": nick2,
             },
         )
-    
+
     bot = callback.bot
     try:
         if callback.inline_message_id and bot is not None:
@@ -813,8 +963,18 @@ async def handle_get_compatibility_two(callback: CallbackQuery, vox: AsyncVoxAPI
             )
         elif callback.message and hasattr(callback.message, "edit_text"):
             await callback.message.edit_text(f"<b>❤️ Анализируем совместимость @{nick1} и @{nick2}...</b>\n\n⏳ Пожалуйста, подождите...", parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
+        progress = _progress_editor(
+            callback, f"<b>❤️ Совместимость @{nick1} и @{nick2}</b>\n\n"
+        )
         try:
-            report = await process_user_nicknames(vox, nick1, nick2, manual_prompt)
+            report = await process_user_nicknames(
+                vox,
+                nick1,
+                nick2,
+                manual_prompt,
+                fallback_prompt=compatibility_of_2_prompt_gpt,
+                progress=progress,
+            )
             if report:
                 formatted = f"<b>❤️ Совместимость @{nick1} и @{nick2}</b>\n\n{report}"
                 try:
@@ -827,12 +987,13 @@ async def handle_get_compatibility_two(callback: CallbackQuery, vox: AsyncVoxAPI
                     elif callback.message and hasattr(callback.message, "edit_text"):
                         await callback.message.edit_text(formatted, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
                 except Exception as e:
-                    logger.exception(f"[CALLBACK] Ошибка парсинга HTML, пробуем без parse_mode: {e}")
+                    logger.exception(
+                        f"[CALLBACK] Ошибка парсинга HTML, пробуем без parse_mode: {e}"
+                    )
                     # Пробуем отправить без parse_mode
                     if callback.inline_message_id and bot is not None:
                         await bot.edit_message_text(
-                            formatted,
-                            inline_message_id=callback.inline_message_id
+                            formatted, inline_message_id=callback.inline_message_id
                         )
                     elif callback.message and hasattr(callback.message, "edit_text"):
                         await callback.message.edit_text(formatted)  # type: ignore[attr-defined]
@@ -847,24 +1008,26 @@ async def handle_get_compatibility_two(callback: CallbackQuery, vox: AsyncVoxAPI
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(error_text, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
         except NotFoundError as e:
-            logger.warning(f"Один из пользователей ({nick1} или {nick2}) не найден в VOX API: {e}")
+            logger.warning(
+                f"Один из пользователей ({nick1} или {nick2}) не найден в VOX API: {e}"
+            )
             logger.info(f"Переключаемся на GPT для анализа совместимости двух людей")
             # Отправляем ошибку в чат ошибок
             import traceback
+
             error_text = f"<b>❗️ Ошибка в инлайн-режиме (совместимость двух):</b>\n<b>Пользователи:</b> {nick1} и {nick2}\n<b>Ошибка:</b> {e}\n<b>User ID:</b> {callback.from_user.id if callback.from_user else 'unknown'}"
-            chat_id = os.getenv('ERROR_CHAT_ID')
+            chat_id = os.getenv("ERROR_CHAT_ID")
             if chat_id and bot:
                 try:
                     await bot.send_message(chat_id, error_text)
                 except Exception as send_error:
                     logger.error(f"Не удалось отправить ошибку в чат: {send_error}")
             else:
-                logger.error('ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат')
+                logger.error(
+                    "ERROR_CHAT_ID не найден или bot недоступен, ошибка не отправлена в чат"
+                )
             # Fallback на GPT
-            from utils.openai_gpt import ask_gpt
-            import asyncio
-            loop = asyncio.get_running_loop()
-            report = await loop.run_in_executor(None, ask_gpt, compatibility_of_2_prompt_gpt)
+            report = await ask_gpt_progressive(compatibility_of_2_prompt_gpt, progress)
             if report:
                 formatted = f"<b>❤️ Совместимость @{nick1} и @{nick2}</b>\n\n{report}"
                 try:
@@ -877,12 +1040,13 @@ async def handle_get_compatibility_two(callback: CallbackQuery, vox: AsyncVoxAPI
                     elif callback.message and hasattr(callback.message, "edit_text"):
                         await callback.message.edit_text(formatted, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
                 except Exception as e:
-                    logger.exception(f"[CALLBACK] Ошибка парсинга HTML, пробуем без parse_mode: {e}")
+                    logger.exception(
+                        f"[CALLBACK] Ошибка парсинга HTML, пробуем без parse_mode: {e}"
+                    )
                     # Пробуем отправить без parse_mode
                     if callback.inline_message_id and bot is not None:
                         await bot.edit_message_text(
-                            formatted,
-                            inline_message_id=callback.inline_message_id
+                            formatted, inline_message_id=callback.inline_message_id
                         )
                     elif callback.message and hasattr(callback.message, "edit_text"):
                         await callback.message.edit_text(formatted)  # type: ignore[attr-defined]
@@ -897,7 +1061,9 @@ async def handle_get_compatibility_two(callback: CallbackQuery, vox: AsyncVoxAPI
                 elif callback.message and hasattr(callback.message, "edit_text"):
                     await callback.message.edit_text(error_text, parse_mode=ParseMode.HTML)  # type: ignore[attr-defined]
     except Exception as e:
-        logger.exception(f"[CALLBACK] Ошибка при получении совместимости двух людей @{nick1} и @{nick2}: {e}")
+        logger.exception(
+            f"[CALLBACK] Ошибка при получении совместимости двух людей @{nick1} и @{nick2}: {e}"
+        )
         error_text = "❌ Произошла ошибка при анализе совместимости."
         if callback.inline_message_id and bot is not None:
             await bot.edit_message_text(
@@ -23,9 +23,26 @@ from vox.exceptions import ApiError, NotFoundError
 import config
 from config import BOT_TOKEN, VOX_TOKEN
 from keyboards import main_menu, get_name_keyboard, get_zodiac_keyboard
-from vox_executable import process_user_nickname, process_user_nicknames
+from utils.reading_cache import CachePolicy, reading_cache
+from utils.progressive import ProgressiveEditor
+from utils.prompt_budget import prompt_budget
+from vox_executable import (
+    ReadingContext,
+    context_calls,
+    process_user_nickname,
+    process_user_nicknames,
+    race_seconds,
+    race_wins,
+    reading_ab,
+    stage_seconds,
+)
 from db.User import User
 from vox.asyncapi import AsyncVoxAPI
+from vox.cache import AnalyticsCache, UserIdCache
+from vox.pool import PoolConfig
+from vox.routing import EndpointRouter
+from vox.identity import IdentityIndex
+from db.VoxCache import VoxCacheStore
 from translations.get_phrase import get_phrase
 from utils.get_user_info import get_current_username, get_language
 from utils.login_requied import only_registered, only_registered_callback
@@ -33,6 +50,7 @@ from utils.zodiac import get_zodiac_sign
 from inline_daily_prediction import router as inline_router, VoxMiddleware
 from typing import Union
 from send_weekly_prediction import send_weekly_predictions
+from precompute_daily import precompute_daily_predictions
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import pytz
@@ -138,6 +156,8 @@ async def start_handler(message: Message, state: FSMContext):
                 reply_markup=get_name_keyboard(nickname, full_name),
             )
             await state.set_state(BotStates.waiting_for_name)
+
+
 @dp.message(Command("menu"))
 @only_registered
 async def menu_handler(message: Message, db_user: User):
@@ -177,7 +197,9 @@ async def menu_handler(message: Message, db_user: User):
 async def handle_callback_query(
     callback: CallbackQuery, state: FSMContext, db_user: User
 ):
-    logger.info(f"[CALLBACK] Нажата кнопка: {callback.data} от user_id={callback.from_user.id if callback.from_user else 'unknown'}")
+    logger.info(
+        f"[CALLBACK] Нажата кнопка: {callback.data} от user_id={callback.from_user.id if callback.from_user else 'unknown'}"
+    )
     await callback.answer()
     nickname = db_user.name
     if not nickname:
@@ -222,33 +244,42 @@ async def handle_callback_query(
             )
         try:
             report = await process_user_nickname(
-                vox, get_current_username(callback), daily_prediction_prompt
+                vox,
+                get_current_username(callback),
+                daily_prediction_prompt,
+                fallback_prompt=daily_prediction_prompt_gpt,
+                cache_policy=CachePolicy.DAILY,
+                progress=ProgressiveEditor(loading.edit_text),
+                flow="prediction",
             )
             if report:
-                await loading.edit_text(report, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+                await loading.edit_text(
+                    report, parse_mode=ParseMode.HTML, reply_markup=main_menu
+                )
             else:
                 await loading.edit_text(
                     "Не удалось получить предсказание. Попробуйте позже.",
-                    reply_markup=main_menu
+                    reply_markup=main_menu,
                 )
         except Exception as e:
             logger.exception(e)
             import traceback
+
             error_text = (
                 f"<b>❗️ Ошибка при предсказании (prediction callback):</b>\n"
                 f"<b>Nickname:</b> {get_current_username(callback)}\n"
                 f"<pre>{traceback.format_exc()}</pre>"
             )
-            chat_id = os.getenv('ERROR_CHAT_ID')
+            chat_id = os.getenv("ERROR_CHAT_ID")
             if chat_id:
                 await callback.message.bot.send_message(chat_id, error_text)
             else:
-                logger.error('ERROR_CHAT_ID не найден, ошибка не отправлена в чат')
+                logger.error("ERROR_CHAT_ID не найден, ошибка не отправлена в чат")
             await loading.edit_text(
                 get_phrase(
                     phrase_tag="processed_error", language=get_language(callback)
                 ),
-                reply_markup=main_menu
+                reply_markup=main_menu,
             )
 
 
@@ -267,7 +298,7 @@ async def handle_name_callback(callback: CallbackQuery, state: FSMContext):
     # Показываем клавиатуру выбора знака зодиака
     await callback.message.answer(
         get_phrase(phrase_tag="ask_zodiac_sign", language=get_language(callback)),
-        reply_markup=get_zodiac_keyboard()
+        reply_markup=get_zodiac_keyboard(),
     )
     await state.set_state(BotStates.waiting_for_zodiac)
 
@@ -282,18 +313,19 @@ async def process_name_input(message: Message, state: FSMContext):
         await state.update_data(name=name)
         await message.answer(
             get_phrase(phrase_tag="ask_zodiac_sign", language=get_language(message)),
-            reply_markup=get_zodiac_keyboard()
+            reply_markup=get_zodiac_keyboard(),
         )
         await state.set_state(BotStates.waiting_for_zodiac)
     except Exception as e:
         logger.exception(f"[process_name_input] Unhandled error: {e}")
         import traceback
+
         error_text = f"<b>❗️ Ошибка при вводе имени в основном боте:</b>\n<pre>{traceback.format_exc()}</pre>"
-        chat_id = os.getenv('ERROR_CHAT_ID')
+        chat_id = os.getenv("ERROR_CHAT_ID")
         if chat_id:
             await message.bot.send_message(chat_id, error_text)
         else:
-            logger.error('ERROR_CHAT_ID не найден, ошибка не отправлена в чат')
+            logger.error("ERROR_CHAT_ID не найден, ошибка не отправлена в чат")
         # Fallback на GPT (можно не делать для имени, если не требуется)
         # raise
 
@@ -301,10 +333,10 @@ async def process_name_input(message: Message, state: FSMContext):
 @dp.callback_query(lambda c: c.data.startswith("zodiac_"))
 async def handle_zodiac_callback(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
-    
+
     # Получаем выбранный знак зодиака (тег уже содержит zodiac_)
     zodiac_tag = callback.data
-    
+
     # Получаем сохраненное имя
     data = await state.get_data()
     name = data.get("name", "Пользователь")
@@ -314,7 +346,8 @@ async def handle_zodiac_callback(callback: CallbackQuery, state: FSMContext):
 
     # Сохраняем данные в БД
     user = await User.aio_get(
-        telegram_user_id=callback.from_user.id, telegram_chat_id=callback.message.chat.id
+        telegram_user_id=callback.from_user.id,
+        telegram_chat_id=callback.message.chat.id,
     )
     user.name = name
     user.birth_date = None  # Больше не сохраняем дату рождения
@@ -334,7 +367,7 @@ async def handle_zodiac_callback(callback: CallbackQuery, state: FSMContext):
                 "user_id": user.user_id,
             },
         )
-    
+
     # Отправляем сообщение о завершении регистрации
     await callback.message.answer(
         get_phrase(
@@ -376,33 +409,50 @@ async def process_question(message: Message, state: FSMContext):
                     "user_id": user.user_id,
                 },
             )
-        prediction_html_instruction = '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown.'
+        prediction_html_instruction = "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown."
         prompt = f"Вопрос: {question}" + answers_prompt + prediction_html_instruction
-        report = await process_user_nickname(vox, user_nick, prompt)
+        fallback_prompt = (
+            f"Вопрос: {question}" + answers_prompt_gpt + prediction_html_instruction
+        )
+        report = await process_user_nickname(
+            vox,
+            user_nick,
+            prompt,
+            fallback_prompt=fallback_prompt,
+            progress=ProgressiveEditor(loading.edit_text),
+            flow="question",
+        )
         if report:
-            await loading.edit_text(report, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+            await loading.edit_text(
+                report, parse_mode=ParseMode.HTML, reply_markup=main_menu
+            )
         else:
             await loading.edit_text(
                 "Не удалось получить предсказание. Попробуйте позже.",
-                reply_markup=main_menu
+                reply_markup=main_menu,
             )
     except Exception as e:
         logger.exception(f"[process_question] Unhandled error: {e}")
         import traceback
+
         error_text = f"<b>❗️ Ошибка при вопросе в основном боте:</b>\n<pre>{traceback.format_exc()}</pre>"
-        chat_id = os.getenv('ERROR_CHAT_ID')
+        chat_id = os.getenv("ERROR_CHAT_ID")
         if chat_id:
             await message.bot.send_message(chat_id, error_text)
         else:
-            logger.error('ERROR_CHAT_ID не найден, ошибка не отправлена в чат')
+            logger.error("ERROR_CHAT_ID не найден, ошибка не отправлена в чат")
         # Fallback на GPT
         try:
             from utils.openai_gpt import ask_gpt
-            prediction_html_instruction = '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown.'
-            prompt = f"Вопрос: {question}" + answers_prompt_gpt + prediction_html_instruction
-            loop = asyncio.get_running_loop()
-            gpt_result = await loop.run_in_executor(None, ask_gpt, prompt)
-            await message.answer(gpt_result, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+
+            prediction_html_instruction = "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown."
+            prompt = (
+                f"Вопрос: {question}" + answers_prompt_gpt + prediction_html_instruction
+            )
+            gpt_result = await ask_gpt(prompt)
+            await message.answer(
+                gpt_result, parse_mode=ParseMode.HTML, reply_markup=main_menu
+            )
         except Exception as gpt_e:
             logger.error(f"Ошибка при генерации ответа через GPT: {gpt_e}")
         # raise
@@ -431,33 +481,50 @@ async def process_yes_no(message: Message, state: FSMContext):
                     "user_id": user.user_id,
                 },
             )
-        prediction_html_instruction = '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown.'
+        prediction_html_instruction = "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown."
         prompt = f"Вопрос: {question}" + yes_no_prompt + prediction_html_instruction
-        report = await process_user_nickname(vox, user_nick, prompt)
+        fallback_prompt = (
+            f"Вопрос: {question}" + yes_no_prompt_gpt + prediction_html_instruction
+        )
+        report = await process_user_nickname(
+            vox,
+            user_nick,
+            prompt,
+            fallback_prompt=fallback_prompt,
+            progress=ProgressiveEditor(loading.edit_text),
+            flow="yes_no",
+        )
         if report:
-            await loading.edit_text(report, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+            await loading.edit_text(
+                report, parse_mode=ParseMode.HTML, reply_markup=main_menu
+            )
         else:
             await loading.edit_text(
                 "Не удалось получить предсказание. Попробуйте позже.",
-                reply_markup=main_menu
+                reply_markup=main_menu,
             )
     except Exception as e:
         logger.exception(f"[process_yes_no] Unhandled error: {e}")
         import traceback
+
         error_text = f"<b>❗️ Ошибка при вопросе Да/Нет в основном боте:</b>\n<pre>{traceback.format_exc()}</pre>"
-        chat_id = os.getenv('ERROR_CHAT_ID')
+        chat_id = os.getenv("ERROR_CHAT_ID")
         if chat_id:
             await message.bot.send_message(chat_id, error_text)
         else:
-            logger.error('ERROR_CHAT_ID не найден, ошибка не отправлена в чат')
+            logger.error("ERROR_CHAT_ID не найден, ошибка не отправлена в чат")
         # Fallback на GPT
         try:
             from utils.openai_gpt import ask_gpt
-            prediction_html_instruction = '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown.'
-            prompt = f"Вопрос: {question}" + yes_no_prompt_gpt + prediction_html_instruction
-            loop = asyncio.get_running_loop()
-            gpt_result = await loop.run_in_executor(None, ask_gpt, prompt)
-            await message.answer(gpt_result, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+
+            prediction_html_instruction = "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown."
+            prompt = (
+                f"Вопрос: {question}" + yes_no_prompt_gpt + prediction_html_instruction
+            )
+            gpt_result = await ask_gpt(prompt)
+            await message.answer(
+                gpt_result, parse_mode=ParseMode.HTML, reply_markup=main_menu
+            )
         except Exception as gpt_e:
             logger.error(f"Ошибка при генерации ответа через GPT: {gpt_e}")
         # raise
@@ -497,51 +564,68 @@ async def process_compatibility(message: Message, state: FSMContext):
                     "user_id": user.user_id,
                 },
             )
-        logger.info(f"[DEBUG] process_compatibility: вызываем process_user_nicknames с {user_nick} и {target[1:]}")
-        prediction_html_instruction = '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown.'
+        logger.info(
+            f"[DEBUG] process_compatibility: вызываем process_user_nicknames с {user_nick} и {target[1:]}"
+        )
+        prediction_html_instruction = "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown."
         manual_prompt = (
-        "Проанализируй совместимость этих людей между собой (тебе пишет @" + user_nick ").\n"
-        "Опиши главные черты каждого из них.\n"
-        "Дай конкретный ответ в процентах насколько люди совместимы.\n"
-        "Текста должно быть немного, все должно быть лаконично.\n"
-        "Главное чтобы было количество процентов совместимости.\n"
-        "Дай ответ на русском языке.\n"
-        "Используй стиль гадания на картах таро, упомяни карты совместимости.\n"
-        "Ответ должен быть полезным и вдохновляющим.\n"
-        "Используй эмодзи в меру для создания атмосферы.\n"
-        "Не используй bullet list.\n"
-        "Не используй теги <ul>, <ol>, <li>.\n"
-        "Не ссылайся на активность человека в конкретных каналах и чатах.\n"
-        "Оформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй <html> и <body> теги."
+            "Проанализируй совместимость этих людей между собой (тебе пишет @"
+            + user_nick
+            + ").\n"
+            "Опиши главные черты каждого из них.\n"
+            "Дай конкретный ответ в процентах насколько люди совместимы.\n"
+            "Текста должно быть немного, все должно быть лаконично.\n"
+            "Главное чтобы было количество процентов совместимости.\n"
+            "Дай ответ на русском языке.\n"
+            "Используй стиль гадания на картах таро, упомяни карты совместимости.\n"
+            "Ответ должен быть полезным и вдохновляющим.\n"
+            "Используй эмодзи в меру для создания атмосферы.\n"
+            "Не используй bullet list.\n"
+            "Не используй теги <ul>, <ol>, <li>.\n"
+            "Не ссылайся на активность человека в конкретных каналах и чатах.\n"
+            "Оформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй <html> и <body> теги."
         )
         report = await process_user_nicknames(
-            vox, user_nick, target[1:], manual_prompt
+            vox,
+            user_nick,
+            target[1:],
+            manual_prompt,
+            fallback_prompt=compatibility_prompt_gpt + prediction_html_instruction,
+            progress=ProgressiveEditor(loading.edit_text),
+            flow="compatibility",
         )
         if report:
-            await loading.edit_text(report, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+            await loading.edit_text(
+                report, parse_mode=ParseMode.HTML, reply_markup=main_menu
+            )
         else:
-            logger.error(f"[DEBUG] process_compatibility: process_user_nicknames вернул None")
+            logger.error(
+                f"[DEBUG] process_compatibility: process_user_nicknames вернул None"
+            )
             await loading.edit_text(
                 "Не удалось получить предсказание. Попробуйте позже.",
-                reply_markup=main_menu
+                reply_markup=main_menu,
             )
     except Exception as e:
         logger.exception(f"[process_compatibility] Unhandled error: {e}")
         import traceback
+
         error_text = f"<b>❗️ Ошибка при совместимости в основном боте:</b>\n<pre>{traceback.format_exc()}</pre>"
-        chat_id = os.getenv('ERROR_CHAT_ID')
+        chat_id = os.getenv("ERROR_CHAT_ID")
         if chat_id:
             await message.bot.send_message(chat_id, error_text)
         else:
-            logger.error('ERROR_CHAT_ID не найден, ошибка не отправлена в чат')
+            logger.error("ERROR_CHAT_ID не найден, ошибка не отправлена в чат")
         # Fallback на GPT
         try:
             from utils.openai_gpt import ask_gpt
-            prediction_html_instruction = '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown.'
+
+            prediction_html_instruction = "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown."
             prompt = compatibility_prompt_gpt + prediction_html_instruction
-            loop = asyncio.get_running_loop()
-            gpt_result = await loop.run_in_executor(None, ask_gpt, prompt)
-            await message.answer(gpt_result, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+            gpt_result = await ask_gpt(prompt)
+            await message.answer(
+                gpt_result, parse_mode=ParseMode.HTML, reply_markup=main_menu
+            )
         except Exception as gpt_e:
             logger.error(f"Ошибка при генерации ответа через GPT: {gpt_e}")
         # raise
@@ -581,50 +665,77 @@ async def process_qualities(message: Message, state: FSMContext):
                     "user_id": user.user_id,
                 },
             )
-        logger.info(f"[DEBUG] process_qualities: вызываем process_user_nickname для получения качеств {target[1:]}")
+        # Один контекст на оба чтения: id и аналитика цели запрашиваются один раз
+        context = ReadingContext(vox)
+        logger.info(
+            f"[DEBUG] process_qualities: вызываем process_user_nickname для получения качеств {target[1:]}"
+        )
         target_qualities = await process_user_nickname(
-            vox, target[1:], qualities_prompt["people_qualities"]
+            vox,
+            target[1:],
+            qualities_prompt["people_qualities"],
+            fallback_prompt=qualities_prompt_gpt["people_qualities"],
+            cache_policy=CachePolicy.WEEKLY,
+            context=context,
         )  ## получаем качества target'а
         if target_qualities:
-            logger.info(f"[DEBUG] process_qualities: качества получены, вызываем process_user_nicknames")
-            prediction_html_instruction = '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown.'
+            logger.info(
+                f"[DEBUG] process_qualities: качества получены, вызываем process_user_nicknames"
+            )
+            prediction_html_instruction = "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown."
             report = await process_user_nicknames(
                 vox,
                 user_nick,
                 target[1:],
-                qualities_prompt["tips"].replace("{info}", target_qualities) + prediction_html_instruction,
+                qualities_prompt["tips"].replace("{info}", target_qualities)
+                + prediction_html_instruction,
+                fallback_prompt=qualities_prompt_gpt["tips"]
+                + prediction_html_instruction,
+                progress=ProgressiveEditor(loading.edit_text),
+                flow="qualities",
+                context=context,
             )
+            logger.debug(f"[DEBUG] process_qualities: VOX context {context.stats()}")
             if report:
-                await loading.edit_text(report, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+                await loading.edit_text(
+                    report, parse_mode=ParseMode.HTML, reply_markup=main_menu
+                )
             else:
-                logger.error(f"[DEBUG] process_qualities: process_user_nicknames вернул None")
+                logger.error(
+                    f"[DEBUG] process_qualities: process_user_nicknames вернул None"
+                )
                 await loading.edit_text(
                     "Не удалось получить предсказание. Попробуйте позже.",
-                    reply_markup=main_menu
+                    reply_markup=main_menu,
                 )
         else:
-            logger.error(f"[DEBUG] process_qualities: process_user_nickname вернул None")
+            logger.error(
+                f"[DEBUG] process_qualities: process_user_nickname вернул None"
+            )
             await loading.edit_text(
                 "Не удалось получить предсказание. Попробуйте позже.",
-                reply_markup=main_menu
+                reply_markup=main_menu,
             )
     except Exception as e:
         logger.exception(f"[process_qualities] Unhandled error: {e}")
         import traceback
+
         error_text = f"<b>❗️ Ошибка при анализе качеств в основном боте:</b>\n<pre>{traceback.format_exc()}</pre>"
-        chat_id = os.getenv('ERROR_CHAT_ID')
+        chat_id = os.getenv("ERROR_CHAT_ID")
         if chat_id:
             await message.bot.send_message(chat_id, error_text)
         else:
-            logger.error('ERROR_CHAT_ID не найден, ошибка не отправлена в чат')
+            logger.error("ERROR_CHAT_ID не найден, ошибка не отправлена в чат")
         # Fallback на GPT
         try:
             from utils.openai_gpt import ask_gpt
-            prediction_html_instruction = '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown.'
+
+            prediction_html_instruction = "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>. Не используй Markdown."
             prompt = qualities_prompt_gpt["tips"] + prediction_html_instruction
-            loop = asyncio.get_running_loop()
-            gpt_result = await loop.run_in_executor(None, ask_gpt, prompt)
-            await message.answer(gpt_result, parse_mode=ParseMode.HTML, reply_markup=main_menu)
+            gpt_result = await ask_gpt(prompt)
+            await message.answer(
+                gpt_result, parse_mode=ParseMode.HTML, reply_markup=main_menu
+            )
         except Exception as gpt_e:
             logger.error(f"Ошибка при генерации ответа через GPT: {gpt_e}")
         # raise
@@ -639,48 +750,81 @@ async def fallback(message: Message):
 async def on_error(update, exception):
     logger.error(f"[on_error] {exception}")
     import traceback
+
     # Определяем контекст для инлайн-режима
     context = ""
     details = ""
-    if hasattr(update, 'inline_query') and update.inline_query:
+    if hasattr(update, "inline_query") and update.inline_query:
         context = "Ошибка в инлайн-режиме (inline_query)"
         details = f"\n<b>Текст запроса:</b> {getattr(update.inline_query, 'query', '')}"
-    elif hasattr(update, 'callback_query') and update.callback_query:
+    elif hasattr(update, "callback_query") and update.callback_query:
         context = "Ошибка в инлайн-режиме (callback_query)"
-        data = getattr(update.callback_query, 'data', '')
-        user_id = getattr(getattr(update.callback_query, 'from_user', None), 'id', '')
+        data = getattr(update.callback_query, "data", "")
+        user_id = getattr(getattr(update.callback_query, "from_user", None), "id", "")
         details = f"\n<b>Callback data:</b> {data}\n<b>User ID:</b> {user_id}"
     else:
         context = "Ошибка вне message-хендлеров (например, polling/callback)"
     error_text = f"<b>❗️ {context}:</b>{details}\n<pre>{traceback.format_exc()}</pre>"
-    chat_id = os.getenv('ERROR_CHAT_ID')
+    chat_id = os.getenv("ERROR_CHAT_ID")
     if chat_id:
         await message.bot.send_message(chat_id, error_text)
     else:
-        logger.error('ERROR_CHAT_ID не найден, ошибка не отправлена в чат')
+        logger.error("ERROR_CHAT_ID не найден, ошибка не отправлена в чат")
     return True
 
 
+async def log_vox_stats():
+    if vox:
+        logger.info(f"[VOX STATS] {vox.stats()}")
+        logger.info(f"[VOX STAGES] {stage_seconds.as_dict()}")
+        logger.info(f"[READING CACHE] {reading_cache.stats()}")
+        logger.info(f"[VOX CONTEXT] {dict(context_calls)}")
+        logger.info(f"[PROMPT] {prompt_budget.stats()}")
+        if config.READING_DEADLINES:
+            logger.info(
+                f"[RACE] wins={dict(race_wins)} latency={race_seconds.as_dict()}"
+            )
+        if config.VOX_LEAN_RATIO:
+            logger.info(f"[VOX LEAN A/B] {reading_ab.as_dict()}")
+
+
 async def main():
     global bot, vox
     if not BOT_TOKEN:
         logger.error("BOT_TOKEN не найден")
         return
 
+    vox = AsyncVoxAPI(
+        token=VOX_TOKEN,
+        user_id_cache=UserIdCache(store=VoxCacheStore("user_id")),
+        analytics_cache=AnalyticsCache(store=VoxCacheStore("ai_analytics")),
+        identity=IdentityIndex(store=VoxCacheStore("alias")),
+        pool=PoolConfig(limit=100, limit_per_host=50),
+        router=EndpointRouter(
+            config.VOX_BASE_URLS, hedge_percentile=config.VOX_HEDGE_PERCENTILE
+        ),
+    )
+
     # Планировщик рассылки
     scheduler = AsyncIOScheduler(timezone=pytz.timezone("Europe/Moscow"))
     scheduler.add_job(
         send_weekly_predictions,
-        CronTrigger(day_of_week='mon', hour=7, minute=0),
-        name="Weekly predictions"
+        CronTrigger(day_of_week="mon", hour=7, minute=0),
+        kwargs={"vox": vox},
+        name="Weekly predictions",
     )
+    # Предсказания на день для активных пользователей - до утреннего пика
+    scheduler.add_job(
+        precompute_daily_predictions,
+        CronTrigger(hour=0, minute=10),
+        kwargs={"vox": vox},
+        name="Daily predictions precompute",
+    )
+    scheduler.add_job(log_vox_stats, "interval", minutes=15, name="VOX stats")
     scheduler.start()
 
     # Инициализируем бота с поддержкой inline режима
-    bot = Bot(
-        token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
-    vox = AsyncVoxAPI(token=VOX_TOKEN)
+    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
     # Добавляем middleware для передачи vox в inline хендлеры
     inline_router.inline_query.middleware(VoxMiddleware(vox))
@@ -692,9 +836,7 @@ async def main():
     # Запускаем бота
     logger.info(f"Бот запущен на {bot.id}")
     await dp.start_polling(
-        bot,
-        allowed_updates=dp.resolve_used_update_types(),
-        on_error=on_error
+        bot, allowed_updates=dp.resolve_used_update_types(), on_error=on_error
     )
 
 
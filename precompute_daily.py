@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytz
+from aiogram import Bot
+from loguru import logger
+
+from config import BOT_TOKEN, VOX_TOKEN
+from db.User import User
+from prompts import daily_prediction_prompt
+from utils.reading_cache import CachePolicy, reading_cache
+from vox.asyncapi import AsyncVoxAPI
+from vox.bulk import bounded_map
+from vox.exceptions import NotFoundError
+from vox.limiter import Priority, vox_priority
+from vox.metrics import Summary
+from vox_executable import process_user_nickname, without_gpt_fallback
+
+# Активный пользователь - заходил за последние ACTIVE_DAYS дней
+ACTIVE_DAYS = 7
+CONCURRENCY = 4
+
+
+async def get_active_users(days: int = ACTIVE_DAYS):
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, lambda: list(User.select().where(User.last_seen >= since))
+    )
+
+
+async def precompute_daily_predictions(
+    vox: AsyncVoxAPI | None = None,
+    active_days: int = ACTIVE_DAYS,
+    concurrency: int = CONCURRENCY,
+) -> dict:
+    """
+    Ночной предрасчёт предсказаний на день (daily_prediction_prompt) для
+    активных пользователей: результат ложится в reading_cache, и кнопка
+    "Предсказание на день" утром отвечает из кэша. Запросы идут в фоновом
+    лейне VOX с ограниченной параллельностью и без GPT-фолбэка.
+    Перед расчётом из хранилища удаляются чтения прошедших периодов.
+    Возвращает отчёт: охват, стоимость (генерации VOX) и время расчёта.
+    """
+    bot = Bot(token=BOT_TOKEN)
+    own_vox = vox is None
+    if own_vox:
+        vox = AsyncVoxAPI(token=VOX_TOKEN)
+    started = time.monotonic()
+    counts = Counter()
+    reading_seconds = Summary()
+
+    async def precompute(username: str) -> str:
+        if vox.is_degraded():
+            return "skipped_degraded"
+        try:
+            user_id = (await vox.get_user_id(username))["id"]
+        except NotFoundError:
+            return "not_in_vox"
+        if await reading_cache.get(user_id, daily_prediction_prompt, CachePolicy.DAILY):
+            return "already_cached"
+        reading_started = time.monotonic()
+        reading = await process_user_nickname(
+            vox, username, daily_prediction_prompt, cache_policy=CachePolicy.DAILY
+        )
+        if not reading:
+            return "no_vox_data"
+        reading_seconds.observe(time.monotonic() - reading_started)
+        return "generated"
+
+    try:
+        # Чтения прошедших дней и недель в хранилище больше не совпадут ни с одним ключом
+        counts["purged"] = await reading_cache.purge()
+        users = await get_active_users(active_days)
+        counts["active"] = len(users)
+        usernames = []
+        for user in users:
+            try:
+                user_info = await bot.get_chat(user.telegram_user_id)
+            except Exception as e:
+                logger.warning(
+                    f"[PRECOMPUTE] get_chat({user.telegram_user_id}) failed: {e}"
+                )
+                counts["no_username"] += 1
+                continue
+            if not user_info.username:
+                counts["no_username"] += 1
+                continue
+            usernames.append(user_info.username)
+
+        with vox_priority(Priority.BACKGROUND), without_gpt_fallback():
+            async for result in bounded_map(precompute, usernames, concurrency):
+                if result.ok:
+                    counts[result.value] += 1
+                else:
+                    counts["failed"] += 1
+                    logger.warning(f"[PRECOMPUTE] @{result.key}: {result.error}")
+    finally:
+        await bot.session.close()
+        if own_vox:
+            await vox.close()
+
+    ready = counts["generated"] + counts["already_cached"]
+    report = {
+        **counts,
+        "coverage": round(ready / counts["active"], 3) if counts["active"] else 0.0,
+        # Стоимость: каждая генерация - custom_report (LLM на стороне VOX)
+        "vox_generations": counts["generated"],
+        "gpt_calls": 0,
+        "reading_seconds": reading_seconds.as_dict(),
+        "total_seconds": round(time.monotonic() - started, 1),
+        # Свежесть: чтения действительны до конца этих московских суток
+        "finished_at": datetime.now(pytz.timezone("Europe/Moscow")).isoformat(
+            timespec="seconds"
+        ),
+    }
+    logger.info(f"[PRECOMPUTE] daily predictions: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(precompute_daily_predictions())
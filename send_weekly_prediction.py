@@ -6,55 +6,108 @@ from db.User import User
 from db import database
 from config import BOT_TOKEN, VOX_TOKEN
 from vox.asyncapi import AsyncVoxAPI
+from vox.limiter import Priority, vox_priority
+from vox.models import Subject
 from vox_executable import process_user_nickname
+from utils.reading_cache import CachePolicy
 from prompts import prediction_prompt
 import re
 import html
 from keyboards import main_menu
 
+
 def escape_markdown_v2(text: str) -> str:
-    escape_chars = r'_ * [ ] ( ) ~ ` > # + - = | { } . !'.replace(' ', '')
-    return ''.join(f'\\{c}' if c in escape_chars else c for c in text)
+    escape_chars = r"_ * [ ] ( ) ~ ` > # + - = | { } . !".replace(" ", "")
+    return "".join(f"\\{c}" if c in escape_chars else c for c in text)
+
 
 async def get_all_users():
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(None, lambda: list(User.select()))
 
-async def send_weekly_predictions():
+
+async def prefetch_vox_data(vox: AsyncVoxAPI, usernames: list[str]):
+    """Прогревает кэши VOX (id и ai_analytics) для всех получателей рассылки."""
+    user_ids = []
+    async for result in vox.get_many_user_ids(usernames):
+        if result.ok:
+            user_ids.append(result.value["id"])
+    failed = 0
+    async for result in vox.ai_analytics_many(Subject.USER, user_ids):
+        if not result.ok:
+            failed += 1
+    logger.info(
+        f"[WEEKLY] Prefetched VOX data: {len(user_ids)}/{len(usernames)} ids, "
+        f"{len(user_ids) - failed} reports"
+    )
+
+
+async def send_weekly_predictions(vox: AsyncVoxAPI | None = None):
+    """vox - общий клиент бота; если не передан, создаём свой на время рассылки."""
     bot = Bot(token=BOT_TOKEN)
-    vox = AsyncVoxAPI(token=VOX_TOKEN)
+    own_vox = vox is None
+    if own_vox:
+        vox = AsyncVoxAPI(token=VOX_TOKEN)
     try:
         users = await get_all_users()
+        recipients = []
         for user in users:
             if not user.telegram_user_id or not user.telegram_chat_id:
                 continue
             try:
                 user_info = await bot.get_chat(user.telegram_user_id)
-                username = user_info.username
-                if not username:
-                    logger.warning(f"[WEEKLY] No Telegram username for user_id {user.telegram_user_id}")
-                    continue
-                logger.info(f"[WEEKLY] Sending prediction to @{username} ({user.telegram_user_id})")
-                html_prompt = prediction_prompt + "\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>, <code>код</code>, <a href=\"https://t.me/{username}\">ссылка</a> и т.д. Не используй Markdown."
-                report = await process_user_nickname(vox, username, html_prompt)
+            except Exception as e:
+                logger.exception(
+                    f"[WEEKLY] Error for user_id {user.telegram_user_id}: {e}"
+                )
+                continue
+            if not user_info.username:
+                logger.warning(
+                    f"[WEEKLY] No Telegram username for user_id {user.telegram_user_id}"
+                )
+                continue
+            recipients.append((user, user_info.username))
+
+        if vox.user_id_cache is not None or vox.analytics_cache is not None:
+            with vox_priority(Priority.BACKGROUND):
+                await prefetch_vox_data(vox, [username for _, username in recipients])
+
+        for user, username in recipients:
+            try:
+                logger.info(
+                    f"[WEEKLY] Sending prediction to @{username} ({user.telegram_user_id})"
+                )
+                html_prompt = (
+                    prediction_prompt
+                    + '\n\nОформи ответ с помощью HTML-тегов <b>жирный</b>, <i>курсив</i>, <u>подчёркнутый</u>, <code>код</code>, <a href="https://t.me/{username}">ссылка</a> и т.д. Не используй Markdown.'
+                )
+                # Рассылка не должна отнимать у пользователей окно запросов к VOX
+                with vox_priority(Priority.BACKGROUND):
+                    report = await process_user_nickname(
+                        vox, username, html_prompt, cache_policy=CachePolicy.WEEKLY
+                    )
                 if report:
                     safe_report = report
                     safe_username = html.escape(username)
-                    safe_header = html.escape('🔮 Ваше предсказание на неделю для')
+                    safe_header = html.escape("🔮 Ваше предсказание на неделю для")
                     await bot.send_message(
                         user.telegram_chat_id,
                         f"{safe_header} @{safe_username}!\n\n{safe_report}",
                         parse_mode=ParseMode.HTML,
-                        reply_markup=main_menu
+                        reply_markup=main_menu,
                     )
                 else:
                     logger.warning(f"[WEEKLY] No prediction for @{username}")
             except Exception as e:
-                logger.exception(f"[WEEKLY] Error for user_id {user.telegram_user_id}: {e}")
+                logger.exception(
+                    f"[WEEKLY] Error for user_id {user.telegram_user_id}: {e}"
+                )
             await asyncio.sleep(10)
     finally:
         await bot.session.close()
-        await vox.session.close()
+        if own_vox:
+            await vox.close()
+
 
 if __name__ == "__main__":
-    asyncio.run(send_weekly_predictions()) 
\ No newline at end of file
+    asyncio.run(send_weekly_predictions())
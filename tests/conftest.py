@@ -0,0 +1,39 @@
+import os
+import time
+
+# config.py читает обязательные переменные окружения при импорте
+for name in ("PGPASSWORD", "PGUSER", "PGDATABASE", "PGHOST", "VOX_TOKEN", "BOT_TOKEN"):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("ERROR_CHAT_ID", "0")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+class Clock:
+    """Ручные часы для TTL, breaker'а и лимитера: now двигает тест."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MemoryStore:
+    """Хранилище второго уровня в памяти (интерфейс db.VoxCache.VoxCacheStore)."""
+
+    def __init__(self, fail: bool = False):
+        self.data = {}
+        self.fail = fail
+
+    async def get(self, key):
+        if self.fail:
+            raise RuntimeError("store is down")
+        return self.data.get(key)
+
+    async def set(self, key, value):
+        if self.fail:
+            raise RuntimeError("store is down")
+        self.data[key] = (value, time.time())
+
+    async def delete(self, key):
+        self.data.pop(key, None)
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+import pytest
+
+from conftest import Clock, MemoryStore
+from vox.asyncapi import AsyncVoxAPI
+from vox.cache import NOT_FOUND, AnalyticsCache, TTLCache, UserIdCache
+from vox.exceptions import CircuitOpenError, NotFoundError
+from vox.fake_server import FakeConfig, start_fake_server
+from vox.identity import IdentityIndex
+from vox.limiter import Priority, current_priority
+from vox.models import Subject
+
+
+def test_ttl_cache_expires_entries():
+    clock = Clock()
+    cache = TTLCache(ttl=10, negative_ttl=2, clock=clock)
+    cache.set("id", 42)
+    cache.set_not_found("gone")
+    clock.now = 5
+    assert cache.get("id") == 42
+    assert cache.get("gone") is None
+    clock.now = 11
+    assert cache.get("id") is None
+    assert cache.stats.expirations == 2
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats.evictions == 1
+
+
+def test_user_id_cache_normalizes_aliases():
+    async def run():
+        cache = UserIdCache()
+        await cache.set("@Foo_Bar ", 7)
+        assert await cache.get("foo_bar") == 7
+
+    asyncio.run(run())
+
+
+def test_user_id_cache_reads_store_including_negative_entries():
+    async def run():
+        store = MemoryStore()
+        await UserIdCache(store=store).set("alice", 1)
+        await UserIdCache(store=store).set_not_found("ghost")
+        cache = UserIdCache(store=store)
+        assert await cache.get("alice") == 1
+        assert await cache.get("ghost") is NOT_FOUND
+        assert cache.store_hits == 2
+
+    asyncio.run(run())
+
+
+def test_user_id_cache_ignores_expired_store_entries():
+    async def run():
+        store = MemoryStore()
+        store.data["ghost"] = (None, time.time() - 3600)
+        assert await UserIdCache(store=store, negative_ttl=600).get("ghost") is None
+
+    asyncio.run(run())
+
+
+def test_user_id_cache_survives_store_errors():
+    async def run():
+        cache = UserIdCache(store=MemoryStore(fail=True))
+        await cache.set("alice", 1)
+        assert await cache.get("alice") == 1
+        assert await cache.get("bob") is None
+        assert cache.store_errors == 2
+
+    asyncio.run(run())
+
+
+async def _server_stats(base_url: str) -> dict:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}/__stats") as resp:
+            return await resp.json()
+
+
+def test_get_user_id_caches_hits_and_misses():
+    async def run():
+        runner, base_url = await start_fake_server(FakeConfig(seed=1))
+        vox = AsyncVoxAPI(token="test", base_url=base_url, user_id_cache=UserIdCache())
+        try:
+            first = await vox.get_user_id("alice")
+            assert await vox.get_user_id("@Alice") == first
+        finally:
+            await vox.close()
+            stats = await _server_stats(base_url)
+            await runner.cleanup()
+        assert stats["requests"] == {"/users/username/{username}": 1}
+
+    asyncio.run(run())
+
+
+def test_get_user_id_negative_cache():
+    async def run():
+        runner, base_url = await start_fake_server(FakeConfig(error_rates={404: 1.0}))
+        vox = AsyncVoxAPI(token="test", base_url=base_url, user_id_cache=UserIdCache())
+        try:
+            for _ in range(3):
+                with pytest.raises(NotFoundError):
+                    await vox.get_user_id("ghost")
+        finally:
+            await vox.close()
+            stats = await _server_stats(base_url)
+            await runner.cleanup()
+        assert stats["responses"] == {"404": 1}
+
+    asyncio.run(run())
+
+
+class ScriptedVox(AsyncVoxAPI):
+    """AsyncVoxAPI без сети: _request отвечает по заранее заданному словарю путей."""
+
+    def __init__(self, responses: dict, **kwargs):
+        super().__init__(token="test", **kwargs)
+        self.responses = responses
+        self.calls = []
+
+    async def _request(self, method, path, **kwargs):
+        self.calls.append(path)
+        response = self.responses[path]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_cached_not_found_beats_identity_index():
+    async def run():
+        identity = IdentityIndex()
+        await identity.remember(5, ["ghost"])
+        vox = ScriptedVox({}, user_id_cache=UserIdCache(), identity=identity)
+        await vox.user_id_cache.set_not_found("ghost")
+        try:
+            with pytest.raises(NotFoundError):
+                await vox.get_user_id("ghost")
+        finally:
+            await vox.close()
+        assert vox.calls == []
+
+    asyncio.run(run())
+
+
+def test_vox_answer_beats_reassigned_alias():
+    async def run():
+        identity = IdentityIndex()
+        # old_name когда-то был у пользователя 5, теперь ник у пользователя 9
+        await identity.remember(5, ["old_name"])
+        vox = ScriptedVox(
+            {"/users/username/old_name": {"id": 9}},
+            user_id_cache=UserIdCache(),
+            identity=identity,
+        )
+        try:
+            assert (await vox.get_user_id("old_name"))["id"] == 9
+        finally:
+            await vox.close()
+        assert await identity.lookup("old_name") == 9
+
+    asyncio.run(run())
+
+
+def test_identity_hint_only_when_vox_is_unreachable():
+    async def run():
+        identity = IdentityIndex()
+        await identity.remember(5, ["old_name"])
+        vox = ScriptedVox(
+            {
+                "/users/username/old_name": CircuitOpenError("open"),
+                "/users/username/stranger": CircuitOpenError("open"),
+            },
+            user_id_cache=UserIdCache(),
+            identity=identity,
+        )
+        try:
+            assert (await vox.get_user_id("old_name"))["id"] == 5
+            with pytest.raises(CircuitOpenError):
+                await vox.get_user_id("stranger")
+        finally:
+            await vox.close()
+        # Подсказка индекса - не ответ VOX, в user_id_cache её нет
+        assert await vox.user_id_cache.get("old_name") is None
+
+    asyncio.run(run())
+
+
+def test_identity_forget_drops_alias_everywhere():
+    async def run():
+        store = MemoryStore()
+        identity = IdentityIndex(store=store)
+        await identity.remember(5, ["@Freed"])
+        await identity.forget("freed")
+        assert await identity.lookup("freed") is None
+        assert "freed" not in store.data
+
+    asyncio.run(run())
+
+
+def test_not_found_is_cached_and_not_learned():
+    async def run():
+        identity = IdentityIndex()
+        path = "/users/username/ghost"
+        vox = ScriptedVox(
+            {path: NotFoundError("404")}, user_id_cache=UserIdCache(), identity=identity
+        )
+        try:
+            for _ in range(2):
+                with pytest.raises(NotFoundError):
+                    await vox.get_user_id("ghost")
+        finally:
+            await vox.close()
+        assert vox.calls == [path]
+        assert await identity.lookup("ghost") is None
+
+    asyncio.run(run())
+
+
+class JsonStore(MemoryStore):
+    """Как db.VoxCache: значение хранится JSON-строкой."""
+
+    async def get(self, key):
+        stored = await super().get(key)
+        return None if stored is None else (json.loads(stored[0]), stored[1])
+
+    async def set(self, key, value):
+        await super().set(key, json.dumps(value))
+
+
+def test_analytics_embedding_survives_store():
+    async def run():
+        store = JsonStore()
+        report = {"date": "2026-10-01", "text": "отчёт", "embedding": [0.5, -1.25, 3.0]}
+
+        async def fetch():
+            return report
+
+        key = ("analytics", 1, True)
+        await AnalyticsCache(store=store).get_or_fetch(key, fetch)
+        cache = AnalyticsCache(store=store)
+
+        async def unreachable():
+            raise AssertionError("VOX не должен вызываться")
+
+        value = await cache.get_or_fetch(key, unreachable)
+        assert [float(x) for x in value["embedding"]] == report["embedding"]
+        assert value["text"] == "отчёт"
+        assert cache.store_hits == 1
+
+    asyncio.run(run())
+
+
+def test_analytics_cache_serves_stale_and_refreshes():
+    async def run():
+        clock = Clock()
+        cache = AnalyticsCache(fresh_ttl=10, max_stale=100, clock=clock)
+        versions = iter([{"date": "2026-10-01"}, {"date": "2026-10-02"}])
+
+        async def fetch():
+            return next(versions)
+
+        key = ("analytics", 1, False)
+        await cache.get_or_fetch(key, fetch)
+        clock.now = 50
+        assert (await cache.get_or_fetch(key, fetch))["date"] == "2026-10-01"
+        await asyncio.gather(*cache._refreshing.values())
+        assert (await cache.get_or_fetch(key, fetch))["date"] == "2026-10-02"
+        assert cache.stale_hits == 1
+
+    asyncio.run(run())
+
+
+def test_missing_embedding_is_cached():
+    async def run():
+        store = JsonStore()
+        vox = ScriptedVox(
+            {"/ai_analytics/USER/1": {"report": "отчёт", "embedding": None}},
+            analytics_cache=AnalyticsCache(store=store),
+        )
+        try:
+            for _ in range(2):
+                result = await vox.ai_analytics(Subject.USER, 1, embedding=True)
+                assert result["embedding"] is None
+        finally:
+            await vox.close()
+        assert vox.calls == ["/ai_analytics/USER/1"]
+        # И после перезапуска: "нет эмбеддинга" лежит в хранилище
+        entry = await AnalyticsCache(store=store)._lookup(("USER", 1, ""))
+        assert entry.value == {"report": "отчёт", "embedding": None}
+
+    asyncio.run(run())
+
+
+def test_analytics_refresh_runs_in_background_lane():
+    async def run():
+        clock = Clock()
+        cache = AnalyticsCache(fresh_ttl=10, max_stale=100, clock=clock)
+        lanes = []
+
+        async def fetch():
+            lanes.append(current_priority())
+            return {"date": "2026-10-01"}
+
+        key = ("USER", 1, "")
+        await cache.get_or_fetch(key, fetch)
+        clock.now = 50
+        await cache.get_or_fetch(key, fetch)
+        await asyncio.gather(*cache._refreshing.values())
+        assert lanes == [Priority.INTERACTIVE, Priority.BACKGROUND]
+
+    asyncio.run(run())
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from vox.asyncapi import AsyncVoxAPI
+from vox.exceptions import ServerError
+
+
+class GatedVox(AsyncVoxAPI):
+    """_call ждёт, пока тест не откроет gate, и отдаёт result (или исключение)."""
+
+    def __init__(self, result):
+        super().__init__(token="test")
+        self.result = result
+        self.gate = asyncio.Event()
+        self.calls = 0
+        self.cancelled = 0
+
+    async def _call(self, method, path, **kwargs):
+        self.calls += 1
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _run(test):
+    async def run():
+        vox = GatedVox(None)
+        try:
+            await test(vox)
+        finally:
+            await vox.close()
+
+    asyncio.run(run())
+
+
+def test_concurrent_gets_share_one_call():
+    async def test(vox):
+        vox.result = {"id": 1}
+        waiters = [
+            asyncio.ensure_future(vox._request("GET", "/ping")) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        vox.gate.set()
+        assert await asyncio.gather(*waiters) == [{"id": 1}] * 3
+        assert vox.calls == 1
+        assert vox.coalesced_requests == 2
+        assert vox._inflight == {}
+
+    _run(test)
+
+
+def test_error_reaches_every_waiter():
+    async def test(vox):
+        vox.result = ServerError("502")
+        waiters = [
+            asyncio.ensure_future(vox._request("GET", "/ping")) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        vox.gate.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(r, ServerError) for r in results)
+        assert vox.calls == 1
+
+    _run(test)
+
+
+def test_different_params_are_not_coalesced():
+    async def test(vox):
+        vox.result = []
+        vox.gate.set()
+        await asyncio.gather(
+            vox._request("GET", "/users", params={"limit": 1}),
+            vox._request("GET", "/users", params={"limit": 2}),
+        )
+        assert vox.calls == 2
+        assert vox.coalesced_requests == 0
+
+    _run(test)
+
+
+def test_one_cancelled_waiter_does_not_cancel_the_others():
+    async def test(vox):
+        vox.result = {"id": 1}
+        first = asyncio.ensure_future(vox._request("GET", "/ping"))
+        second = asyncio.ensure_future(vox._request("GET", "/ping"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        vox.gate.set()
+        assert await second == {"id": 1}
+        assert first.cancelled()
+        assert vox.cancelled == 0
+
+    _run(test)
+
+
+def test_last_cancelled_waiter_cancels_the_call():
+    async def test(vox):
+        waiters = [
+            asyncio.ensure_future(vox._request("GET", "/ping")) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.gather(*waiters)
+        await asyncio.sleep(0)
+        assert vox.cancelled == 1
+        assert vox._inflight == {}
+        # Следующий запрос идёт в VOX заново, а не ждёт отменённый
+        vox.result = {"id": 2}
+        vox.gate.set()
+        assert await vox._request("GET", "/ping") == {"id": 2}
+        assert vox.calls == 2
+
+    _run(test)
+
+
+def test_non_get_requests_are_not_coalesced():
+    async def test(vox):
+        vox.result = {}
+        vox.gate.set()
+        await asyncio.gather(vox._request("POST", "/x"), vox._request("POST", "/x"))
+        assert vox.calls == 2
+
+    _run(test)
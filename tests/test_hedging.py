@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+from conftest import Clock
+from vox.asyncapi import AsyncVoxAPI
+from vox.exceptions import NotFoundError
+from vox.fake_server import FakeConfig, start_fake_server
+from vox.limiter import AdaptiveLimiter
+from vox.routing import EndpointRouter
+
+TEMPLATE = "/users/username/{username}"
+SLOW = 0.5
+
+
+def _hedging(fast_config: FakeConfig, limiter=None):
+    """Медленный основной адрес и быстрый запасной; hedge после 50 мс."""
+
+    async def run():
+        slow_runner, slow_url = await start_fake_server(
+            FakeConfig(seed=1, latency=f"const:{SLOW}")
+        )
+        fast_runner, fast_url = await start_fake_server(fast_config)
+        router = EndpointRouter(
+            [slow_url, fast_url],
+            hedge_percentile=50,
+            hedge_min_samples=1,
+            clock=Clock(),
+        )
+        # Часы стоят, оба адреса "только что" использованы: без проб и без
+        # замеров основным выбирается первый (медленный) адрес
+        for endpoint in router.endpoints:
+            endpoint.last_used = 0.0
+        router.latency.observe(TEMPLATE, 0.05)
+        vox = AsyncVoxAPI(
+            token="test", router=router, limiter=limiter or AdaptiveLimiter()
+        )
+        started = time.monotonic()
+        try:
+            result = await vox.get_user_id("alice")
+        except Exception as e:
+            result = e
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(0)
+        try:
+            return result, elapsed, vox, router
+        finally:
+            await vox.close()
+            await slow_runner.cleanup()
+            await fast_runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_hedge_wins_on_fast_backup_and_cancels_primary():
+    result, elapsed, vox, router = _hedging(FakeConfig(seed=1))
+    assert "id" in result
+    assert elapsed < SLOW
+    assert (router.hedges, router.hedge_wins) == (1, 1)
+    # Проигравший запрос отменён, а слот дубля вернулся лимитеру
+    assert [e.inflight for e in router.endpoints] == [0, 0]
+    assert vox.limiter.inflight == 0
+
+
+def test_client_error_from_backup_is_final():
+    result, elapsed, _, router = _hedging(FakeConfig(seed=1, error_rates={404: 1.0}))
+    assert isinstance(result, NotFoundError)
+    assert elapsed < SLOW
+    assert router.hedges == 1
+
+
+def test_no_hedge_without_free_limiter_slot():
+    result, elapsed, vox, router = _hedging(
+        FakeConfig(seed=1), limiter=AdaptiveLimiter(initial_limit=1)
+    )
+    assert "id" in result
+    assert elapsed >= SLOW
+    assert router.hedges == 0
+    assert router.hedges_skipped == 1
+    assert vox.limiter.inflight == 0
+
+
+def test_hedge_delay_needs_samples():
+    router = EndpointRouter(["http://a", "http://b"], hedge_percentile=95)
+    assert router.hedge_delay(TEMPLATE) is None
+    for latency in (0.1, 0.2, 0.3) * 10:
+        router.latency.observe(TEMPLATE, latency)
+    assert router.hedge_delay(TEMPLATE) == pytest.approx(0.3)
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from conftest import Clock
+from vox.limiter import AdaptiveLimiter, Priority
+
+INTERACTIVE, BACKGROUND = Priority.INTERACTIVE, Priority.BACKGROUND
+
+
+def test_window_grows_additively_on_fast_responses():
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=5)
+    limiter._inflight[INTERACTIVE] = 1
+    limiter.release(INTERACTIVE, latency=0.1)
+    assert limiter.limit == pytest.approx(4.25)
+    for _ in range(20):
+        limiter._inflight[INTERACTIVE] = 1
+        limiter.release(INTERACTIVE, latency=0.1)
+    assert limiter.limit == 5
+
+
+def test_window_shrinks_multiplicatively_with_cooldown():
+    clock = Clock()
+    limiter = AdaptiveLimiter(initial_limit=10, backoff=0.5, cooldown=1.0, clock=clock)
+    for _ in range(3):
+        limiter._inflight[INTERACTIVE] = 1
+        limiter.release(INTERACTIVE, latency=0.1, overloaded=True)
+    # Несколько отказов подряд - одно уменьшение за cooldown
+    assert limiter.limit == 5
+    clock.now = 1.0
+    limiter._inflight[INTERACTIVE] = 1
+    limiter.release(INTERACTIVE, latency=limiter.latency_target + 1)
+    assert limiter.limit == 2.5
+
+
+def test_window_respects_min_limit_and_unsampled_release():
+    limiter = AdaptiveLimiter(initial_limit=3, min_limit=2, backoff=0.1)
+    limiter._inflight[INTERACTIVE] = 2
+    limiter.release(INTERACTIVE, latency=None, overloaded=True)
+    assert limiter.limit == 2
+    limiter.release(INTERACTIVE, latency=0.1, sample=False)
+    assert limiter.limit == 2 and limiter.inflight == 0
+
+
+def test_interactive_waiters_go_before_background():
+    async def run():
+        limiter = AdaptiveLimiter(initial_limit=1, background_share=1.0)
+        await limiter.acquire(INTERACTIVE)
+        order = []
+
+        async def worker(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+            limiter.release(priority, latency=None, sample=False)
+
+        tasks = [
+            asyncio.ensure_future(worker("bg", BACKGROUND)),
+            asyncio.ensure_future(worker("user", INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        limiter.release(INTERACTIVE, latency=None, sample=False)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["user", "bg"]
+
+
+def test_background_share_caps_background_lane():
+    limiter = AdaptiveLimiter(initial_limit=4, background_share=0.5)
+    assert limiter.try_acquire(BACKGROUND)
+    assert limiter.try_acquire(BACKGROUND)
+    assert not limiter.try_acquire(BACKGROUND)
+    # Интерактивным остаётся место
+    assert limiter.try_acquire(INTERACTIVE)
+    assert limiter.try_acquire(INTERACTIVE)
+    assert not limiter.try_acquire(INTERACTIVE)
+
+
+def test_slot_granted_to_cancelled_waiter_is_returned():
+    async def run():
+        limiter = AdaptiveLimiter(initial_limit=1)
+        await limiter.acquire(INTERACTIVE)
+        cancelled = asyncio.ensure_future(limiter.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        # Слот выдаётся ожидающему, но тот отменяется раньше, чем проснулся
+        limiter.release(INTERACTIVE, latency=None, sample=False)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert limiter.inflight == 0
+        await asyncio.wait_for(limiter.acquire(INTERACTIVE), 1)
+        assert limiter.inflight == 1
+
+    asyncio.run(run())
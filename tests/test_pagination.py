@@ -0,0 +1,87 @@
+import asyncio
+
+from vox.asyncapi import AsyncVoxAPI
+from vox.pagination import paginate
+
+
+class Pages:
+    """Постраничный эндпоинт из total элементов; ignore_limit - отдаёт по 10."""
+
+    def __init__(self, total: int, ignore_limit: bool = False, delay: float = 0):
+        self.total = total
+        self.ignore_limit = ignore_limit
+        self.delay = delay
+        self.calls = []
+        self.cancelled = 0
+
+    async def __call__(self, offset: int, limit: int):
+        self.calls.append((offset, limit))
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        size = 10 if self.ignore_limit else limit
+        return list(range(offset, min(offset + size, self.total)))
+
+
+async def _collect(iterator, stop_after=None):
+    items = []
+    async for item in iterator:
+        items.append(item)
+        # Потребитель занят элементом - предзагрузка следующей страницы идёт
+        await asyncio.sleep(0)
+        if stop_after is not None and len(items) >= stop_after:
+            break
+    return items
+
+
+def test_paginate_reads_all_pages():
+    pages = Pages(25)
+    assert asyncio.run(_collect(paginate(pages, 10))) == list(range(25))
+    # Третья страница неполная - четвёртую не запрашиваем
+    assert pages.calls == [(0, 10), (10, 10), (20, 10)]
+
+
+def test_paginate_caps_items_even_if_server_ignores_limit():
+    pages = Pages(100, ignore_limit=True)
+    assert asyncio.run(_collect(paginate(pages, 7, 30))) == list(range(30))
+    assert pages.calls[-1] == (28, 2)
+
+
+def test_paginate_stops_on_short_page():
+    pages = Pages(5)
+    assert asyncio.run(_collect(paginate(pages, 10, 100))) == list(range(5))
+    assert pages.calls == [(0, 10)]
+
+
+def test_paginate_cancels_prefetch_on_early_exit():
+    pages = Pages(100, delay=0.01)
+
+    async def run():
+        iterator = paginate(pages, 10)
+        items = await _collect(iterator, stop_after=3)
+        await iterator.aclose()
+        await asyncio.sleep(0)
+        return items
+
+    assert asyncio.run(run()) == [0, 1, 2]
+    assert pages.calls == [(0, 10), (10, 10)]
+    assert pages.cancelled == 1
+
+
+def test_iter_search_users_by_activity_caps_items():
+    class SearchVox(AsyncVoxAPI):
+        async def search_users_by_activity(self, *args, limit=None):
+            return [{"id": i} for i in range(50)]
+
+    async def run():
+        vox = SearchVox(token="test")
+        try:
+            return await _collect(
+                vox.iter_search_users_by_activity("q", "2026-01-01", "2026-02-01", 5)
+            )
+        finally:
+            await vox.close()
+
+    assert asyncio.run(run()) == [{"id": i} for i in range(5)]
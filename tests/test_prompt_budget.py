@@ -0,0 +1,65 @@
+from utils.prompt_budget import ELLIPSIS, PromptBudget, _cut, condense, size
+
+REPORT = (
+    "Вы склонны к анализу. Вы любите порядок. Иногда вы сомневаетесь.\n\n"
+    "Ваш девиз - «всё будет хорошо.» Вы цените друзей (и семью.) Вы открыты новому.\n"
+    "Финансы стабильны! Риск невелик? Всё в ваших руках…"
+)
+
+
+def test_size_counts_url_encoded_bytes():
+    assert size("abc") == 3
+    assert size("а") == 6
+    assert size(" ") == 3
+
+
+def test_condense_keeps_short_text():
+    assert condense("  Коротко.  \n\n\n Ясно.", 1000) == "Коротко.\n\nЯсно."
+
+
+def test_condense_fits_limit_and_is_deterministic():
+    for limit in (60, 200, 400, 700):
+        result = condense(REPORT, limit)
+        assert size(result) <= limit
+        assert result == condense(REPORT, limit)
+
+
+def test_condense_prefers_first_sentences_of_paragraphs():
+    result = condense(REPORT, 700)
+    assert "Вы склонны к анализу." in result
+    assert "Финансы стабильны!" in result
+    assert "Иногда вы сомневаетесь." not in result
+
+
+def test_condense_keeps_closing_quotes_and_brackets():
+    result = condense(REPORT, size(REPORT) - 1)
+    assert "«всё будет хорошо.»" in result
+    assert "(и семью.)" in result
+
+
+def test_cut_fits_limit_on_word_boundary():
+    text = "слово " * 50
+    result = _cut(text, 100)
+    assert size(result) <= 100
+    assert result.endswith(ELLIPSIS)
+    assert result[:-1].split(" ")[-1] == "слово"
+
+
+def test_assemble_stays_within_budget():
+    budget = PromptBudget({"daily": 1500}, default=5000)
+    prompt = "Сделай прогноз на день."
+    result = budget.assemble(
+        "daily", [("Пользователь:", REPORT * 5), ("Партнёр:", REPORT * 5)], prompt
+    )
+    assert size(result) <= 1500
+    assert result.startswith("Пользователь:\n")
+    assert "\n\nПартнёр:\n" in result
+    assert result.endswith("\n\n" + prompt)
+    assert budget.trimmed["daily"] == 1
+
+
+def test_assemble_does_not_touch_reports_within_budget():
+    budget = PromptBudget({}, default=100_000)
+    result = budget.assemble(None, [(None, "Отчёт.")], "Вопрос?")
+    assert result == "Отчёт.\n\nВопрос?"
+    assert not budget.trimmed
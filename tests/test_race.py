@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+import vox_executable
+from vox.exceptions import NotFoundError, ServerError
+from vox_executable import race_reading, without_gpt_fallback
+
+
+@pytest.fixture
+def gpt(monkeypatch):
+    """ask_gpt без сети: отвечает через delay секунд (или падает с error)."""
+
+    class FakeGpt:
+        def __init__(self):
+            self.delay = 0.0
+            self.error = None
+            self.calls = []
+
+        async def __call__(self, prompt):
+            self.calls.append((prompt, asyncio.get_running_loop().time()))
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return "gpt"
+
+    fake = FakeGpt()
+    monkeypatch.setattr(vox_executable, "ask_gpt", fake)
+    return fake
+
+
+async def _vox(result, delay=0.0):
+    await asyncio.sleep(delay)
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def _race(vox_reading, deadline=0.05):
+    async def run():
+        started = asyncio.get_running_loop().time()
+        try:
+            return (
+                await race_reading("test", vox_reading, "fallback", deadline),
+                started,
+            )
+        except Exception as e:
+            return e, started
+
+    return asyncio.run(run())
+
+
+def test_vox_wins_before_deadline(gpt):
+    result, _ = _race(_vox("vox", delay=0.01))
+    assert result == "vox"
+    assert gpt.calls == []
+
+
+def test_gpt_wins_after_deadline(gpt):
+    result, _ = _race(_vox("vox", delay=1.0))
+    assert result == "gpt"
+    assert [prompt for prompt, _ in gpt.calls] == ["fallback"]
+
+
+def test_slow_vox_still_wins_if_gpt_is_slower(gpt):
+    gpt.delay = 1.0
+    result, _ = _race(_vox("vox", delay=0.1))
+    assert result == "vox"
+    assert len(gpt.calls) == 1
+
+
+def test_gpt_starts_right_away_when_vox_fails(gpt):
+    result, started = _race(_vox(ServerError("502")), deadline=10.0)
+    assert result == "gpt"
+    assert gpt.calls[0][1] - started < 1.0
+
+
+def test_vox_not_found_is_answered_by_gpt(gpt):
+    # Ник не найден в VOX - в гонке это тоже ответ GPT, а не ошибка обработчику
+    result, _ = _race(_vox(NotFoundError("404")))
+    assert result == "gpt"
+
+
+def test_both_failing_reraises_vox_error(gpt):
+    gpt.error = RuntimeError("openai is down")
+    error = ServerError("502")
+    result, _ = _race(_vox(error))
+    assert result is error
+
+
+def test_vox_reading_has_gpt_fallback_disabled(gpt):
+    async def reading():
+        return await vox_executable._gpt("inner")
+
+    result, _ = _race(reading())
+    # Внутренний фолбэк вернул None - ответил GPT самой гонки
+    assert result == "gpt"
+    assert [prompt for prompt, _ in gpt.calls] == ["fallback"]
+
+
+def test_no_race_without_gpt_fallback(gpt):
+    async def run():
+        with without_gpt_fallback():
+            return await race_reading("test", _vox(None), "fallback", 0.01)
+
+    assert asyncio.run(run()) is None
+    assert gpt.calls == []
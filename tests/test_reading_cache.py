@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime
+
+import pytz
+
+from conftest import MemoryStore
+from utils.reading_cache import CachePolicy, ReadingCache, _bounds
+
+MOSCOW = pytz.timezone("Europe/Moscow")
+# Среда, 21 октября 2026, 15:00 по Москве
+NOW = MOSCOW.localize(datetime(2026, 10, 21, 15, 0))
+
+
+class PurgeStore(MemoryStore):
+    """MemoryStore с purge как у db.VoxCache.VoxCacheStore."""
+
+    async def purge(self, older_than, key_like="%"):
+        suffix = key_like.lstrip("%")
+        stale = [
+            key
+            for key, (_, updated_at) in self.data.items()
+            if updated_at < older_than
+            and len(key) >= len(suffix)
+            and all(p in ("_", c) for p, c in zip(suffix, key[-len(suffix) :]))
+        ]
+        for key in stale:
+            del self.data[key]
+        return len(stale)
+
+
+def test_period_bounds_follow_moscow_calendar():
+    label, start, end = _bounds(CachePolicy.DAILY, NOW)
+    assert label == "2026-10-21"
+    assert (start.day, start.hour, end.day, end.hour) == (21, 0, 22, 0)
+    label, start, end = _bounds(CachePolicy.WEEKLY, NOW)
+    assert label == "2026-W43"
+    assert (start.day, end.day) == (19, 26)
+
+
+def test_reading_cache_reads_store_until_period_ends():
+    async def run():
+        store = PurgeStore()
+        await ReadingCache(store=store).set(1, "prompt", CachePolicy.DAILY, "text", NOW)
+        cache = ReadingCache(store=store)
+        assert await cache.get(1, "prompt", CachePolicy.DAILY, NOW) == "text"
+        assert await cache.get(1, "other", CachePolicy.DAILY, NOW) is None
+        tomorrow = MOSCOW.localize(datetime(2026, 10, 22, 9, 0))
+        assert await cache.get(1, "prompt", CachePolicy.DAILY, tomorrow) is None
+        assert cache.store_hits == 1
+
+    asyncio.run(run())
+
+
+def test_purge_drops_only_past_periods():
+    async def run():
+        store = PurgeStore()
+        cache = ReadingCache(store=store)
+        last_week = NOW.timestamp() - 7 * 24 * 3600
+        store.data["1:fp:2026-10-14"] = ("old day", last_week)
+        store.data["1:fp:2026-W42"] = ("old week", last_week)
+        # Записано в понедельник этой недели - неделя ещё идёт
+        store.data["1:fp:2026-W43"] = ("this week", NOW.timestamp() - 2 * 24 * 3600)
+        store.data["1:fp:2026-10-21"] = ("today", NOW.timestamp() - 3600)
+        assert await cache.purge(NOW) == 2
+        assert sorted(store.data) == ["1:fp:2026-10-21", "1:fp:2026-W43"]
+
+    asyncio.run(run())
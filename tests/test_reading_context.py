@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from vox.exceptions import NotFoundError, ServerError
+from vox.models import Subject
+from vox_executable import ReadingContext
+
+
+class CountingVox:
+    """get_user_id/ai_analytics по очереди отдают заданные исходы."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self.gate = None
+
+    async def _next(self, call):
+        self.calls.append(call)
+        if self.gate is not None:
+            await self.gate.wait()
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def get_user_id(self, username):
+        return await self._next(("user_id", username))
+
+    async def ai_analytics(self, subject, subject_id, embedding=False):
+        return await self._next(("ai_analytics", subject_id, embedding))
+
+    def is_degraded(self):
+        return False
+
+
+def test_repeated_calls_are_avoided():
+    async def run():
+        vox = CountingVox({"id": 1}, {"report": "r"})
+        context = ReadingContext(vox)
+        assert await context.get_user_id("@Alice") == {"id": 1}
+        assert await context.get_user_id("alice") == {"id": 1}
+        await context.ai_analytics(Subject.USER, 1, embedding=False)
+        await context.ai_analytics(Subject.USER, 1)
+        # Прочие методы - напрямую в vox
+        assert context.is_degraded() is False
+        return vox, context
+
+    vox, context = asyncio.run(run())
+    assert vox.calls == [("user_id", "@Alice"), ("ai_analytics", 1, True)]
+    assert context.stats() == {"calls": 2, "avoided": 2}
+
+
+def test_concurrent_callers_share_one_request():
+    async def run():
+        vox = CountingVox({"id": 1})
+        vox.gate = asyncio.Event()
+        context = ReadingContext(vox)
+        callers = [asyncio.ensure_future(context.get_user_id("a")) for _ in range(3)]
+        await asyncio.sleep(0)
+        # Отмена одного ожидающего не отменяет общий запрос
+        callers[0].cancel()
+        vox.gate.set()
+        return await asyncio.gather(*callers[1:]), vox
+
+    results, vox = asyncio.run(run())
+    assert results == [{"id": 1}] * 2
+    assert len(vox.calls) == 1
+
+
+def test_not_found_is_memoized():
+    async def run():
+        vox = CountingVox(NotFoundError("404"))
+        context = ReadingContext(vox)
+        for _ in range(2):
+            with pytest.raises(NotFoundError):
+                await context.get_user_id("ghost")
+        return vox
+
+    assert len(asyncio.run(run()).calls) == 1
+
+
+def test_transient_errors_are_not_memoized():
+    async def run():
+        vox = CountingVox(ServerError("502"), {"id": 1})
+        context = ReadingContext(vox)
+        with pytest.raises(ServerError):
+            await context.get_user_id("alice")
+        assert await context.get_user_id("alice") == {"id": 1}
+        return vox
+
+    assert len(asyncio.run(run()).calls) == 2
+
+
+def test_cancelled_request_is_not_memoized():
+    async def run():
+        vox = CountingVox({"id": 1}, {"id": 2})
+        vox.gate = asyncio.Event()
+        context = ReadingContext(vox)
+        caller = asyncio.ensure_future(context.get_user_id("alice"))
+        while not vox.calls:
+            await asyncio.sleep(0)
+        next(iter(context._memo.values())).cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        vox.gate.set()
+        return await context.get_user_id("alice"), vox
+
+    result, vox = asyncio.run(run())
+    assert result == {"id": 1}
+    assert len(vox.calls) == 2
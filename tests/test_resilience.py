@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from conftest import Clock
+from vox.asyncapi import AsyncVoxAPI
+from vox.exceptions import CircuitOpenError, NotFoundError, ServerError
+from vox.pool import PoolConfig
+from vox.resilience import BreakerState, CircuitBreaker, CircuitBreakers, RetryPolicy
+
+
+class FlakyVox(AsyncVoxAPI):
+    """AsyncVoxAPI без сети: _send_limited по очереди отдаёт заданные исходы."""
+
+    def __init__(self, outcomes: list, **kwargs):
+        super().__init__(token="test", **kwargs)
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+
+    async def _send_limited(self, method, path, **kwargs):
+        self.timeouts.append(kwargs.get("timeout"))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _call(outcomes: list, **kwargs):
+    async def run():
+        vox = FlakyVox(outcomes, **kwargs)
+        try:
+            return await vox._call("GET", "/users/username/alice"), vox
+        finally:
+            await vox.close()
+
+    return asyncio.run(run())
+
+
+def test_breaker_opens_and_recovers_through_half_open():
+    clock = Clock()
+    breaker = CircuitBreaker(
+        "users", failure_threshold=2, recovery_timeout=10, clock=clock
+    )
+    breaker.record_failure()
+    assert breaker.state == BreakerState.CLOSED
+    breaker.record_failure()
+    assert breaker.is_open() and not breaker.allow()
+    clock.now = 10
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert breaker.allow()
+    # Пока проба в полёте, второй запрос не пропускается
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_breaker_failed_probe_reopens():
+    clock = Clock()
+    breaker = CircuitBreaker(
+        "users", failure_threshold=1, recovery_timeout=5, clock=clock
+    )
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open()
+    assert breaker.opened_count == 2
+
+
+def test_retry_delay_is_bounded():
+    policy = RetryPolicy(base_delay=0.5, max_delay=1.0)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt) <= min(1.0, 0.5 * 2**attempt)
+
+
+def test_attempt_timeout_respects_deadline():
+    policy = RetryPolicy(attempt_timeout=15.0)
+    assert policy.attempt_timeout_left(None, 100.0) == 15.0
+    assert policy.attempt_timeout_left(104.0, 100.0) == 4.0
+    assert policy.attempt_timeout_left(200.0, 100.0) == 15.0
+
+
+def test_call_retries_server_errors():
+    result, vox = _call(
+        [ServerError("502"), ServerError("503"), {"id": 1}],
+        retry=RetryPolicy(attempts=3, base_delay=0),
+    )
+    assert result == {"id": 1}
+    assert len(vox.timeouts) == 3
+
+
+def test_call_gives_up_after_attempts():
+    with pytest.raises(ServerError):
+        _call(
+            [ServerError("500")] * 3 + [{"id": 1}],
+            retry=RetryPolicy(attempts=2, base_delay=0),
+        )
+
+
+def test_call_does_not_retry_client_errors():
+    with pytest.raises(NotFoundError):
+        _call([NotFoundError("404"), {"id": 1}], retry=RetryPolicy(base_delay=0))
+
+
+def test_call_stops_when_deadline_is_spent():
+    # Бюджета хватает только на первую попытку
+    with pytest.raises(ServerError):
+        _call(
+            [ServerError("500"), {"id": 1}],
+            retry=RetryPolicy(attempts=3, base_delay=0, deadline=0.5, min_attempt=1.0),
+        )
+
+
+def test_call_limits_retry_timeout_to_deadline():
+    _, vox = _call(
+        [ServerError("500"), {"id": 1}],
+        retry=RetryPolicy(attempts=2, base_delay=0, attempt_timeout=15.0, deadline=5.0),
+    )
+    assert vox.timeouts[1].total <= 5.0
+
+
+def test_call_fails_fast_on_open_breaker():
+    breakers = CircuitBreakers(failure_threshold=1)
+    with pytest.raises(ServerError):
+        _call(
+            [ServerError("500")],
+            retry=RetryPolicy(attempts=3, base_delay=0),
+            breakers=breakers,
+        )
+    with pytest.raises(CircuitOpenError):
+        _call([{"id": 1}], breakers=breakers)
+
+
+def test_generation_timeout_is_not_retried_or_counted():
+    async def run():
+        breakers = CircuitBreakers(failure_threshold=1)
+        vox = FlakyVox(
+            [asyncio.TimeoutError(), {"text": "ok"}],
+            retry=RetryPolicy(attempts=3, base_delay=0, generation_timeout=90.0),
+            breakers=breakers,
+        )
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await vox._call("POST", "/ai_analytics/custom/USER/1")
+        finally:
+            await vox.close()
+        assert len(vox.timeouts) == 1
+        assert vox.timeouts[0].total == 90.0
+        assert vox.timeouts[0].sock_read == 90.0
+        assert breakers.states() == {"/ai_analytics/custom/USER/{id}": "closed"}
+
+    asyncio.run(run())
+
+
+def test_generation_server_errors_are_still_retried():
+    async def run():
+        vox = FlakyVox(
+            [ServerError("502"), {"text": "ok"}],
+            retry=RetryPolicy(attempts=2, base_delay=0, deadline=0.5),
+        )
+        try:
+            assert await vox._call("POST", "/ai_analytics/custom/USER/1") == {
+                "text": "ok"
+            }
+        finally:
+            await vox.close()
+
+    asyncio.run(run())
+
+
+def test_pool_total_timeout_caps_every_attempt():
+    _, vox = _call(
+        [ServerError("500"), {"id": 1}],
+        retry=RetryPolicy(attempts=2, base_delay=0, attempt_timeout=15.0),
+        pool=PoolConfig(total_timeout=4.0),
+    )
+    assert [t.total for t in vox.timeouts] == [4.0, 4.0]
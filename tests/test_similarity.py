@@ -0,0 +1,56 @@
+import asyncio
+
+from vox.jsoncodec import decode_analytics
+from vox.similarity import SimilarityEngine, cosine_similarity
+
+
+class EmbeddingVox:
+    """ai_analytics и cosine_similarity без сети, с подсчётом вызовов."""
+
+    def __init__(self, embeddings: dict, remote: float = 0.5):
+        self.embeddings = embeddings
+        self.remote_score = remote
+        self.analytics_calls = []
+        self.remote_calls = []
+
+    async def ai_analytics(self, subject, subject_id, embedding=False):
+        self.analytics_calls.append(subject_id)
+        return {"embedding": self.embeddings.get(subject_id)}
+
+    async def cosine_similarity(self, subject, id1, id2):
+        self.remote_calls.append((id1, id2))
+        return {"cosine_similarity": self.remote_score}
+
+
+def test_cosine_similarity():
+    assert cosine_similarity([1, 0], [1, 0]) == 1.0
+    assert cosine_similarity([1, 0], [0, 1]) == 0.0
+    assert cosine_similarity([1, 0], None) is None
+    assert cosine_similarity([1, 0], [1, 0, 0]) is None
+
+
+def test_engine_uses_known_embeddings_without_vox():
+    vox = EmbeddingVox({})
+    score = asyncio.run(
+        SimilarityEngine(vox).similarity(1, 2, known={1: [1, 0], 2: [1, 0]})
+    )
+    assert score == 1.0
+    assert vox.analytics_calls == [] and vox.remote_calls == []
+
+
+def test_engine_asks_vox_when_embedding_is_missing():
+    vox = EmbeddingVox({2: [0.0, 1.0]}, remote=0.25)
+    engine = SimilarityEngine(vox)
+    assert asyncio.run(engine.similarity(1, 2, known={1: None})) == 0.25
+    assert vox.analytics_calls == [2]
+    assert vox.remote_calls == [(1, 2)]
+    assert engine.stats() == {"local": 0, "remote": 1}
+
+
+def test_decode_analytics_marks_missing_embedding():
+    body = b'{"report": "r", "embedding": null}'
+    assert decode_analytics(body, with_embedding=True) == {
+        "report": "r",
+        "embedding": None,
+    }
+    assert decode_analytics(body) == {"report": "r"}
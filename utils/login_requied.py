@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta, timezone
+
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
@@ -5,6 +7,22 @@ from db.User import User
 from loguru import logger
 from translations.get_phrase import get_phrase
 
+LAST_SEEN_RESOLUTION = timedelta(hours=1)
+
+
+async def touch_last_seen(user: User) -> None:
+    """Отмечает активность пользователя (для ночного предрасчёта)."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    if user.last_seen is not None and now - user.last_seen < LAST_SEEN_RESOLUTION:
+        return
+    user.last_seen = now
+    try:
+        await User.update(last_seen=now).where(
+            User.user_id == user.user_id
+        ).aio_execute()
+    except Exception as e:
+        logger.warning(f"Failed to update last_seen for user {user.user_id}: {e}")
+
 
 def only_registered(func, text_tag="user_not_registered"):
     async def wrapper(message: Message):
@@ -16,6 +34,7 @@ def only_registered(func, text_tag="user_not_registered"):
             logger.info(f"User {message.from_user.id} not registered")
             await message.reply(get_phrase(text_tag, message.from_user.language_code))
             return
+        await touch_last_seen(user)
         return await func(message, user)
 
     return wrapper
@@ -33,6 +52,7 @@ def only_registered_callback(func, text_tag="user_not_registered"):
                 get_phrase(text_tag, callback.from_user.language_code)
             )
             return
+        await touch_last_seen(user)
         return await func(callback, state, user)
 
     return wrapper
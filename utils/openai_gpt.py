@@ -1,18 +1,90 @@
+import asyncio
 import os
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
+from loguru import logger
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 # Загружаем переменные окружения из .env файла
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Таймаут одного запроса, повторы (SDK повторяет 408/409/429/5xx и сетевые
+# ошибки с экспоненциальной задержкой) и предел одновременных генераций
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "16"))
+
+# Один клиент и один пул соединений на процесс
+client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+    max_retries=OPENAI_MAX_RETRIES,
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_CONCURRENCY * 2,
+            max_keepalive_connections=OPENAI_CONCURRENCY,
+            keepalive_expiry=30,
+        )
+    ),
+)
+
+_semaphore = asyncio.Semaphore(OPENAI_CONCURRENCY)
 
-def ask_gpt(prompt: str, model: str = "gpt-3.5-turbo") -> str:
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.8,
-        max_tokens=800,
-    )
+
+async def ask_gpt(prompt: str, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Генерация без блокировки event loop: не больше OPENAI_CONCURRENCY
+    запросов одновременно, остальные ждут своей очереди.
+    """
+    async with _semaphore:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.8,
+            max_tokens=800,
+        )
     content = response.choices[0].message.content
-    return content.strip() if content else "" 
\ No newline at end of file
+    if response.usage is not None:
+        logger.debug(f"[GPT] {model}: {response.usage.total_tokens} tokens")
+    return content.strip() if content else ""
+
+
+async def stream_gpt(prompt: str, model: str = "gpt-3.5-turbo") -> AsyncIterator[str]:
+    """Та же генерация, что ask_gpt, но по кускам текста по мере готовности."""
+    async with _semaphore:
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.8,
+            max_tokens=800,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+async def ask_gpt_stream(
+    prompt: str,
+    on_text: Callable[[str], Awaitable[None]],
+    model: str = "gpt-3.5-turbo",
+) -> str:
+    """ask_gpt, сообщающий on_text(накопленный текст) после каждого куска."""
+    text = ""
+    async for delta in stream_gpt(prompt, model):
+        text += delta
+        await on_text(text)
+    return text.strip()
+
+
+async def ask_gpt_progressive(prompt: str, progress=None) -> str:
+    """
+    ask_gpt; если передан utils.progressive.ProgressiveEditor - со
+    стримингом ответа в его сообщение (ask_gpt_stream).
+    """
+    if progress is None:
+        return await ask_gpt(prompt)
+    return await ask_gpt_stream(prompt, progress.update)
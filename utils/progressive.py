@@ -0,0 +1,87 @@
+import re
+import time
+from typing import Awaitable, Callable, Optional
+
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from loguru import logger
+
+_TAG = re.compile(r"<(/?)([a-zA-Z][\w-]*)[^<>]*>")
+_PARTIAL_ENTITY = re.compile(r"&#?\w*$")
+
+
+def html_prefix(text: str) -> str:
+    """
+    Валидный для Telegram HTML из начала генерируемого текста: без
+    оборванного тега или сущности в конце и с закрытыми открытыми тегами.
+    """
+    lt = text.rfind("<")
+    if lt > text.rfind(">"):
+        text = text[:lt]
+    text = _PARTIAL_ENTITY.sub("", text)
+    stack = []
+    for match in _TAG.finditer(text):
+        closing, name = match.group(1), match.group(2).lower()
+        if not closing:
+            if not match.group(0).endswith("/>"):
+                stack.append(name)
+        elif name in stack:
+            del stack[len(stack) - 1 - stack[::-1].index(name)]
+    return text + "".join(f"</{name}>" for name in reversed(stack))
+
+
+class ProgressiveEditor:
+    """
+    Показывает частичный ответ LLM в сообщении-заглушке через edit_text
+    (или bot.edit_message_text с inline_message_id).
+
+    Правки не чаще min_interval секунд и только если текст вырос хотя бы
+    на min_chars символов - лимиты Telegram на редактирование. На
+    RetryAfter правки откладываются на указанное время. Финальный текст
+    с клавиатурой по-прежнему ставит обработчик.
+    """
+
+    def __init__(
+        self,
+        edit: Callable[..., Awaitable],
+        prefix: str = "",
+        min_interval: float = 1.0,
+        min_chars: int = 40,
+        cursor: str = " ▌",
+    ):
+        self.edit = edit
+        self.prefix = prefix
+        self.min_interval = min_interval
+        self.min_chars = min_chars
+        self.cursor = cursor
+        self.edits = 0
+        self.first_content: Optional[float] = None
+        self._started = time.monotonic()
+        self._next_edit = 0.0
+        self._sent_len = 0
+
+    async def update(self, text: str) -> None:
+        now = time.monotonic()
+        if now < self._next_edit or len(text) - self._sent_len < self.min_chars:
+            return
+        visible = html_prefix(text)
+        if not visible.strip():
+            return
+        self._next_edit = now + self.min_interval
+        self._sent_len = len(text)
+        try:
+            await self.edit(
+                self.prefix + visible + self.cursor, parse_mode=ParseMode.HTML
+            )
+        except TelegramRetryAfter as e:
+            self._next_edit = time.monotonic() + e.retry_after
+            logger.warning(f"[PROGRESSIVE] flood control, пауза {e.retry_after}s")
+            return
+        except TelegramBadRequest as e:
+            # "message is not modified" и т.п. - частичный текст не критичен
+            logger.debug(f"[PROGRESSIVE] edit skipped: {e}")
+            return
+        self.edits += 1
+        if self.first_content is None:
+            self.first_content = time.monotonic() - self._started
+            logger.info(f"[PROGRESSIVE] первый текст через {self.first_content:.2f}s")
@@ -0,0 +1,155 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from loguru import logger
+
+from config import PROMPT_BUDGET_DEFAULT, PROMPT_BUDGETS
+from vox.metrics import Summaries
+
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SPACES = re.compile(r"[ \t]+")
+_LINE_EDGES = re.compile(r" ?\n ?")
+# Пробел после конца предложения: . ! ? … (в том числе перед закрывающей
+# кавычкой/скобкой - она остаётся в предложении)
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[.!?…][\"»)])\s+")
+ELLIPSIS = "…"
+
+
+def size(text: str) -> int:
+    """
+    Размер в query-параметре: custom_prompt уходит percent-encoded, и
+    кириллическая буква занимает 6 байт URL ("%D0%B0").
+    """
+    return len(quote(text, safe=""))
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка токенов без токенизатора: ~3 символа на токен для кириллицы."""
+    return (len(text) + 2) // 3
+
+
+def _cut(text: str, limit: int) -> str:
+    """Начало text не длиннее limit байт, по границе слова, с многоточием."""
+    if size(text) <= limit:
+        return text
+    limit -= size(ELLIPSIS)
+    if limit <= 0:
+        return ""
+    used = end = 0
+    for end, char in enumerate(text):
+        used += size(char)
+        if used > limit:
+            break
+    head = text[:end]
+    space = head.rfind(" ")
+    if space > len(head) // 2:
+        head = head[:space]
+    return head.rstrip(" ,;:-") + ELLIPSIS
+
+
+def condense(text: str, limit: int) -> str:
+    """
+    Детерминированное сжатие отчёта ai_analytics до limit байт.
+
+    1. Схлопываются пробелы (и по краям строк) и пустые строки.
+    2. Если не влезает - экстрактивная выжимка: предложения берутся по
+       рангу (сначала первые предложения всех абзацев, потом вторые и
+       т.д.; не влезшее пропускается) и выводятся в исходном порядке.
+    3. Если не влезают даже первые предложения - обрезка по слову.
+    """
+    text = _SPACES.sub(" ", text.strip())
+    text = _BLANK_LINES.sub("\n\n", _LINE_EDGES.sub("\n", text))
+    if size(text) <= limit:
+        return text
+    paragraphs = [
+        [s for s in _SENTENCE_END.split(p.strip()) if s] for p in text.split("\n")
+    ]
+    ranked = sorted(
+        (j, i) for i, sentences in enumerate(paragraphs) for j in range(len(sentences))
+    )
+    chosen = set()
+    used = 0
+    for j, i in ranked:
+        # + разделитель (пробел или перевод строки, оба - 3 байта в URL)
+        cost = size(paragraphs[i][j]) + size(" ")
+        if used + cost > limit:
+            continue
+        chosen.add((i, j))
+        used += cost
+    if not chosen:
+        return _cut(text, limit)
+    lines = []
+    for i, sentences in enumerate(paragraphs):
+        kept = [s for j, s in enumerate(sentences) if (i, j) in chosen]
+        if kept:
+            lines.append(" ".join(kept))
+    return "\n".join(lines)
+
+
+class PromptBudget:
+    """
+    Сборка custom_prompt для VOX с бюджетом в байтах URL на сценарий (flow).
+
+    Промпт сценария (вместе с _global_prompt) не трогаем; отчёты
+    ai_analytics делят остаток бюджета поровну (недобранное одним
+    достаётся следующему) и сжимаются через condense. Так запрос
+    не растёт с длиной отчётов и не упирается в длину URL.
+    """
+
+    def __init__(self, budgets: Dict[str, int], default: int):
+        self.budgets = budgets
+        self.default = default
+        self.metrics = Summaries()
+        self.trimmed = Counter()
+
+    def limit(self, flow: Optional[str]) -> int:
+        return self.budgets.get(flow, self.default)
+
+    def assemble(
+        self,
+        flow: Optional[str],
+        sections: Sequence[Tuple[Optional[str], str]],
+        prompt: str,
+    ) -> str:
+        """
+        sections - пары (заголовок или None, текст отчёта) в порядке вывода;
+        результат - "заголовок\\nотчёт\\n\\n...\\n\\nprompt".
+        """
+        flow = flow or "default"
+        separator = "\n\n"
+        fixed = size(prompt) + sum(
+            (size(header) + size("\n") if header else 0) + size(separator)
+            for header, _ in sections
+        )
+        available = max(self.limit(flow) - fixed, 0)
+        parts: List[str] = []
+        original = 0
+        for n, (header, body) in enumerate(sections):
+            body = str(body)
+            original += size(body)
+            share = available // (len(sections) - n)
+            body = condense(body, share)
+            available -= size(body)
+            parts.append(f"{header}\n{body}" if header else body)
+        parts.append(prompt)
+        result = separator.join(parts)
+        final = size(result)
+        if final < fixed + original:
+            self.trimmed[flow] += 1
+            logger.info(
+                f"[PROMPT] {flow}: отчёты сжаты {original} -> {final - fixed} байт "
+                f"(бюджет {self.limit(flow)})"
+            )
+        self.metrics.observe(f"{flow}.bytes", final)
+        self.metrics.observe(f"{flow}.tokens", estimate_tokens(result))
+        return result
+
+    def stats(self) -> dict:
+        stats = self.metrics.as_dict()
+        stats["trimmed"] = dict(self.trimmed)
+        return stats
+
+
+prompt_budget = PromptBudget(PROMPT_BUDGETS, PROMPT_BUDGET_DEFAULT)
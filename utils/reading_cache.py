@@ -0,0 +1,125 @@
+import hashlib
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Optional
+
+import pytz
+from loguru import logger
+
+from db.VoxCache import VoxCacheStore
+from vox.cache import TieredCache, TTLCache
+
+MOSCOW = pytz.timezone("Europe/Moscow")
+
+
+class CachePolicy(str, Enum):
+    """Сколько живёт готовое чтение: до конца дня, недели или не кэшируется."""
+
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    NONE = "none"
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def _bounds(policy: CachePolicy, now: datetime):
+    """(метка периода, начало, конец) по московскому календарю."""
+    local = now.astimezone(MOSCOW)
+    midnight = MOSCOW.localize(datetime(local.year, local.month, local.day))
+    if policy == CachePolicy.DAILY:
+        end = MOSCOW.normalize(midnight + timedelta(days=1))
+        return local.date().isoformat(), midnight, end
+    year, week, weekday = local.isocalendar()
+    start = MOSCOW.normalize(midnight - timedelta(days=weekday - 1))
+    end = MOSCOW.normalize(midnight + timedelta(days=8 - weekday))
+    return f"{year}-W{week:02d}", start, end
+
+
+def _period(policy: CachePolicy, now: datetime):
+    """(метка периода, секунд до его конца) по московскому календарю."""
+    period, _, end = _bounds(policy, now)
+    return period, (end - now.astimezone(MOSCOW)).total_seconds()
+
+
+# Шаблон конца ключа (метки периода) для каждой политики: "2026-10-18", "2026-W42"
+_PERIOD_PATTERNS = {
+    CachePolicy.DAILY: "%:____-__-__",
+    CachePolicy.WEEKLY: "%:____-W__",
+}
+
+
+class ReadingCache(TieredCache):
+    """
+    Кэш готовых ответов process_user_nickname по ключу
+    (VOX user_id, отпечаток промпта, московский день или неделя).
+
+    Повторное нажатие "предсказание" в тот же день - чтение из кэша,
+    а не новая генерация LLM. Метка периода входит в ключ, поэтому
+    вчерашние записи просто перестают совпадать; из хранилища их
+    удаляет purge. Второй уровень - общее хранилище
+    (db.VoxCache.VoxCacheStore), см. TieredCache.
+    """
+
+    log_tag = "[READING CACHE]"
+
+    def __init__(self, store=None, maxsize: int = 10_000):
+        super().__init__(TTLCache(maxsize=maxsize), store)
+
+    @staticmethod
+    def key(
+        user_id: int, prompt: str, policy: CachePolicy, now: datetime = None
+    ) -> str:
+        period, _ = _period(policy, now or datetime.now(pytz.utc))
+        return f"{user_id}:{prompt_fingerprint(prompt)}:{period}"
+
+    async def get(
+        self, user_id: int, prompt: str, policy: CachePolicy, now: datetime = None
+    ) -> Optional[str]:
+        if policy == CachePolicy.NONE:
+            return None
+        now = now or datetime.now(pytz.utc)
+        _, ttl = _period(policy, now)
+        # Период - часть ключа: запись из хранилища живёт до его конца
+        return await self._load(
+            self.key(user_id, prompt, policy, now),
+            lambda text, age: ttl if text is not None else 0,
+        )
+
+    async def set(
+        self,
+        user_id: int,
+        prompt: str,
+        policy: CachePolicy,
+        text: str,
+        now: datetime = None,
+    ) -> None:
+        if policy == CachePolicy.NONE or not text:
+            return
+        now = now or datetime.now(pytz.utc)
+        _, ttl = _period(policy, now)
+        await self._save(self.key(user_id, prompt, policy, now), text, ttl=ttl)
+
+    async def purge(self, now: datetime = None) -> int:
+        """
+        Удаляет из хранилища чтения прошедших дней и недель (записанные до
+        начала текущего периода своей политики). Возвращает число записей.
+        """
+        if self.store is None:
+            return 0
+        now = now or datetime.now(pytz.utc)
+        deleted = 0
+        for policy, pattern in _PERIOD_PATTERNS.items():
+            _, start, _ = _bounds(policy, now)
+            try:
+                deleted += await self.store.purge(start.timestamp(), pattern)
+            except Exception as e:
+                self.store_errors += 1
+                logger.warning(
+                    f"{self.log_tag} store.purge({policy.value}) failed: {e}"
+                )
+        return deleted
+
+
+reading_cache = ReadingCache(store=VoxCacheStore("reading"))
@@ -1,5 +1,7 @@
+import asyncio
+import time
 import aiohttp
-from typing import Optional, List, Union, Any
+from typing import Optional, List, Union, Any, AsyncIterator, Iterable, Sequence
 from urllib.parse import quote
 from loguru import logger
 from .exceptions import (
@@ -8,45 +10,398 @@ from .exceptions import (
     NotFoundError,
     ServerError,
     ApiError,
+    CircuitOpenError,
+    RateLimitError,
 )
-from .models import Subject, AIAnalytics, EmptyResponse, CosineSimilarityResponse, FastReport, UserStructuredReport, CloseUsers, UserActivity, ActivitiesHourly, ActivitiesWeekly, ActivitiesTotal, UserLanguageResponse, GenderResponse, CompactResponse, UserNameAlias, UserID, UserRegistrationDate, UserProfile, Group, GroupReport
+from . import jsoncodec
+from .limiter import AdaptiveLimiter, current_priority
+from .metrics import Summaries
+from .lazy import wrap
+from .pagination import paginate
+from .pool import PoolConfig, pool_stats
+from .routing import BaseEndpoint, EndpointRouter
+from .resilience import CircuitBreakers, RetryPolicy, endpoint_of
+from .bulk import BulkResult, bounded_map
+from .cache import NOT_FOUND, AnalyticsCache, UserIdCache
+from .identity import IdentityIndex
+from .models import (
+    Subject,
+    AIAnalytics,
+    EmptyResponse,
+    CosineSimilarityResponse,
+    FastReport,
+    UserStructuredReport,
+    CloseUsers,
+    UserActivity,
+    ActivitiesHourly,
+    ActivitiesWeekly,
+    ActivitiesTotal,
+    UserLanguageResponse,
+    GenderResponse,
+    CompactResponse,
+    UserNameAlias,
+    UserID,
+    UserRegistrationDate,
+    UserProfile,
+    Group,
+    GroupReport,
+)
+
+# Генерация текста LLM: долгая по природе, её задержку лимитер не учитывает
+GENERATION_PATH_PREFIX = "/ai_analytics/custom/"
+
+# Эндпоинты, через которые идёт любое чтение (предсказание, вопрос и т.д.)
+READING_ENDPOINTS = (
+    "/users/username/{username}",
+    "/ai_analytics/USER/{id}",
+    "/ai_analytics/custom/USER/{id}",
+)
+
+
+class _Flight:
+    """Выполняющийся запрос к VOX и число ожидающих его корутин."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+def _flight_key(method: str, path: str, params: Optional[dict], decoder) -> tuple:
+    return method, path, tuple(sorted((params or {}).items())), decoder
+
+
+def _decode_custom_report(body: bytes):
+    return jsoncodec.decode_report(jsoncodec.loads(body))
+
+
+def _decode_analytics_with_embedding(body: bytes):
+    return jsoncodec.decode_analytics(body, with_embedding=True)
+
+
+# Ошибки, после которых запрос имеет смысл повторить (и на другом адресе)
+_RETRYABLE = (
+    ServerError,
+    RateLimitError,
+    aiohttp.ClientConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+# VOX недоступен: get_user_id может ответить из индекса алиасов
+_UNREACHABLE = _RETRYABLE + (CircuitOpenError,)
+
+
+def _has_embedding(value) -> bool:
+    """Отчёт запрашивался с embedding (None - у VOX эмбеддинга нет)."""
+    return isinstance(value, dict) and "embedding" in value
 
 
 class AsyncVoxAPI:
-    def __init__(self, token: str, base_url: str = "https://api.vox-lab.com/"):
-        self.base_url = base_url.rstrip("/")
+    def __init__(
+        self,
+        token: str,
+        base_url: Union[str, Sequence[str]] = "https://api.vox-lab.com/",
+        user_id_cache: Optional[UserIdCache] = None,
+        analytics_cache: Optional[AnalyticsCache] = None,
+        retry: Optional[RetryPolicy] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        pool: Optional[PoolConfig] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        typed: bool = False,
+        trusted: bool = False,
+        router: Optional[EndpointRouter] = None,
+        identity: Optional[IdentityIndex] = None,
+    ):
+        """
+        typed=True - ответы оборачиваются в vox.lazy.LazyModel с типами из
+        vox.models и ленивой валидацией полей; trusted=True - без валидации
+        (аналог model_construct). По умолчанию возвращаются сырые dict.
+
+        base_url может быть списком зеркал VOX: запросы распределяются
+        EndpointRouter'ом по здоровью адресов (router - свой экземпляр,
+        например с hedge_percentile; тогда адреса берутся из него).
+
+        identity - индекс алиасов (вместе с user_id_cache): если VOX
+        недоступен, get_user_id ищет ник среди известных алиасов уже
+        разрешённых пользователей.
+        """
+        urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.router = router or EndpointRouter(urls)
+        self.base_url = self.router.endpoints[0].url
+        self.retry = retry or RetryPolicy()
+        self.breakers = breakers or CircuitBreakers()
+        self.pool = pool or PoolConfig()
+        self.limiter = limiter or AdaptiveLimiter()
+        self.typed = typed
+        self.trusted = trusted
+        self._attempt_timeout = self.pool.timeout(total=self.retry.attempt_timeout)
+        self._generation_timeout = self.pool.timeout(
+            total=self.retry.generation_timeout,
+            sock_read=self.retry.generation_timeout,
+        )
+        self.user_id_cache = user_id_cache
+        self.analytics_cache = analytics_cache
+        self.identity = identity
+        self._inflight: dict = {}
+        self.coalesced_requests = 0
+        self.payload_bytes = Summaries()
+        self.decode_seconds = Summaries()
         self.session = aiohttp.ClientSession(
             headers={
                 "Authorization": f"Bearer {token}",
                 "Accept": "application/json",
-            }
+            },
+            connector=self.pool.connector(),
+            timeout=self.pool.timeout(),
         )
 
     async def close(self):
         await self.session.close()
 
+    def stats(self) -> dict:
+        """Сводка внутренних счётчиков клиента (кэши и т.п.)."""
+        stats = {"coalesced_requests": self.coalesced_requests}
+        if self.user_id_cache is not None:
+            stats["user_id_cache"] = self.user_id_cache.stats()
+        if self.analytics_cache is not None:
+            stats["analytics_cache"] = self.analytics_cache.stats()
+        if self.identity is not None:
+            stats["identity"] = self.identity.stats()
+        stats["breakers"] = self.breakers.states()
+        stats["pool"] = pool_stats(self.session.connector)
+        stats["limiter"] = self.limiter.stats()
+        if len(self.router) > 1:
+            stats["router"] = self.router.stats()
+        stats["json_backend"] = jsoncodec.BACKEND
+        stats["payload_bytes"] = self.payload_bytes.as_dict()
+        stats["decode_seconds"] = self.decode_seconds.as_dict()
+        return stats
+
+    def _wrap(self, value, model):
+        if not self.typed or not value:
+            return value
+        return wrap(value, model, self.trusted)
+
+    def is_degraded(self) -> bool:
+        """True, если breaker одного из эндпоинтов чтения открыт."""
+        return any(self.breakers.is_open(e) for e in READING_ENDPOINTS)
+
     async def _request(self, method: str, path: str, **kwargs) -> any:
-        url = f"{self.base_url}/{path.lstrip('/')}"
-        async with self.session.request(method, url, **kwargs) as resp:
-            text = await resp.text()
-            if resp.status in (401, 403):
-                raise AuthenticationError(text)
-            if resp.status == 422:
-                try:
-                    detail = await resp.json()
-                except Exception:
-                    raise ValidationError(
-                        "Validation failed (422), but response is not valid JSON"
+        """
+        Одинаковые параллельные GET-запросы (метод, путь, параметры)
+        схлопываются в один поход в VOX, результат или исключение
+        получают все ожидающие. Отмена одного ожидающего не отменяет
+        запрос остальным; запрос отменяется, когда ждать его некому.
+        Ответ - общий объект для всех ожидающих, изменять его нельзя.
+        """
+        if method != "GET":
+            return await self._call(method, path, **kwargs)
+
+        key = _flight_key(method, path, kwargs.get("params"), kwargs.get("decoder"))
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(self._call(method, path, **kwargs)))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced_requests += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: tuple, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    async def _call(self, method: str, path: str, **kwargs) -> any:
+        """Запрос с повторами на 5xx/сетевых ошибках и circuit breaker'ом."""
+        breaker = self.breakers.get(endpoint_of(path))
+        generation = path.startswith(GENERATION_PATH_PREFIX)
+        deadline_at = None
+        if generation:
+            kwargs.setdefault("timeout", self._generation_timeout)
+        elif self.retry.deadline is not None and "timeout" not in kwargs:
+            deadline_at = time.monotonic() + self.retry.deadline
+        kwargs.setdefault("timeout", self._attempt_timeout)
+        for attempt in range(self.retry.attempts):
+            if not breaker.allow():
+                raise CircuitOpenError(f"VOX endpoint {breaker.name} is unavailable")
+            if attempt > 0 and deadline_at is not None:
+                # Последняя попытка получает только остаток общего бюджета
+                kwargs["timeout"] = self.pool.timeout(
+                    total=self.retry.attempt_timeout_left(deadline_at, time.monotonic())
+                )
+            try:
+                result = await self._send_limited(method, path, **kwargs)
+            except _RETRYABLE as e:
+                if generation and isinstance(e, asyncio.TimeoutError):
+                    # Долгая генерация - не отказ VOX; повтор начал бы её заново
+                    breaker.release()
+                    raise
+                if isinstance(e, RateLimitError):
+                    # VOX жив, просто просит притормозить
+                    breaker.release()
+                else:
+                    breaker.record_failure()
+                if attempt + 1 >= self.retry.attempts or breaker.is_open():
+                    raise
+                delay = self.retry.delay(attempt)
+                if (
+                    deadline_at is not None
+                    and self.retry.attempt_timeout_left(
+                        deadline_at, time.monotonic() + delay
                     )
-                raise ValidationError(detail)
-            if resp.status == 404:
-                raise NotFoundError(text)
-            if 500 <= resp.status < 600:
-                raise ServerError(text)
+                    < self.retry.min_attempt
+                ):
+                    logger.warning(
+                        f"[VOX] {method} {breaker.name} failed ({type(e).__name__}: {e}), "
+                        f"бюджет {self.retry.deadline}s исчерпан, без повтора"
+                    )
+                    raise
+                logger.warning(
+                    f"[VOX] {method} {breaker.name} failed ({type(e).__name__}: {e}), "
+                    f"retry {attempt + 1}/{self.retry.attempts - 1} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception:
+                # 4xx и прочие ошибки клиента - VOX жив, breaker считает успехом
+                breaker.record_success()
+                raise
+            else:
+                breaker.record_success()
+                return result
+
+    async def _send_limited(self, method: str, path: str, **kwargs) -> any:
+        """Одна попытка запроса под адаптивным лимитером в лейне вызывающего."""
+        priority = current_priority()
+        await self.limiter.acquire(priority)
+        started = time.monotonic()
+        overloaded = False
+        try:
+            return await self._send(method, path, **kwargs)
+        except _RETRYABLE:
+            overloaded = True
+            raise
+        finally:
+            latency = time.monotonic() - started
+            if path.startswith(GENERATION_PATH_PREFIX):
+                latency = None
+            self.limiter.release(priority, latency, overloaded)
+
+    async def _send(self, method: str, path: str, **kwargs) -> any:
+        """
+        Одна попытка на самый здоровый base URL. Если включён hedging и
+        GET не уложился в перцентиль задержки эндпоинта, тот же запрос
+        уходит на второй адрес; берётся первый успешный ответ. Дубль
+        занимает свой слот лимитера; если свободного нет - не хеджируем.
+        """
+        template = endpoint_of(path)
+        primary = self.router.pick()
+        delay = None
+        if method == "GET" and not path.startswith(GENERATION_PATH_PREFIX):
+            delay = self.router.hedge_delay(template)
+        if delay is None:
+            return await self._send_to(primary, method, path, **kwargs)
+        first = asyncio.ensure_future(self._send_to(primary, method, path, **kwargs))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+            priority = current_priority()
+            if not self.limiter.try_acquire(priority):
+                self.router.hedges_skipped += 1
+                return await first
+            backup = self.router.pick(exclude=(primary,))
+            second = asyncio.ensure_future(
+                self._send_to(backup, method, path, **kwargs)
+            )
+            # Окно лимитера дубль не двигает: исход учтёт основная попытка
+            second.add_done_callback(
+                lambda _: self.limiter.release(priority, None, sample=False)
+            )
+            pending.add(second)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        self.router.hedged(won=task is second)
+                        return task.result()
+                    if not isinstance(error, _RETRYABLE):
+                        # 4xx - ответ по существу, второй адрес скажет то же
+                        self.router.hedged(won=task is second)
+                        raise error
+            self.router.hedged(won=False)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send_to(
+        self, endpoint: BaseEndpoint, method: str, path: str, decoder=None, **kwargs
+    ) -> any:
+        """
+        Тело ответа читается один раз (bytes) и разбирается decoder'ом
+        (по умолчанию jsoncodec.loads, т.е. orjson при наличии).
+        """
+        url = f"{endpoint.url}/{path.lstrip('/')}"
+        self.router.started(endpoint)
+        started = time.monotonic()
+        latency, failed = None, True
+        try:
+            async with self.session.request(method, url, **kwargs) as resp:
+                body = await resp.read()
+            latency = time.monotonic() - started
+            failed = resp.status == 429 or resp.status >= 500
+        except asyncio.CancelledError:
+            # Проигравший hedge или ушедший вызывающий: ошибкой не считаем,
+            # но прошедшее время - нижняя оценка задержки адреса
+            latency, failed = time.monotonic() - started, None
+            raise
+        finally:
+            if path.startswith(GENERATION_PATH_PREFIX):
+                latency = None
+            self.router.finished(endpoint, endpoint_of(path), latency, failed)
+        if resp.status in (401, 403):
+            raise AuthenticationError(body.decode("utf-8", "replace"))
+        if resp.status == 422:
             try:
-                return await resp.json()
+                detail = jsoncodec.loads(body)
             except Exception:
-                raise ApiError("Invalid JSON response")
+                raise ValidationError(
+                    "Validation failed (422), but response is not valid JSON"
+                )
+            raise ValidationError(detail)
+        if resp.status == 404:
+            raise NotFoundError(body.decode("utf-8", "replace"))
+        if resp.status == 429:
+            raise RateLimitError(body.decode("utf-8", "replace"))
+        if 500 <= resp.status < 600:
+            raise ServerError(body.decode("utf-8", "replace"))
+
+        template = endpoint_of(path)
+        self.payload_bytes.observe(template, len(body))
+        started = time.perf_counter()
+        try:
+            result = (decoder or jsoncodec.loads)(body)
+        except Exception:
+            raise ApiError("Invalid JSON response")
+        self.decode_seconds.observe(template, time.perf_counter() - started)
+        return result
 
     async def ping(self) -> str:
         return await self._request("GET", "/ping")
@@ -57,43 +412,91 @@ class AsyncVoxAPI:
         subject_id: int,
         model: Optional[str] = None,
         no_cache: bool = False,
+        embedding: bool = False,
     ):
+        """
+        По умолчанию поле embedding не разбирается и в ответ не попадает.
+        embedding=True - оно возвращается компактным float32-буфером
+        (numpy.ndarray или array('f')), а не списком float.
+        """
         params = {}
         if model:
             params["model"] = model
         if no_cache:
             params["no_cache"] = "true"
-        return await self._request(
-            "GET", f"/ai_analytics/{subject.name}/{subject_id}", params=params
+
+        decoder = (
+            _decode_analytics_with_embedding
+            if embedding
+            else jsoncodec.decode_analytics
         )
 
+        async def fetch():
+            return await self._request(
+                "GET",
+                f"/ai_analytics/{subject.name}/{subject_id}",
+                params=params,
+                decoder=decoder,
+            )
+
+        if self.analytics_cache is None:
+            return self._wrap(await fetch(), AIAnalytics)
+        key = (subject.name, subject_id, model or "")
+        if no_cache:
+            # Явный обход кэша: идём в VOX, но свежий ответ сохраняем
+            result = await self.analytics_cache.put(key, await fetch())
+        else:
+            result = await self.analytics_cache.get_or_fetch(
+                key, fetch, accept=_has_embedding if embedding else None
+            )
+        return self._wrap(result, AIAnalytics)
+
     async def custom_report(
         self,
         subject: Subject,
         subject_id: int,
         custom_prompt: str,
         model: Optional[str] = None,
+        parse_report: bool = False,
     ):
+        """
+        parse_report=True - вложенный JSON из поля report разбирается один
+        раз при получении ответа и кладётся в поле report_data.
+        """
         params = {"custom_prompt": custom_prompt}
         if model:
             params["model"] = model
-        return await self._request(
-            "GET", f"/ai_analytics/custom/{subject.name}/{subject_id}", params=params
+        decoder = _decode_custom_report if parse_report else None
+        return self._wrap(
+            await self._request(
+                "GET",
+                f"/ai_analytics/custom/{subject.name}/{subject_id}",
+                params=params,
+                decoder=decoder,
+            ),
+            AIAnalytics,
         )
 
     async def cosine_similarity(
         self, subject: Subject, subject_id_1: int, subject_id_2: int
     ):
-        return await self._request(
-            "GET",
-            f"/ai_analytics/{subject.name}/cosine_similarity/{subject_id_1}/{subject_id_2}",
+        return self._wrap(
+            await self._request(
+                "GET",
+                f"/ai_analytics/{subject.name}/cosine_similarity/{subject_id_1}/{subject_id_2}",
+            ),
+            CosineSimilarityResponse,
         )
 
     async def fast_report(self, user_id: int):
-        return await self._request("GET", f"/reports/user/{user_id}/fast")
+        return self._wrap(
+            await self._request("GET", f"/reports/user/{user_id}/fast"), FastReport
+        )
 
     async def user_structured_report(self, user_id: int):
-        return await self._request("GET", f"/reports/user/{user_id}")
+        return self._wrap(
+            await self._request("GET", f"/reports/user/{user_id}"), UserStructuredReport
+        )
 
     async def search_users(
         self, query: str, limit: Optional[int] = None, offset: Optional[int] = None
@@ -103,7 +506,9 @@ class AsyncVoxAPI:
             params["limit"] = str(limit)
         if offset:
             params["offset"] = str(offset)
-        return await self._request("GET", "/search/ai/users", params=params)
+        return self._wrap(
+            await self._request("GET", "/search/ai/users", params=params), CloseUsers
+        )
 
     async def search_raw(
         self,
@@ -117,8 +522,9 @@ class AsyncVoxAPI:
             params["limit"] = str(limit)
         if offset:
             params["offset"] = str(offset)
-        return await self._request(
-            "GET", f"/search/ai/raw/{subject.name}", params=params
+        return self._wrap(
+            await self._request("GET", f"/search/ai/raw/{subject.name}", params=params),
+            AIAnalytics,
         )
 
     async def search_users_by_activity(
@@ -127,45 +533,197 @@ class AsyncVoxAPI:
         params = {"query": query, "start_date": start_date, "end_date": end_date}
         if limit:
             params["limit"] = str(limit)
-        return await self._request("GET", "/search/ai/users/activity", params=params)
+        return self._wrap(
+            await self._request("GET", "/search/ai/users/activity", params=params),
+            UserActivity,
+        )
+
+    def iter_search_users(
+        self, query: str, page_size: int = 100, max_items: Optional[int] = None
+    ) -> AsyncIterator[dict]:
+        """search_users постранично: отдаёт элементы close_users по одному."""
+
+        async def fetch_page(offset: int, limit: int):
+            return await self.search_users(query, limit=limit, offset=offset)
+
+        return paginate(
+            fetch_page,
+            page_size,
+            max_items,
+            extract=lambda page: (page or {}).get("close_users") or [],
+        )
+
+    def iter_search_raw(
+        self,
+        subject: Subject,
+        query: str,
+        page_size: int = 100,
+        max_items: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        """search_raw постранично."""
+
+        async def fetch_page(offset: int, limit: int):
+            return await self.search_raw(subject, query, limit=limit, offset=offset)
+
+        return paginate(fetch_page, page_size, max_items)
+
+    async def iter_search_users_by_activity(
+        self,
+        query: str,
+        start_date: str,
+        end_date: str,
+        max_items: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        У эндпоинта нет offset, поэтому это один запрос (limit не больше
+        1000 по схеме API); элементы отдаются по одному.
+        """
+        if max_items is not None and max_items <= 0:
+            return
+        limit = min(max_items, 1000) if max_items is not None else None
+        items = (
+            await self.search_users_by_activity(
+                query, start_date, end_date, limit=limit
+            )
+            or []
+        )
+        for item in items[:max_items]:
+            yield item
+
+    async def iter_group_posts(
+        self, group_id: int, messages_limit: int, messages_min: int, members_min: int
+    ) -> AsyncIterator[str]:
+        """
+        Посты группы по одному. API отдаёт их одной страницей (offset нет),
+        размер ответа ограничивает messages_limit.
+        """
+        report = await self.group_posts(
+            group_id, messages_limit, messages_min, members_min
+        )
+        for post in (report or {}).get("posts") or []:
+            yield post
 
     async def get_activity_hourly(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/activity/hourly")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/activity/hourly"),
+            ActivitiesHourly,
+        )
 
     async def get_activity_weekly(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/activity/weekly")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/activity/weekly"),
+            ActivitiesWeekly,
+        )
 
     async def get_activity_total(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/activity/total")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/activity/total"),
+            ActivitiesTotal,
+        )
 
     async def get_language(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/language")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/language"),
+            UserLanguageResponse,
+        )
 
     async def get_gender(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/gender")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/gender"), GenderResponse
+        )
 
     async def get_compact(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/compact")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/compact"), CompactResponse
+        )
 
     async def get_user_names(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/names")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/names"), UserNameAlias
+        )
 
     async def get_user_id(self, username: str):
         # Ensure username is str before quoting (fix for TypeError)
         if isinstance(username, bytes):
             username = username.decode()
         # URL-кодируем username для корректной обработки специальных символов
-        encoded_username = quote(username, safe='')
-        return await self._request("GET", f"/users/username/{encoded_username}")
+        encoded_username = quote(username, safe="")
+        if self.user_id_cache is None:
+            return self._wrap(
+                await self._request("GET", f"/users/username/{encoded_username}"),
+                UserID,
+            )
+
+        cached = await self.user_id_cache.get(username)
+        if cached is NOT_FOUND:
+            raise NotFoundError(f"User {username} not found (cached)")
+        if cached is not None:
+            return self._wrap({"id": cached}, UserID)
+        try:
+            response = await self._request("GET", f"/users/username/{encoded_username}")
+        except NotFoundError:
+            await self.user_id_cache.set_not_found(username)
+            if self.identity is not None:
+                await self.identity.forget(username)
+            raise
+        except _UNREACHABLE as e:
+            # VOX недоступен: последний известный владелец ника лучше, чем
+            # ничего. Только здесь - ники переходят к другим людям, и при
+            # живом VOX верим его ответу, а не индексу
+            known = None
+            if self.identity is not None:
+                known = await self.identity.lookup(username)
+            if known is None:
+                raise
+            logger.warning(
+                f"[VOX] @{username}: VOX недоступен ({type(e).__name__}), "
+                f"id {known} из индекса алиасов"
+            )
+            return self._wrap({"id": known}, UserID)
+        await self.user_id_cache.set(username, response["id"])
+        if self.identity is not None:
+            await self.identity.remember(response["id"], [username])
+            self.identity.learn(self, response["id"])
+        return self._wrap(response, UserID)
+
+    def get_many_user_ids(
+        self, usernames: Iterable[str], concurrency: int = 8
+    ) -> AsyncIterator[BulkResult]:
+        """
+        get_user_id для многих ников (через кэш), не больше concurrency
+        запросов одновременно. BulkResult отдаются в порядке готовности:
+            async for result in vox.get_many_user_ids(names):
+                if result.ok: ids[result.key] = result.value["id"]
+        """
+        return bounded_map(self.get_user_id, usernames, concurrency)
+
+    def ai_analytics_many(
+        self,
+        subject: Subject,
+        subject_ids: Iterable[int],
+        concurrency: int = 8,
+        **kwargs,
+    ) -> AsyncIterator[BulkResult]:
+        """ai_analytics для многих id; kwargs передаются в ai_analytics."""
+
+        async def fetch(subject_id: int):
+            return await self.ai_analytics(subject, subject_id, **kwargs)
+
+        return bounded_map(fetch, subject_ids, concurrency)
 
     async def get_registration_date(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/registration")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/registration"),
+            UserRegistrationDate,
+        )
 
     async def get_profile(self, user_id: int):
-        return await self._request("GET", f"/users/{user_id}/profile")
+        return self._wrap(
+            await self._request("GET", f"/users/{user_id}/profile"), UserProfile
+        )
 
     async def get_group(self, group_id: int):
-        return await self._request("GET", f"/groups/{group_id}")
+        return self._wrap(await self._request("GET", f"/groups/{group_id}"), Group)
 
     async def group_posts(
         self, group_id: int, messages_limit: int, messages_min: int, members_min: int
@@ -175,4 +733,7 @@ class AsyncVoxAPI:
             "messages_min": str(messages_min),
             "members_min": str(members_min),
         }
-        return await self._request("GET", f"/groups/{group_id}/messages", params=params)
+        return self._wrap(
+            await self._request("GET", f"/groups/{group_id}/messages", params=params),
+            GroupReport,
+        )
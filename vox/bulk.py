@@ -0,0 +1,73 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+
+class BulkResult:
+    """Результат одного элемента пакетного запроса: значение или ошибка."""
+
+    __slots__ = ("key", "value", "error")
+
+    def __init__(
+        self, key: Any, value: Any = None, error: Optional[BaseException] = None
+    ):
+        self.key = key
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"BulkResult({self.key!r}, value={self.value!r})"
+        return f"BulkResult({self.key!r}, error={self.error!r})"
+
+
+async def bounded_map(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    concurrency: int = 8,
+) -> AsyncIterator[BulkResult]:
+    """
+    Выполняет func(item) не более чем в concurrency корутинах одновременно
+    и отдаёт BulkResult в порядке завершения. Ошибка элемента попадает в
+    BulkResult.error и не прерывает пакет. Если потребитель перестал
+    читать, незавершённые запросы отменяются.
+    """
+    iterator = iter(items)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        for item in iterator:
+            try:
+                await results.put(BulkResult(item, await func(item)))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await results.put(BulkResult(item, error=e))
+
+    workers = {asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))}
+    getter = None
+    try:
+        while workers or not results.empty():
+            if not results.empty():
+                yield results.get_nowait()
+                continue
+            getter = asyncio.ensure_future(results.get())
+            done, _ = await asyncio.wait(
+                {getter, *workers}, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done - {getter}:
+                workers.discard(task)
+                task.result()
+            if getter in done:
+                yield getter.result()
+            else:
+                getter.cancel()
+            getter = None
+    finally:
+        if getter is not None:
+            getter.cancel()
+        for task in workers:
+            task.cancel()
@@ -0,0 +1,425 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from loguru import logger
+
+from . import jsoncodec
+from .limiter import Priority, vox_priority
+
+# Маркер отрицательной записи (ресурс не найден в VOX)
+NOT_FOUND = object()
+_MISSING = object()
+
+
+class CacheStats:
+    """Счётчики попаданий/промахов/вытеснений кэша."""
+
+    __slots__ = ("hits", "negative_hits", "misses", "evictions", "expirations")
+
+    def __init__(self):
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TTLCache:
+    """
+    In-process LRU-кэш с TTL на запись.
+
+    Отрицательные записи (NOT_FOUND) живут negative_ttl секунд.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stats = CacheStats()
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return None if default is _MISSING else default
+        expires_at, value = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None if default is _MISSING else default
+        self._data.move_to_end(key)
+        if value is NOT_FOUND:
+            self.stats.negative_hits += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            ttl = self.negative_ttl if value is NOT_FOUND else self.ttl
+        self._data[key] = (self._clock() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def set_not_found(self, key: Hashable) -> None:
+        self.set(key, NOT_FOUND)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+def normalize_alias(username: str) -> str:
+    """Telegram-ники регистронезависимы: "@Foo_Bar " -> "foo_bar"."""
+    return username.strip().lstrip("@").casefold()
+
+
+class TieredCache:
+    """
+    Основа двухуровневых кэшей: TTLCache в памяти процесса и общее
+    хранилище (например, db.VoxCache.VoxCacheStore) с методами
+    ``async get(key) -> (value, updated_at) | None``, ``async set(key, value)``
+    и ``async delete(key)``. Ошибки хранилища не пробрасываются, а
+    считаются в store_errors: без второго уровня кэш работает как локальный.
+    """
+
+    log_tag = "[VOX CACHE]"
+
+    def __init__(self, local: TTLCache, store=None):
+        self.local = local
+        self.store = store
+        self.store_hits = 0
+        self.store_errors = 0
+
+    async def _load(
+        self, key: str, lifetime: Callable[[Any, float], float], none: Any = None
+    ) -> Any:
+        """
+        Значение из памяти, иначе из хранилища. lifetime(value, age) -
+        сколько ещё секунд жить записи возраста age (<= 0 - просрочена);
+        живая запись кладётся в память на этот остаток. None в хранилище
+        превращается в none.
+        """
+        value = self.local.get(key)
+        if value is not None or self.store is None:
+            return value
+        try:
+            stored = await self.store.get(key)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"{self.log_tag} store.get({key}) failed: {e}")
+            return None
+        if stored is None:
+            return None
+        stored_value, updated_at = stored
+        ttl = lifetime(stored_value, time.time() - updated_at)
+        if ttl <= 0:
+            return None
+        value = stored_value if stored_value is not None else none
+        self.store_hits += 1
+        self.local.set(key, value, ttl=ttl)
+        return value
+
+    async def _save(
+        self, key: str, value: Any, ttl: Optional[float] = None, stored: Any = _MISSING
+    ) -> None:
+        """Запись в оба уровня; stored - значение для хранилища, если отличается."""
+        self.local.set(key, value, ttl=ttl)
+        if self.store is None:
+            return
+        try:
+            await self.store.set(key, value if stored is _MISSING else stored)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"{self.log_tag} store.set({key}) failed: {e}")
+
+    async def _drop(self, key: str) -> None:
+        self.local.pop(key)
+        if self.store is None:
+            return
+        try:
+            await self.store.delete(key)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"{self.log_tag} store.delete({key}) failed: {e}")
+
+    def stats(self) -> dict:
+        stats = self.local.stats.as_dict()
+        stats["store_hits"] = self.store_hits
+        stats["store_errors"] = self.store_errors
+        stats["size"] = len(self.local)
+        return stats
+
+
+class UserIdCache(TieredCache):
+    """
+    Двухуровневый кэш username -> VOX user_id (см. TieredCache).
+    Значение None во втором уровне означает отрицательную запись.
+    """
+
+    def __init__(
+        self,
+        local: Optional[TTLCache] = None,
+        store=None,
+        ttl: float = 24 * 3600.0,
+        negative_ttl: float = 600.0,
+    ):
+        super().__init__(local or TTLCache(ttl=ttl, negative_ttl=negative_ttl), store)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return normalize_alias(username)
+
+    def _lifetime(self, value: Any, age: float) -> float:
+        return (self.ttl if value is not None else self.negative_ttl) - age
+
+    async def get(self, username: str) -> Any:
+        """Возвращает user_id, NOT_FOUND или None, если записи нет."""
+        return await self._load(self._key(username), self._lifetime, none=NOT_FOUND)
+
+    async def set(self, username: str, user_id: int) -> None:
+        await self._save(self._key(username), user_id)
+
+    async def set_not_found(self, username: str) -> None:
+        await self._save(self._key(username), NOT_FOUND, stored=None)
+
+
+def _report_freshness(value: Any) -> Tuple[str, int]:
+    """Ключ свежести отчёта AIAnalytics: (date, version)."""
+    if not isinstance(value, dict):
+        return "", 0
+    return str(value.get("date") or ""), int(value.get("version") or 0)
+
+
+def _approx_size(value: Any) -> int:
+    """Грубая оценка размера ответа ai_analytics в байтах."""
+    if not isinstance(value, dict):
+        return 64
+    size = 256
+    report = value.get("report")
+    if isinstance(report, str):
+        size += len(report) * 2
+    embedding = value.get("embedding")
+    if embedding is not None:
+        size += len(embedding) * getattr(embedding, "itemsize", 8)
+    return size
+
+
+# embedding (float32-буфер) - не JSON: в общем хранилище он лежит base64-строкой
+_STORED_EMBEDDING = "embedding_f32"
+
+
+def _to_store(value: Any) -> Any:
+    if not isinstance(value, dict) or "embedding" not in value:
+        return value
+    if value["embedding"] is None:
+        # "У VOX нет эмбеддинга" - тоже ответ, храним его как есть
+        return value
+    stored = {k: v for k, v in value.items() if k != "embedding"}
+    stored[_STORED_EMBEDDING] = jsoncodec.pack_embedding(value["embedding"])
+    return stored
+
+
+def _from_store(value: Any) -> Any:
+    if not isinstance(value, dict) or _STORED_EMBEDDING not in value:
+        return value
+    value = dict(value)
+    try:
+        value["embedding"] = jsoncodec.unpack_embedding(value.pop(_STORED_EMBEDDING))
+    except ValueError as e:
+        logger.warning(f"[VOX CACHE] повреждённый embedding в хранилище: {e}")
+    return value
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "size")
+
+    def __init__(self, value: Any, fetched_at: float, size: int):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.size = size
+
+
+class AnalyticsCache:
+    """
+    Кэш отчётов ai_analytics со stale-while-revalidate.
+
+    Память ограничена max_bytes (LRU), второй уровень - store с тем же
+    интерфейсом, что и у UserIdCache. Запись моложе fresh_ttl отдаётся
+    как есть; старше - отдаётся сразу, а в фоне запускается обновление
+    (не дольше max_stale, после чего ждём VOX синхронно). Обновлённый
+    отчёт заменяет закэшированный, только если его (date, version) не старше.
+    """
+
+    def __init__(
+        self,
+        store=None,
+        max_bytes: int = 64 * 1024 * 1024,
+        fresh_ttl: float = 6 * 3600.0,
+        max_stale: float = 7 * 24 * 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self.counters = CacheStats()
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.store_hits = 0
+        self.store_errors = 0
+        self._clock = clock
+        self._bytes = 0
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: dict = {}
+
+    @staticmethod
+    def _store_key(key: Tuple) -> str:
+        return ":".join(str(part) for part in key)
+
+    def _put_local(self, key: Hashable, value: Any, fetched_at: float) -> None:
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        entry = _Entry(value, fetched_at, _approx_size(value))
+        self._data[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and len(self._data) > 1:
+            _, evicted = self._data.popitem(last=False)
+            self._bytes -= evicted.size
+            self.counters.evictions += 1
+
+    async def _lookup(self, key: Tuple) -> Optional[_Entry]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+            return entry
+        if self.store is None:
+            return None
+        try:
+            stored = await self.store.get(self._store_key(key))
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"[VOX CACHE] store.get({key}) failed: {e}")
+            return None
+        if stored is None or stored[0] is None:
+            return None
+        self.store_hits += 1
+        self._put_local(key, _from_store(stored[0]), stored[1])
+        return self._data[key]
+
+    async def put(self, key: Tuple, value: Any) -> Any:
+        """Сохраняет ответ, если он не старше уже закэшированного."""
+        current = self._data.get(key)
+        if current is not None and _report_freshness(value) < _report_freshness(
+            current.value
+        ):
+            logger.warning(f"[VOX CACHE] VOX вернул более старый отчёт для {key}")
+            return current.value
+        if current is not None and _report_freshness(value) != _report_freshness(
+            current.value
+        ):
+            logger.info(f"[VOX CACHE] отчёт {key} обновлён VOX")
+        elif (
+            current is not None
+            and isinstance(value, dict)
+            and "embedding" not in value
+            and isinstance(current.value, dict)
+            and "embedding" in current.value
+        ):
+            # Тот же отчёт, запрошенный без embedding: уже полученный не теряем
+            value = dict(value, embedding=current.value["embedding"])
+        self._put_local(key, value, self._clock())
+        if self.store is not None:
+            try:
+                await self.store.set(self._store_key(key), _to_store(value))
+            except Exception as e:
+                self.store_errors += 1
+                logger.warning(f"[VOX CACHE] store.set({key}) failed: {e}")
+        return value
+
+    async def get_or_fetch(
+        self, key: Tuple, fetch: Callable, accept: Optional[Callable] = None
+    ) -> Any:
+        """
+        fetch - корутинная функция без аргументов, идущая в VOX;
+        accept(value) -> False - запись не подходит (например, в ней нет
+        embedding), считаем промахом.
+        """
+        entry = await self._lookup(key)
+        if entry is not None and accept is not None and not accept(entry.value):
+            entry = None
+        if entry is None:
+            self.counters.misses += 1
+            return await self.put(key, await fetch())
+        age = self._clock() - entry.fetched_at
+        if age < self.fresh_ttl:
+            self.counters.hits += 1
+            return entry.value
+        if age < self.max_stale:
+            self.stale_hits += 1
+            self._schedule_refresh(key, fetch)
+            return entry.value
+        self.counters.expirations += 1
+        return await self.put(key, await fetch())
+
+    def _schedule_refresh(self, key: Tuple, fetch: Callable) -> None:
+        if key in self._refreshing:
+            return
+        task = asyncio.ensure_future(self._refresh(key, fetch))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: Tuple, fetch: Callable) -> None:
+        self.refreshes += 1
+        try:
+            # Задача наследует контекст вызывающего; пользователь уже получил
+            # ответ из кэша, и обновление не должно отнимать у него слоты
+            with vox_priority(Priority.BACKGROUND):
+                value = await fetch()
+            await self.put(key, value)
+        except Exception as e:
+            self.refresh_errors += 1
+            logger.warning(f"[VOX CACHE] фоновое обновление {key} не удалось: {e}")
+
+    def invalidate(self, key: Tuple) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def stats(self) -> dict:
+        stats = self.counters.as_dict()
+        stats.update(
+            stale_hits=self.stale_hits,
+            refreshes=self.refreshes,
+            refresh_errors=self.refresh_errors,
+            store_hits=self.store_hits,
+            store_errors=self.store_errors,
+            size=len(self._data),
+            bytes=self._bytes,
+        )
+        return stats
@@ -26,3 +26,11 @@ class NotFoundError(ApiError):
 
 class ServerError(ApiError):
     """Ошибка сервера (5xx)."""
+
+
+class CircuitOpenError(ServerError):
+    """VOX временно недоступен: circuit breaker эндпоинта открыт."""
+
+
+class RateLimitError(ApiError):
+    """Слишком много запросов (429)."""
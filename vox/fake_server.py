@@ -0,0 +1,458 @@
+"""
+Локальный стенд VOX API для нагрузочных прогонов и бенчмарков.
+
+Маршруты и формы ответов берутся из vox/openapi.json: на каждый путь
+генерируется синтетический ответ по схеме. Задержки, доля ошибок
+(401/404/422/429/5xx), размер отчётов и списков, размерность эмбеддинга
+настраиваются; с --record ответы настоящего VOX сохраняются как фикстуры,
+с --replay отдаются из них.
+
+    python -m vox.fake_server --port 8081 --latency lognormal:0.15:0.6 \\
+        --error 500=0.02 --error 404=0.01 --embedding-dim 1536
+
+    AsyncVoxAPI(token="test", base_url="http://127.0.0.1:8081")
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import string
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+SPEC_PATH = os.path.join(os.path.dirname(__file__), "openapi.json")
+
+ERROR_BODIES = {
+    401: {"detail": "Not authenticated"},
+    403: {"detail": "Forbidden"},
+    404: {"detail": "Not Found"},
+    429: {"detail": "Too Many Requests"},
+}
+
+
+class Latency:
+    """
+    Распределение задержки ответа, задаётся строкой:
+    const:0.1, uniform:0.05:0.3, normal:0.2:0.05, lognormal:<медиана>:<sigma>.
+    """
+
+    def __init__(self, spec: str = "const:0"):
+        kind, *args = spec.split(":")
+        if kind not in ("const", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.args = [float(a) for a in args]
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "const":
+            return self.args[0] if self.args else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(*self.args)
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(*self.args))
+        median, sigma = self.args
+        return median * rng.lognormvariate(0.0, sigma)
+
+
+class FakeConfig:
+    """Параметры стенда; endpoint_latency - по шаблону пути из openapi.json."""
+
+    def __init__(
+        self,
+        latency: str = "const:0",
+        endpoint_latency: Optional[Dict[str, str]] = None,
+        error_rates: Optional[Dict[int, float]] = None,
+        report_chars: int = 2000,
+        list_items: int = 20,
+        embedding_dim: int = 1536,
+        token: Optional[str] = None,
+        seed: Optional[int] = None,
+        record_dir: Optional[str] = None,
+        upstream: Optional[str] = None,
+        replay_dir: Optional[str] = None,
+    ):
+        self.latency = Latency(latency)
+        self.endpoint_latency = {
+            path: Latency(spec) for path, spec in (endpoint_latency or {}).items()
+        }
+        self.error_rates = error_rates or {}
+        self.report_chars = report_chars
+        self.list_items = list_items
+        self.embedding_dim = embedding_dim
+        self.token = token
+        self.seed = seed
+        self.record_dir = record_dir
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.replay_dir = replay_dir
+        if record_dir and not upstream:
+            raise ValueError("record mode requires an upstream URL")
+
+
+class SchemaFaker:
+    """Генератор значений по JSON-схемам из components.schemas."""
+
+    def __init__(self, spec: dict, config: FakeConfig, rng: random.Random):
+        self.schemas = spec.get("components", {}).get("schemas", {})
+        self.config = config
+        self.rng = rng
+
+    def resolve(self, schema: dict) -> dict:
+        while "$ref" in schema:
+            schema = self.schemas[schema["$ref"].rsplit("/", 1)[-1]]
+        return schema
+
+    def generate(
+        self, schema: dict, name: str = "", context: Optional[dict] = None
+    ) -> Any:
+        context = context or {}
+        schema = self.resolve(schema)
+        for key in ("anyOf", "oneOf", "allOf"):
+            if key in schema:
+                # Первый непустой вариант: AIAnalytics, а не EmptyResponse/null
+                options = [self.resolve(s) for s in schema[key]]
+                options = [s for s in options if s.get("type") != "null"] or options
+                options.sort(key=lambda s: not s.get("properties"))
+                return self.generate(options[0], name, context)
+        if "enum" in schema:
+            if context.get(name) in schema["enum"]:
+                return context[name]
+            return self.rng.choice(schema["enum"])
+
+        kind = schema.get("type")
+        if kind == "object" or "properties" in schema:
+            # id из пути подставляем только в поля верхнего уровня
+            return {
+                prop: self.generate(sub, prop, context if self._scalar(sub) else None)
+                for prop, sub in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            if name == "embedding":
+                return [
+                    round(self.rng.uniform(-1, 1), 6)
+                    for _ in range(self.config.embedding_dim)
+                ]
+            low = schema.get("minItems", 0)
+            high = schema.get("maxItems", max(low, self.config.list_items))
+            count = max(low, min(high, self.config.list_items))
+            items = schema.get("items", {})
+            return [self.generate(items, "", None) for _ in range(count)]
+        if kind == "string":
+            return self._string(schema, name)
+        if kind == "integer":
+            if name in context:
+                return context[name]
+            if name == "id" and "id" in context:
+                return context["id"]
+            return self.rng.randint(1, 10**9)
+        if kind == "number":
+            return round(self.rng.random(), 4)
+        if kind == "boolean":
+            return self.rng.random() < 0.5
+        return None
+
+    def _scalar(self, schema: dict) -> bool:
+        return self.resolve(schema).get("type") in (
+            "integer",
+            "number",
+            "string",
+            "boolean",
+        )
+
+    def _string(self, schema: dict, name: str) -> str:
+        fmt = schema.get("format")
+        if fmt == "date-time":
+            return datetime.now(timezone.utc).isoformat()
+        if fmt == "date":
+            return date.today().isoformat()
+        length = self.config.report_chars if name in ("report", "text", "about") else 12
+        alphabet = string.ascii_lowercase + " "
+        return "".join(self.rng.choice(alphabet) for _ in range(length))
+
+
+def _route_order(path: str) -> tuple:
+    # Литеральные сегменты раньше параметров:
+    # /ai_analytics/custom/{subject}/{subject_id} раньше /ai_analytics/{subject}/{subject_id}
+    return tuple(segment.startswith("{") for segment in path.strip("/").split("/"))
+
+
+def _fixture_name(method: str, path: str, query: str) -> str:
+    digest = hashlib.sha1(f"{method} {path}?{query}".encode()).hexdigest()
+    return f"{digest}.json"
+
+
+class FakeVoxServer:
+    """aiohttp-приложение стенда и его счётчики (GET /__stats)."""
+
+    def __init__(self, config: Optional[FakeConfig] = None, spec_path: str = SPEC_PATH):
+        self.config = config or FakeConfig()
+        with open(spec_path, encoding="utf-8") as f:
+            self.spec = json.load(f)
+        self.rng = random.Random(self.config.seed)
+        self.faker = SchemaFaker(self.spec, self.config, self.rng)
+        self.requests: Counter = Counter()
+        self.responses: Counter = Counter()
+        self.replayed = 0
+        self.recorded = 0
+        self._upstream: Optional[aiohttp.ClientSession] = None
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/__stats", self._stats)
+        for path in sorted(self.spec["paths"], key=_route_order):
+            for method, operation in self.spec["paths"][path].items():
+                app.router.add_route(
+                    method.upper(), path, self._handler(path, operation)
+                )
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app) -> None:
+        if self.config.upstream:
+            self._upstream = aiohttp.ClientSession()
+
+    async def _on_cleanup(self, app) -> None:
+        if self._upstream is not None:
+            await self._upstream.close()
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "requests": dict(self.requests),
+                "responses": {str(k): v for k, v in self.responses.items()},
+                "replayed": self.replayed,
+                "recorded": self.recorded,
+            }
+        )
+
+    def _handler(self, template: str, operation: dict):
+        async def handle(request: web.Request) -> web.Response:
+            self.requests[template] += 1
+            latency = self.config.endpoint_latency.get(template, self.config.latency)
+            delay = latency.sample(self.rng)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            status, body = await self._respond(request, template, operation)
+            self.responses[status] += 1
+            return web.Response(
+                status=status,
+                body=body if isinstance(body, bytes) else json.dumps(body).encode(),
+                content_type="application/json",
+            )
+
+        return handle
+
+    async def _respond(
+        self, request: web.Request, template: str, operation: dict
+    ) -> Tuple[int, Any]:
+        token = self.config.token
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return 401, ERROR_BODIES[401]
+        if self.config.record_dir:
+            return await self._record(request)
+        if self.config.replay_dir:
+            fixture = self._load_fixture(request)
+            if fixture is not None:
+                self.replayed += 1
+                return fixture["status"], fixture["body"].encode()
+
+        context, errors = self._parse_params(request, operation)
+        if errors:
+            return 422, {"detail": errors}
+        injected = self._injected_error()
+        if injected is not None:
+            body = ERROR_BODIES.get(injected, {"detail": "Internal Server Error"})
+            return injected, body
+        schema = (
+            operation.get("responses", {})
+            .get("200", {})
+            .get("content", {})
+            .get("application/json", {})
+            .get("schema", {})
+        )
+        if template == "/ping":
+            return 200, "pong"
+        return 200, self.faker.generate(schema, context=context)
+
+    def _injected_error(self) -> Optional[int]:
+        roll = self.rng.random()
+        for status, rate in self.config.error_rates.items():
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def _parse_params(self, request: web.Request, operation: dict) -> Tuple[dict, list]:
+        """Проверка параметров как у FastAPI: неверный тип/нет обязательного -> 422."""
+        context, errors = {}, []
+        for param in operation.get("parameters", []):
+            name, where = param["name"], param["in"]
+            source = request.match_info if where == "path" else request.query
+            raw = source.get(name)
+            if raw is None:
+                if param.get("required"):
+                    errors.append(
+                        {
+                            "loc": [where, name],
+                            "msg": "Field required",
+                            "type": "missing",
+                        }
+                    )
+                continue
+            schema = self.faker.resolve(param.get("schema", {}))
+            if schema.get("type") == "integer":
+                try:
+                    context[name] = int(raw)
+                except ValueError:
+                    errors.append(
+                        {
+                            "loc": [where, name],
+                            "msg": "Input should be a valid integer",
+                            "type": "int_parsing",
+                        }
+                    )
+            elif "enum" in schema and raw not in schema["enum"]:
+                errors.append(
+                    {
+                        "loc": [where, name],
+                        "msg": "Input should be one of the enum values",
+                        "type": "enum",
+                    }
+                )
+            else:
+                context[name] = raw
+        # id и type в ответе совпадают с путём (user_id, subject_id, group_id, subject)
+        for key in ("subject_id", "user_id", "group_id"):
+            if isinstance(context.get(key), int):
+                context.setdefault("id", context[key])
+        if "subject" in context:
+            context["type"] = context["subject"]
+        return context, errors
+
+    def _fixture_path(self, directory: str, request: web.Request) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query.items()))
+        return os.path.join(
+            directory, _fixture_name(request.method, request.path, query)
+        )
+
+    def _load_fixture(self, request: web.Request) -> Optional[dict]:
+        path = self._fixture_path(self.config.replay_dir, request)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    async def _record(self, request: web.Request) -> Tuple[int, bytes]:
+        headers = {"Accept": "application/json"}
+        if "Authorization" in request.headers:
+            headers["Authorization"] = request.headers["Authorization"]
+        async with self._upstream.request(
+            request.method,
+            f"{self.config.upstream}{request.path}",
+            params=request.query,
+            headers=headers,
+        ) as resp:
+            body = await resp.read()
+            status = resp.status
+        os.makedirs(self.config.record_dir, exist_ok=True)
+        fixture = {
+            "method": request.method,
+            "path": request.path,
+            "query": dict(request.query),
+            "status": status,
+            "body": body.decode("utf-8", "replace"),
+        }
+        path = self._fixture_path(self.config.record_dir, request)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, ensure_ascii=False)
+        self.recorded += 1
+        return status, body
+
+
+async def start_fake_server(
+    config: Optional[FakeConfig] = None, host: str = "127.0.0.1", port: int = 0
+) -> Tuple[web.AppRunner, str]:
+    """
+    Запускает стенд в текущем event loop (port=0 - свободный порт).
+    Возвращает runner (await runner.cleanup() для остановки) и base_url.
+    """
+    runner = web.AppRunner(FakeVoxServer(config).make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_host, bound_port = runner.addresses[0][:2]
+    return runner, f"http://{bound_host}:{bound_port}"
+
+
+def _pair(value: str) -> Tuple[str, str]:
+    key, _, rest = value.partition("=")
+    if not rest:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {value!r}")
+    return key, rest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local VOX API stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument(
+        "--latency",
+        default="const:0",
+        help="const:S, uniform:A:B, normal:MU:SD, lognormal:MEDIAN:SIGMA",
+    )
+    parser.add_argument(
+        "--endpoint-latency",
+        type=_pair,
+        action="append",
+        default=[],
+        help="TEMPLATE=SPEC, e.g. /ai_analytics/custom/{subject}/{subject_id}=lognormal:3:0.4",
+    )
+    parser.add_argument(
+        "--error",
+        type=_pair,
+        action="append",
+        default=[],
+        help="STATUS=RATE, e.g. 500=0.02 (401/404/422/429/5xx)",
+    )
+    parser.add_argument("--report-chars", type=int, default=2000)
+    parser.add_argument("--list-items", type=int, default=20)
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument("--token", help="require this bearer token (otherwise 401)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--record", metavar="DIR", help="proxy to --upstream and save fixtures to DIR"
+    )
+    parser.add_argument("--upstream", help="real VOX base URL for --record")
+    parser.add_argument("--replay", metavar="DIR", help="serve saved fixtures from DIR")
+    args = parser.parse_args(argv)
+
+    config = FakeConfig(
+        latency=args.latency,
+        endpoint_latency=dict(args.endpoint_latency),
+        error_rates={int(status): float(rate) for status, rate in args.error},
+        report_chars=args.report_chars,
+        list_items=args.list_items,
+        embedding_dim=args.embedding_dim,
+        token=args.token,
+        seed=args.seed,
+        record_dir=args.record,
+        upstream=args.upstream,
+        replay_dir=args.replay,
+    )
+    logger.info(f"[FAKE VOX] http://{args.host}:{args.port} latency={args.latency}")
+    web.run_app(
+        FakeVoxServer(config).make_app(), host=args.host, port=args.port, print=None
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any, Dict, Iterable, Optional, Set
+
+from loguru import logger
+
+from .cache import TieredCache, TTLCache, normalize_alias
+from .limiter import Priority, vox_priority
+
+
+class IdentityIndex(TieredCache):
+    """
+    Индекс алиасов: любой известный ник пользователя -> канонический VOX id.
+
+    Заполняется лениво: после каждого разрешения ника через VOX в фоне
+    запрашивается get_user_names(id), и все исторические алиасы
+    пользователя попадают в индекс. Ники в Telegram освобождаются и
+    переходят к другим людям, поэтому индекс - только запасной ответ,
+    когда VOX недоступен; ответ VOX перезаписывает алиас.
+    Второй уровень - общее хранилище (db.VoxCache.VoxCacheStore).
+    """
+
+    log_tag = "[VOX IDENTITY]"
+
+    def __init__(
+        self,
+        store=None,
+        ttl: float = 7 * 24 * 3600.0,
+        maxsize: int = 100_000,
+    ):
+        super().__init__(TTLCache(maxsize=maxsize, ttl=ttl), store)
+        self.ttl = ttl
+        self.learned = 0
+        self._known: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _lifetime(self, user_id: Optional[int], age: float) -> float:
+        return self.ttl - age if user_id is not None else 0
+
+    async def lookup(self, username: str) -> Optional[int]:
+        return await self._load(normalize_alias(username), self._lifetime)
+
+    async def remember(self, user_id: int, aliases: Iterable[str]) -> None:
+        """Привязывает алиасы к user_id (в памяти и в хранилище)."""
+        for alias in aliases:
+            key = normalize_alias(alias)
+            if not key or self.local.get(key) == user_id:
+                continue
+            self.learned += 1
+            await self._save(key, user_id)
+
+    async def forget(self, username: str) -> None:
+        """Убирает алиас: VOX ответил 404, ник освобождён или переименован."""
+        await self._drop(normalize_alias(username))
+
+    def learn(self, vox, user_id: int) -> None:
+        """
+        Фоновая загрузка всех алиасов user_id через vox.get_user_names;
+        для каждого id - один раз за жизнь процесса.
+        """
+        if user_id in self._known:
+            return
+        self._known.add(user_id)
+        task = asyncio.ensure_future(self._learn(vox, user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _learn(self, vox, user_id: int) -> None:
+        try:
+            # Дозагрузка алиасов не должна отнимать слоты у интерактивных запросов
+            with vox_priority(Priority.BACKGROUND):
+                names = await vox.get_user_names(user_id)
+        except Exception as e:
+            # Попробуем снова при следующем разрешении этого id
+            self._known.discard(user_id)
+            logger.warning(f"[VOX IDENTITY] get_user_names({user_id}) failed: {e}")
+            return
+        await self.remember(user_id, _aliases(names))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["learned"] = self.learned
+        return stats
+
+
+def _aliases(names) -> Iterable[str]:
+    for item in names or []:
+        alias = item.get("alias") if hasattr(item, "get") else None
+        if alias:
+            yield alias
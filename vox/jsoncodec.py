@@ -0,0 +1,145 @@
+"""Быстрый JSON-декодер: orjson, если установлен, иначе стандартный json."""
+
+import base64
+import json
+import re
+import sys
+from array import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy необязателен
+    numpy = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(data):
+    """Принимает bytes или str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+JSONDecodeError = (
+    (orjson.JSONDecodeError, ValueError) if orjson is not None else ValueError
+)
+
+
+def decode_report(response):
+    """
+    custom_report возвращает {"report": "<JSON-строка>"}: разбираем
+    вложенный JSON один раз и кладём результат в response["report_data"]
+    (None, если строка - не JSON).
+    """
+    if isinstance(response, dict) and isinstance(response.get("report"), str):
+        try:
+            response["report_data"] = loads(response["report"])
+        except JSONDecodeError:
+            response["report_data"] = None
+    return response
+
+
+_EMBEDDING_FIELD = re.compile(rb'"embedding"\s*:\s*\[')
+
+
+def split_embedding(body: bytes):
+    """
+    Вырезает массив "embedding" из тела ответа ai_analytics, не разбирая
+    числа. Возвращает (тело без массива, сырые байты массива или None).
+    Внутри JSON-строк кавычки экранированы, поэтому ключ ищется надёжно,
+    а в массиве чисел не бывает символа "]".
+    """
+    match = _EMBEDDING_FIELD.search(body)
+    if match is None:
+        return body, None
+    end = body.find(b"]", match.end())
+    if end == -1:
+        return body, None
+    raw = body[match.end() : end]
+    return body[: match.start()] + b'"embedding":null' + body[end + 1 :], raw
+
+
+def parse_embedding(raw: bytes):
+    """
+    Компактный float32-буфер: numpy.ndarray, если есть numpy, иначе array('f').
+    Некорректное число в массиве - ValueError (а не частичный буфер).
+    """
+    raw = raw.strip()
+    items = raw.split(b",") if raw else []
+    if numpy is not None:
+        return numpy.array(
+            [item.decode("ascii") for item in items], dtype=numpy.float32
+        )
+    return array("f", map(float, items))
+
+
+def pack_embedding(embedding) -> str:
+    """float32-буфер -> base64 (little-endian) для JSON-хранилища."""
+    if numpy is not None:
+        data = numpy.asarray(embedding, dtype="<f4").tobytes()
+    else:
+        buffer = array("f", embedding)
+        if sys.byteorder != "little":
+            buffer.byteswap()
+        data = buffer.tobytes()
+    return base64.b64encode(data).decode("ascii")
+
+
+def unpack_embedding(packed: str):
+    """Обратное к pack_embedding: тот же тип буфера, что и parse_embedding."""
+    data = base64.b64decode(packed)
+    if numpy is not None:
+        return numpy.frombuffer(data, dtype="<f4").astype(numpy.float32)
+    buffer = array("f")
+    buffer.frombytes(data)
+    if sys.byteorder != "little":
+        buffer.byteswap()
+    return buffer
+
+
+def decode_analytics(body: bytes, with_embedding: bool = False):
+    """
+    Разбор ответа ai_analytics без материализации embedding в список
+    Python float. with_embedding=True - embedding возвращается float32-буфером
+    (None, если у VOX его нет: ключ есть всегда, кэш отличает "нет эмбеддинга"
+    от "не запрашивали").
+    """
+    stripped, raw = split_embedding(body)
+    embedding = None
+    if with_embedding and raw is not None:
+        try:
+            embedding = parse_embedding(raw)
+        except (ValueError, UnicodeDecodeError):
+            # Быстрый путь не справился - разбираем ответ целиком
+            return _decode_analytics_slow(body, with_embedding)
+    result = loads(stripped)
+    if isinstance(result, dict):
+        result.pop("embedding", None)
+        if with_embedding:
+            result["embedding"] = embedding
+    return result
+
+
+def _decode_analytics_slow(body: bytes, with_embedding: bool):
+    result = loads(body)
+    if not isinstance(result, dict):
+        return result
+    values = result.pop("embedding", None)
+    if with_embedding:
+        result["embedding"] = None
+    if with_embedding and isinstance(values, list):
+        try:
+            result["embedding"] = (
+                numpy.array(values, dtype=numpy.float32)
+                if numpy is not None
+                else array("f", map(float, values))
+            )
+        except (TypeError, ValueError):
+            pass
+    return result
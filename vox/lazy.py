@@ -0,0 +1,124 @@
+import typing
+from typing import Any, Dict, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+_MISSING = object()
+_adapters: Dict[Tuple[type, str], TypeAdapter] = {}
+
+
+def _nested_model(annotation) -> Tuple[str, Any]:
+    """('model', M) для M, ('list', M) для List[M], иначе ('', None)."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return "model", annotation
+    if typing.get_origin(annotation) in (list, typing.List):
+        args = typing.get_args(annotation)
+        if args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
+            return "list", args[0]
+    return "", None
+
+
+def _adapter(model: Type[BaseModel], name: str) -> TypeAdapter:
+    key = (model, name)
+    adapter = _adapters.get(key)
+    if adapter is None:
+        adapter = _adapters[key] = TypeAdapter(model.model_fields[name].annotation)
+    return adapter
+
+
+class LazyModel:
+    """
+    Лёгкая обёртка над dict-ответом VOX с типами pydantic-модели.
+
+    Поле валидируется (через TypeAdapter своей аннотации) только при первом
+    обращении и запоминается; вложенные модели и списки моделей тоже
+    оборачиваются лениво. trusted=True - как model_construct: значения
+    отдаются без проверки. Поддерживает и доступ как к dict (obj["id"],
+    obj.get("report"), "report" in obj), чтобы подменять сырые ответы.
+    """
+
+    __slots__ = ("_model", "_data", "_values", "_trusted")
+
+    def __init__(self, model: Type[BaseModel], data: dict, trusted: bool = False):
+        self._model = model
+        self._data = data
+        self._values: Dict[str, Any] = {}
+        self._trusted = trusted
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        values = self._values
+        if name in values:
+            return values[name]
+        field = self._model.model_fields.get(name)
+        if field is None:
+            raise AttributeError(f"{self._model.__name__} has no field {name!r}")
+        raw = self._data.get(name, _MISSING)
+        if raw is _MISSING:
+            if field.is_required():
+                raise AttributeError(
+                    f"{self._model.__name__}.{name} is missing in the response"
+                )
+            value = field.get_default(call_default_factory=True)
+        else:
+            value = self._convert(name, field.annotation, raw)
+        values[name] = value
+        return value
+
+    def _convert(self, name: str, annotation, raw: Any) -> Any:
+        kind, nested = _nested_model(annotation)
+        if kind == "model" and isinstance(raw, dict):
+            return LazyModel(nested, raw, self._trusted)
+        if kind == "list" and isinstance(raw, list):
+            return [
+                (
+                    LazyModel(nested, item, self._trusted)
+                    if isinstance(item, dict)
+                    else item
+                )
+                for item in raw
+            ]
+        # Компактные буферы (embedding как numpy/array) отдаём как есть
+        if self._trusted or hasattr(raw, "itemsize"):
+            return raw
+        return _adapter(self._model, name).validate_python(raw)
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            if name in self._data:
+                return self._data[name]
+            raise KeyError(name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._data
+
+    @property
+    def raw(self) -> dict:
+        return self._data
+
+    def validate(self) -> BaseModel:
+        """Полная валидация ответа в pydantic-модель."""
+        return self._model.model_validate(self._data)
+
+    def __repr__(self) -> str:
+        return f"Lazy{self._model.__name__}({self._data!r})"
+
+
+def wrap(value: Any, model: Type[BaseModel], trusted: bool = False) -> Any:
+    """Оборачивает ответ (dict или список dict) в LazyModel."""
+    if isinstance(value, dict):
+        return LazyModel(model, value, trusted)
+    if isinstance(value, list):
+        return [
+            LazyModel(model, v, trusted) if isinstance(v, dict) else v for v in value
+        ]
+    return value
@@ -0,0 +1,163 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Callable, Optional
+
+from loguru import logger
+
+from .metrics import Summaries
+
+
+class Priority(IntEnum):
+    """Лейны запросов к VOX: меньшее значение обслуживается раньше."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_priority: ContextVar = ContextVar("vox_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+@contextmanager
+def vox_priority(priority: Priority):
+    """
+    Все запросы к VOX внутри блока (и в созданных в нём задачах) идут
+    в указанном лейне, например рассылка - в Priority.BACKGROUND.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD-ограничитель числа одновременных запросов к VOX.
+
+    Окно растёт на 1/limit за каждый успешный быстрый ответ и умножается
+    на backoff при 429/5xx/таймауте или задержке выше latency_target
+    (не чаще раза в cooldown секунд). Ожидающие обслуживаются по
+    приоритету; фоновый лейн занимает не больше background_share окна,
+    чтобы интерактивным запросам всегда оставалось место.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 16,
+        min_limit: float = 2,
+        max_limit: float = 128,
+        latency_target: float = 8.0,
+        backoff: float = 0.7,
+        cooldown: float = 1.0,
+        background_share: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.background_share = background_share
+        self.wait_time = Summaries()
+        self._clock = clock
+        self._last_decrease = float("-inf")
+        self._inflight = {p: 0 for p in Priority}
+        self._queue: list = []
+        self._seq = itertools.count()
+
+    @property
+    def inflight(self) -> int:
+        return sum(self._inflight.values())
+
+    def _has_room(self, priority: Priority) -> bool:
+        limit = max(1, int(self.limit))
+        if self.inflight >= limit:
+            return False
+        if priority == Priority.BACKGROUND:
+            return self._inflight[priority] < max(1, int(limit * self.background_share))
+        return True
+
+    def try_acquire(self, priority: Priority = Priority.INTERACTIVE) -> bool:
+        """Слот без ожидания (для дополнительных запросов вроде hedging)."""
+        if self._queue or not self._has_room(priority):
+            return False
+        self._inflight[priority] += 1
+        return True
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        started = self._clock()
+        if not self._queue and self._has_room(priority):
+            self._inflight[priority] += 1
+            self.wait_time.observe(priority.name, 0.0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Слот уже выдан, но ожидающий ушёл - возвращаем его
+                self._inflight[priority] -= 1
+                self._wake()
+            raise
+        self.wait_time.observe(priority.name, self._clock() - started)
+
+    def release(
+        self,
+        priority: Priority,
+        latency: Optional[float],
+        overloaded: bool = False,
+        sample: bool = True,
+    ) -> None:
+        """
+        latency=None - задержку не учитываем (долгая генерация LLM);
+        sample=False - только освободить слот, окно не меняется.
+        """
+        self._inflight[priority] -= 1
+        if not sample:
+            self._wake()
+            return
+        now = self._clock()
+        if overloaded or (latency is not None and latency > self.latency_target):
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                old = self.limit
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                logger.info(
+                    f"[VOX LIMITER] окно {old:.1f} -> {self.limit:.1f} "
+                    f"(latency={latency}, overloaded={overloaded})"
+                )
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._queue:
+            priority, _, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            if not self._has_room(priority):
+                return
+            heapq.heappop(self._queue)
+            self._inflight[priority] += 1
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": {p.name: n for p, n in self._inflight.items()},
+            "queued": sum(1 for *_, f in self._queue if not f.done()),
+            "wait_time": self.wait_time.as_dict(),
+        }
@@ -0,0 +1,64 @@
+from collections import deque
+from typing import Dict, Hashable
+
+
+class Summary:
+    """
+    Сводка по наблюдаемой величине (задержки, размеры): count/avg/max
+    за всё время и перцентили по последним window значениям.
+    """
+
+    __slots__ = ("count", "total", "max", "_window")
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._window = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        self._window.append(value)
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """q от 0 до 100; 0.0, если наблюдений ещё не было."""
+        if not self._window:
+            return 0.0
+        values = sorted(self._window)
+        index = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+        return values[index]
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.avg, 4),
+            "p95": round(self.percentile(95), 4),
+            "max": round(self.max, 4),
+        }
+
+
+class Summaries:
+    """Набор Summary по ключу (эндпоинт, лейн, стадия и т.п.)."""
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._items: Dict[Hashable, Summary] = {}
+
+    def __getitem__(self, key: Hashable) -> Summary:
+        summary = self._items.get(key)
+        if summary is None:
+            summary = self._items[key] = Summary(self.window)
+        return summary
+
+    def observe(self, key: Hashable, value: float) -> None:
+        self[key].observe(value)
+
+    def as_dict(self) -> dict:
+        return {str(key): s.as_dict() for key, s in self._items.items()}
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+
+async def paginate(
+    fetch_page: Callable[[int, int], Awaitable[Any]],
+    page_size: int = 100,
+    max_items: Optional[int] = None,
+    extract: Callable[[Any], List[Any]] = lambda page: page or [],
+) -> AsyncIterator[Any]:
+    """
+    Постраничный обход limit/offset-эндпоинта.
+
+    fetch_page(offset, limit) возвращает страницу, extract достаёт из неё
+    список элементов. Следующая страница запрашивается сразу после
+    получения текущей, пока потребитель обрабатывает её элементы. Обход
+    заканчивается на неполной странице или после max_items элементов;
+    в памяти одновременно не больше двух страниц.
+    """
+
+    def next_limit(fetched: int) -> int:
+        if max_items is None:
+            return page_size
+        return min(page_size, max_items - fetched)
+
+    fetched = 0
+    limit = next_limit(0)
+    pending = asyncio.ensure_future(fetch_page(0, limit)) if limit > 0 else None
+    try:
+        while pending is not None:
+            # Сервер может вернуть больше limit - лишнее не отдаём
+            items = extract(await pending)[:limit]
+            pending = None
+            fetched += len(items)
+            if len(items) >= limit and next_limit(fetched) > 0:
+                limit = next_limit(fetched)
+                pending = asyncio.ensure_future(fetch_page(fetched, limit))
+            for item in items:
+                yield item
+    finally:
+        if pending is not None:
+            pending.cancel()
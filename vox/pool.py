@@ -0,0 +1,83 @@
+from typing import Optional
+
+import aiohttp
+
+
+class PoolConfig:
+    """
+    Настройки пула соединений и таймаутов aiohttp-сессии AsyncVoxAPI.
+
+    limit / limit_per_host - максимум одновременных соединений всего и
+    к одному хосту (0 - без ограничения), keepalive_timeout - сколько
+    держать простаивающее соединение, ttl_dns_cache - время жизни
+    DNS-кэша в секундах (None - бессрочно). Таймауты в секундах;
+    total_timeout - верхняя граница таймаута любой попытки запроса
+    (попытка, генерация, остаток бюджета повторов), None - без границы.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 50,
+        keepalive_timeout: float = 30.0,
+        use_dns_cache: bool = True,
+        ttl_dns_cache: Optional[int] = 300,
+        connect_timeout: float = 5.0,
+        sock_read_timeout: float = 30.0,
+        total_timeout: Optional[float] = None,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.use_dns_cache = use_dns_cache
+        self.ttl_dns_cache = ttl_dns_cache
+        self.connect_timeout = connect_timeout
+        self.sock_read_timeout = sock_read_timeout
+        self.total_timeout = total_timeout
+
+    def connector(self) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=self.use_dns_cache,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+
+    def timeout(
+        self, total: Optional[float] = None, sock_read: Optional[float] = None
+    ) -> aiohttp.ClientTimeout:
+        """
+        total - общий таймаут (например, на одну попытку); он не может
+        превысить total_timeout. sock_read переопределяет sock_read_timeout
+        (генерация LLM молчит, пока не готов весь ответ).
+        """
+        if total is None or (
+            self.total_timeout is not None and total > self.total_timeout
+        ):
+            total = self.total_timeout
+        return aiohttp.ClientTimeout(
+            total=total,
+            connect=self.connect_timeout,
+            sock_read=sock_read if sock_read is not None else self.sock_read_timeout,
+        )
+
+
+def pool_stats(connector: Optional[aiohttp.BaseConnector]) -> dict:
+    """
+    Текущее состояние пула: занятые соединения, простаивающие и число
+    корутин, ждущих свободного соединения (признак слишком малого limit).
+    """
+    if connector is None:
+        return {}
+    # У aiohttp нет публичного API для этих счётчиков
+    acquired = getattr(connector, "_acquired", ())
+    waiters = getattr(connector, "_waiters", {})
+    conns = getattr(connector, "_conns", {})
+    return {
+        "limit": connector.limit,
+        "limit_per_host": connector.limit_per_host,
+        "acquired": len(acquired),
+        "waiting": sum(len(w) for w in waiters.values()),
+        "idle": sum(len(c) for c in conns.values()),
+    }
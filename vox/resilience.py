@@ -0,0 +1,183 @@
+import random
+import re
+import time
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class RetryPolicy:
+    """
+    Повторы запросов к VOX с экспоненциальной задержкой и full jitter.
+
+    attempts - общее число попыток (1 = без повторов),
+    attempt_timeout - таймаут одной попытки в секундах,
+    deadline - общий бюджет вызова на все попытки и паузы между ними
+    (None - без ограничения). Повтор не начинается, если после паузы
+    на попытку останется меньше min_attempt секунд.
+
+    Генерация текста (GENERATION_PATH_PREFIX) живёт по своим правилам:
+    одна попытка с таймаутом generation_timeout без общего бюджета -
+    повтор после таймаута заново запустил бы всю генерацию.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 2.0,
+        attempt_timeout: float = 15.0,
+        deadline: Optional[float] = 20.0,
+        min_attempt: float = 1.0,
+        generation_timeout: float = 120.0,
+    ):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.min_attempt = min_attempt
+        self.generation_timeout = generation_timeout
+
+    def delay(self, attempt: int) -> float:
+        """Задержка перед попыткой attempt + 1 (attempt считается с нуля)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def attempt_timeout_left(self, deadline_at: Optional[float], now: float) -> float:
+        """Таймаут очередной попытки с учётом оставшегося бюджета вызова."""
+        if deadline_at is None:
+            return self.attempt_timeout
+        return min(self.attempt_timeout, deadline_at - now)
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+StateListener = Callable[[str, BreakerState, BreakerState], None]
+
+
+class CircuitBreaker:
+    """
+    Автомат closed -> open -> half_open -> closed для одного эндпоинта.
+
+    После failure_threshold ошибок подряд breaker открывается на
+    recovery_timeout секунд, затем пропускает один пробный запрос.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        listeners: Optional[List[StateListener]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.listeners = listeners if listeners is not None else []
+        self.failures = 0
+        self.opened_count = 0
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._clock = clock
+
+    @property
+    def state(self) -> BreakerState:
+        if (
+            self._state == BreakerState.OPEN
+            and self._clock() - self._opened_at >= self.recovery_timeout
+        ):
+            self._set_state(BreakerState.HALF_OPEN)
+        return self._state
+
+    def is_open(self) -> bool:
+        return self.state == BreakerState.OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == BreakerState.CLOSED:
+            return True
+        if state == BreakerState.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Запрос отменён вызывающим: исход неизвестен, пробу освобождаем."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probe_in_flight = False
+        if self._state != BreakerState.CLOSED:
+            self._set_state(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self._state == BreakerState.HALF_OPEN or (
+            self._state == BreakerState.CLOSED
+            and self.failures >= self.failure_threshold
+        ):
+            self._opened_at = self._clock()
+            self.opened_count += 1
+            self._set_state(BreakerState.OPEN)
+
+    def _set_state(self, new: BreakerState) -> None:
+        old, self._state = self._state, new
+        logger.warning(f"[VOX BREAKER] {self.name}: {old.value} -> {new.value}")
+        for listener in self.listeners:
+            try:
+                listener(self.name, old, new)
+            except Exception as e:
+                logger.error(f"[VOX BREAKER] listener error: {e}")
+
+
+class CircuitBreakers:
+    """Набор breaker'ов по эндпоинтам с общими настройками."""
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.listeners: List[StateListener] = []
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def add_listener(self, listener: StateListener) -> None:
+        self.listeners.append(listener)
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                endpoint,
+                failure_threshold=self.failure_threshold,
+                recovery_timeout=self.recovery_timeout,
+                listeners=self.listeners,
+            )
+            self._breakers[endpoint] = breaker
+        return breaker
+
+    def is_open(self, endpoint: str) -> bool:
+        breaker = self._breakers.get(endpoint)
+        return breaker is not None and breaker.is_open()
+
+    def states(self) -> Dict[str, str]:
+        return {name: b.state.value for name, b in self._breakers.items()}
+
+
+_USERNAME_PATH = re.compile(r"^/users/username/[^/]+$")
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_of(path: str) -> str:
+    """Шаблон эндпоинта по пути запроса: /users/123/names -> /users/{id}/names."""
+    path = "/" + path.lstrip("/")
+    if _USERNAME_PATH.match(path):
+        return "/users/username/{username}"
+    return _NUMERIC_SEGMENT.sub("/{id}", path)
@@ -0,0 +1,158 @@
+import random
+import time
+from typing import Callable, Iterable, List, Optional
+
+from loguru import logger
+
+from .metrics import Summaries
+
+
+class BaseEndpoint:
+    """Один base URL VOX и его здоровье: EWMA задержки и доли ошибок."""
+
+    __slots__ = (
+        "url",
+        "latency",
+        "error_rate",
+        "inflight",
+        "requests",
+        "errors",
+        "last_used",
+    )
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.inflight = 0
+        self.requests = 0
+        self.errors = 0
+        self.last_used = float("-inf")
+
+    def as_dict(self) -> dict:
+        return {
+            "latency": round(self.latency, 4) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+class EndpointRouter:
+    """
+    Выбор base URL VOX для каждого запроса.
+
+    Запрос уходит на адрес с наименьшей оценкой
+    ewma_latency * (1 + error_penalty * ewma_error_rate) * (1 + inflight);
+    адрес без замеров выбирается первым. Адрес, на который не ходили
+    probe_interval секунд, получает один пробный запрос, чтобы заметить
+    восстановление. hedge_percentile (например 95) включает hedging:
+    если ответ не пришёл за этот перцентиль задержки эндпоинта, тот же
+    GET дублируется на следующий по здоровью адрес.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        alpha: float = 0.2,
+        error_penalty: float = 10.0,
+        probe_interval: float = 30.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.endpoints: List[BaseEndpoint] = [BaseEndpoint(url) for url in urls]
+        if not self.endpoints:
+            raise ValueError("EndpointRouter needs at least one base URL")
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.probe_interval = probe_interval
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = Summaries()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _score(self, endpoint: BaseEndpoint) -> float:
+        if endpoint.latency is None:
+            return -1.0
+        return (
+            endpoint.latency
+            * (1 + self.error_penalty * endpoint.error_rate)
+            * (1 + endpoint.inflight)
+        )
+
+    def pick(self, exclude: Iterable[BaseEndpoint] = ()) -> Optional[BaseEndpoint]:
+        candidates = [e for e in self.endpoints if e not in exclude]
+        if not candidates:
+            return None
+        now = self._clock()
+        stale = [e for e in candidates if now - e.last_used >= self.probe_interval]
+        if stale and len(candidates) > 1:
+            endpoint = random.choice(stale)
+        else:
+            endpoint = min(candidates, key=self._score)
+        endpoint.last_used = now
+        return endpoint
+
+    def started(self, endpoint: BaseEndpoint) -> None:
+        endpoint.inflight += 1
+        endpoint.requests += 1
+
+    def finished(
+        self,
+        endpoint: BaseEndpoint,
+        template: str,
+        latency: Optional[float],
+        failed: Optional[bool],
+    ) -> None:
+        """
+        latency=None - задержку не учитываем (генерация LLM);
+        failed=None - запрос отменён: доля ошибок не меняется, а latency
+        (сколько успели прождать) только поднимает EWMA медленного адреса.
+        """
+        endpoint.inflight -= 1
+        if failed is None:
+            if latency is not None and latency > (endpoint.latency or 0.0):
+                endpoint.latency = (endpoint.latency or 0.0) + self.alpha * (
+                    latency - (endpoint.latency or 0.0)
+                )
+            return
+        endpoint.error_rate += self.alpha * (float(failed) - endpoint.error_rate)
+        if failed:
+            endpoint.errors += 1
+        elif latency is not None:
+            self.latency.observe(template, latency)
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += self.alpha * (latency - endpoint.latency)
+
+    def hedge_delay(self, template: str) -> Optional[float]:
+        """Через сколько секунд дублировать запрос; None - не дублировать."""
+        if self.hedge_percentile is None or len(self.endpoints) < 2:
+            return None
+        summary = self.latency[template]
+        if summary.count < self.hedge_min_samples:
+            return None
+        return summary.percentile(self.hedge_percentile)
+
+    def hedged(self, won: bool) -> None:
+        self.hedges += 1
+        if won:
+            self.hedge_wins += 1
+            logger.debug(f"[VOX ROUTER] hedge won ({self.hedge_wins}/{self.hedges})")
+
+    def stats(self) -> dict:
+        return {
+            "endpoints": {e.url: e.as_dict() for e in self.endpoints},
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+        }
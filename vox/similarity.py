@@ -0,0 +1,130 @@
+import asyncio
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+from loguru import logger
+
+from .exceptions import ApiError
+from .models import Subject
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy необязателен
+    numpy = None
+
+
+def _usable(vector) -> bool:
+    return vector is not None and len(vector) > 0
+
+
+def cosine_similarity(a, b) -> Optional[float]:
+    """Косинусное сходство двух эмбеддингов; None, если сравнить нельзя."""
+    if not _usable(a) or not _usable(b) or len(a) != len(b):
+        return None
+    if numpy is not None:
+        a = numpy.asarray(a, dtype=numpy.float32)
+        b = numpy.asarray(b, dtype=numpy.float32)
+        norm = float(numpy.linalg.norm(a) * numpy.linalg.norm(b))
+        return float(numpy.dot(a, b)) / norm if norm else None
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else None
+
+
+def cosine_similarity_pairs(left: Sequence, right: Sequence) -> List[Optional[float]]:
+    """
+    Сходство для пар (left[i], right[i]) одной матричной операцией
+    (если векторы разной размерности - попарно).
+    """
+    if numpy is None or not left or len({len(v) for v in [*left, *right]}) != 1:
+        return [cosine_similarity(a, b) for a, b in zip(left, right)]
+    a = numpy.vstack([numpy.asarray(v, dtype=numpy.float32) for v in left])
+    b = numpy.vstack([numpy.asarray(v, dtype=numpy.float32) for v in right])
+    dots = numpy.einsum("ij,ij->i", a, b)
+    norms = numpy.linalg.norm(a, axis=1) * numpy.linalg.norm(b, axis=1)
+    return [float(d / n) if n else None for d, n in zip(dots, norms)]
+
+
+class SimilarityEngine:
+    """
+    Косинусное сходство по эмбеддингам из ai_analytics (через кэш клиента)
+    без отдельного запроса к /cosine_similarity. В VOX идём, только если
+    у кого-то из пары эмбеддинга нет.
+    """
+
+    def __init__(self, vox, subject: Subject = Subject.USER):
+        self.vox = vox
+        self.subject = subject
+        self.local = 0
+        self.remote = 0
+
+    async def embedding(self, subject_id: int):
+        try:
+            analytics = await self.vox.ai_analytics(
+                subject=self.subject, subject_id=subject_id, embedding=True
+            )
+        except ApiError as e:
+            logger.warning(f"[SIMILARITY] нет эмбеддинга для {subject_id}: {e}")
+            return None
+        # dict или LazyModel (typed-режим клиента)
+        if not hasattr(analytics, "get"):
+            return None
+        return analytics.get("embedding")
+
+    async def _remote(self, id1: int, id2: int) -> Optional[float]:
+        self.remote += 1
+        try:
+            response = await self.vox.cosine_similarity(self.subject, id1, id2)
+        except (ApiError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Сходство - необязательная добавка к чтению
+            logger.warning(f"[SIMILARITY] cosine_similarity({id1}, {id2}) failed: {e}")
+            return None
+        return response.get("cosine_similarity") if hasattr(response, "get") else None
+
+    async def similarity(
+        self, id1: int, id2: int, known: Optional[Dict[int, object]] = None
+    ) -> Optional[float]:
+        return (await self.similarity_many([(id1, id2)], known))[0]
+
+    async def similarity_many(
+        self,
+        pairs: Iterable[Tuple[int, int]],
+        known: Optional[Dict[int, object]] = None,
+    ) -> List[Optional[float]]:
+        """
+        known - уже полученные эмбеддинги по id (None - у VOX его нет):
+        за ними в ai_analytics не ходим.
+        """
+        pairs = list(pairs)
+        vectors: Dict[int, object] = dict(known or {})
+        ids = list({i for pair in pairs for i in pair if i not in vectors})
+        vectors.update(
+            zip(ids, await asyncio.gather(*(self.embedding(i) for i in ids)))
+        )
+
+        results: List[Optional[float]] = [None] * len(pairs)
+        local, missing = [], []
+        for index, (id1, id2) in enumerate(pairs):
+            a, b = vectors.get(id1), vectors.get(id2)
+            if _usable(a) and _usable(b) and len(a) == len(b):
+                local.append(index)
+            else:
+                missing.append(index)
+
+        if local:
+            scores = cosine_similarity_pairs(
+                [vectors[pairs[i][0]] for i in local],
+                [vectors[pairs[i][1]] for i in local],
+            )
+            for index, score in zip(local, scores):
+                results[index] = score
+            self.local += len(local)
+        if missing:
+            scores = await asyncio.gather(*(self._remote(*pairs[i]) for i in missing))
+            for index, score in zip(missing, scores):
+                results[index] = score
+        return results
+
+    def stats(self) -> dict:
+        return {"local": self.local, "remote": self.remote}
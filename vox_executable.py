@@ -1,9 +1,25 @@
 from vox.asyncapi import AsyncVoxAPI
 from vox.models import Subject
-import json
-from config import VOX_TOKEN
+from vox.exceptions import (
+    ApiError,
+    AuthenticationError,
+    CircuitOpenError,
+    NotFoundError,
+)
+from vox.similarity import SimilarityEngine
+from vox.metrics import Summaries
+from vox.cache import normalize_alias
+from config import VOX_TOKEN, VOX_LEAN_RATIO, READING_DEADLINES
 from loguru import logger
-from utils.openai_gpt import ask_gpt
+import aiohttp
+import asyncio
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from utils.openai_gpt import ask_gpt, ask_gpt_progressive
+from utils.prompt_budget import prompt_budget
+from utils.reading_cache import CachePolicy, reading_cache
 
 
 def _process_report_lines(report_str: str) -> str:
@@ -18,126 +34,652 @@ def _process_report_lines(report_str: str) -> str:
     return "\n".join(processed_lines)
 
 
-async def process_user_nickname(vox: AsyncVoxAPI, nickname, prompt):
+# A/B lean/full: задержка чтения и длина ответа по режимам
+reading_ab = Summaries()
+# Время стадий чтения ("single.resolve", "pair.generate", "from.user_id", ...) в секундах
+stage_seconds = Summaries()
+# Гонка VOX/GPT: победы ("flow.vox", "flow.gpt", "flow.hedged") и время ответа
+race_wins = Counter()
+race_seconds = Summaries()
+# ReadingContext: походы в VOX ("calls") и сэкономленные повторы ("avoided")
+context_calls = Counter()
+
+
+def use_lean_mode(user_id: int, ratio: float = None) -> bool:
+    """Стабильное для пользователя попадание в lean-группу с долей ratio."""
+    ratio = VOX_LEAN_RATIO if ratio is None else ratio
+    return (user_id * 2654435761 % 2**32) / 2**32 < ratio
+
+
+_gpt_fallback: ContextVar = ContextVar("gpt_fallback", default=True)
+
+
+@contextmanager
+def without_gpt_fallback():
+    """
+    Внутри блока чтения не уходят в GPT, а возвращают None (ночной
+    предрасчёт: ответ GPT не кэшируется, тратить на него токены незачем).
+    """
+    token = _gpt_fallback.set(False)
     try:
-        if not nickname:
-            # Fallback: если нет ника, используем GPT напрямую
-            logger.info("[DEBUG] process_user_nickname: nickname is None or empty, fallback to GPT")
-            return ask_gpt(prompt)
-        logger.info(f"[DEBUG] process_user_nickname: начинаем обработку {nickname}")
-        logger.info(f"[DEBUG] process_user_nickname: вызываем get_user_id с nickname={nickname}")
-        user_id_response = await vox.get_user_id(nickname)
-        logger.info(f"[DEBUG] process_user_nickname: ответ get_user_id: {user_id_response}")
-        user_id = user_id_response["id"]
-        logger.info(f"[DEBUG] process_user_nickname: используем user_id={user_id}")
-
-        logger.info(f"[DEBUG] process_user_nickname: получаем AI аналитику для {nickname}")
-        ai_analytic = await vox.ai_analytics(subject=Subject.USER, subject_id=user_id)
-        logger.info(f"[DEBUG] process_user_nickname: AI аналитика получена: {type(ai_analytic)}")
-        
-        # Проверяем, есть ли данные от VOX
-        if ai_analytic is None or (isinstance(ai_analytic, dict) and not ai_analytic.get("report")):
-            logger.info(f"[DEBUG] process_user_nickname: нет данных от VOX для {nickname}, отправляем промпт напрямую в ChatGPT")
-            # Отправляем промпт напрямую в ChatGPT
-            return ask_gpt(prompt)
+        yield
+    finally:
+        _gpt_fallback.reset(token)
+
+
+async def _gpt(prompt, progress=None):
+    """GPT-путь: со стримингом в сообщение, если передан ProgressiveEditor."""
+    if not _gpt_fallback.get():
+        return None
+    return await ask_gpt_progressive(prompt, progress)
+
+
+def _won(task: asyncio.Task) -> bool:
+    return not task.cancelled() and task.exception() is None and bool(task.result())
+
+
+async def race_reading(flow: str, vox_reading, fallback_prompt, deadline: float):
+    """
+    Запускает чтение через VOX; если за deadline секунд ответа нет (или
+    VOX уже упал), параллельно стартует GPT с fallback_prompt. Побеждает
+    первый непустой ответ, проигравший отменяется. Собственный
+    GPT-фолбэк чтения внутри гонки выключен: GPT вызывается только здесь.
+    """
+    if not _gpt_fallback.get():
+        return await vox_reading
+    started = time.monotonic()
+    # Задача копирует контекст при создании - фолбэк выключен только в ней
+    with without_gpt_fallback():
+        vox_task = asyncio.ensure_future(vox_reading)
+    gpt_task = None
+    pending = {vox_task}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=deadline)
+        if not done or not _won(vox_task):
+            race_wins[f"{flow}.hedged"] += 1
+            logger.info(
+                f"[RACE] {flow}: VOX не ответил за {deadline}s, запускаем GPT параллельно"
+            )
+            gpt_task = asyncio.ensure_future(ask_gpt(fallback_prompt))
+            pending.add(gpt_task)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if _won(task):
+                    winner = "vox" if task is vox_task else "gpt"
+                    race_wins[f"{flow}.{winner}"] += 1
+                    race_seconds.observe(f"{flow}.{winner}", time.monotonic() - started)
+                    return task.result()
+        # Не удалось ни то, ни другое - ошибку VOX отдаём вызывающему
+        if vox_task.exception() is not None:
+            raise vox_task.exception()
+        return vox_task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _field(response, name: str):
+    """Поле ответа VOX: и сырой dict, и LazyModel (AsyncVoxAPI(typed=True))."""
+    if hasattr(response, "get"):
+        return response.get(name)
+    return None
+
+
+class ReadingContext:
+    """
+    Мемоизация get_user_id и ai_analytics на время одного апдейта.
+
+    Составной сценарий (качества: process_user_nickname по цели, затем
+    process_user_nicknames о ней же) передаёт один контекст во все
+    вызовы и не ходит в VOX повторно за тем же id или отчётом. Внутри
+    контекста ai_analytics всегда запрашивается с embedding - так один
+    отчёт годится и одиночному, и парному чтению. Запоминаются ответы
+    и NotFoundError; прочие ошибки (сеть, 5xx, отмена) не запоминаются -
+    следующий вызов в том же апдейте идёт в VOX заново. Остальные методы
+    проксируются в vox как есть.
+    """
+
+    def __init__(self, vox: AsyncVoxAPI):
+        self.vox = vox
+        self.calls = 0
+        self.avoided = 0
+        self._memo = {}
+
+    def __getattr__(self, name):
+        return getattr(self.vox, name)
+
+    async def _memoized(self, key, call):
+        task = self._memo.get(key)
+        if task is None:
+            self.calls += 1
+            context_calls["calls"] += 1
+            task = self._memo[key] = asyncio.ensure_future(call())
+            task.add_done_callback(lambda done: self._forget_failed(key, done))
         else:
-            if "report" in ai_analytic:
-                ai_analytic = ai_analytic["report"]
-                logger.info(f"[DEBUG] process_user_nickname: извлекли report из AI аналитики")
-
-            logger.info(f"[DEBUG] process_user_nickname: создаем кастомный отчет для {nickname}")
-            report = await vox.custom_report(
-                subject=Subject.USER,
-                subject_id=user_id,
-                custom_prompt=f"{str(ai_analytic)}\n\n{prompt}",
+            self.avoided += 1
+            context_calls["avoided"] += 1
+            logger.debug(
+                f"[VOX CONTEXT] {key}: повтор из контекста ({self.avoided} всего)"
             )
-        
-        logger.info(f"[DEBUG] process_user_nickname: кастомный отчет получен: {type(report)}")
-        
-        # Проверяем, есть ли report в ответе
-        if report and "report" in report and report["report"]:
-            logger.info(f"[DEBUG] process_user_nickname: извлекаем report из ответа")
+        # shield: отмена одного ожидающего (проигравший в race_reading)
+        # не должна отменять общий запрос для остальных
+        return await asyncio.shield(task)
+
+    def _forget_failed(self, key, task: asyncio.Task) -> None:
+        if not task.cancelled() and (
+            task.exception() is None or isinstance(task.exception(), NotFoundError)
+        ):
+            return
+        if self._memo.get(key) is task:
+            del self._memo[key]
+
+    async def get_user_id(self, username):
+        if isinstance(username, bytes):
+            username = username.decode()
+        return await self._memoized(
+            ("user_id", normalize_alias(username)),
+            lambda: self.vox.get_user_id(username),
+        )
+
+    async def ai_analytics(
+        self, subject: Subject, subject_id: int, embedding: bool = True
+    ):
+        """
+        embedding принимается ради совместимости с AsyncVoxAPI.ai_analytics,
+        но не учитывается: запрос всегда идёт с embedding=True, чтобы один
+        отчёт обслуживал все чтения апдейта.
+        """
+        return await self._memoized(
+            ("ai_analytics", subject, subject_id),
+            lambda: self.vox.ai_analytics(
+                subject=subject, subject_id=subject_id, embedding=True
+            ),
+        )
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "avoided": self.avoided}
+
+
+async def process_user_nickname(
+    vox: AsyncVoxAPI,
+    nickname,
+    prompt,
+    fallback_prompt=None,
+    lean=None,
+    cache_policy: CachePolicy = CachePolicy.NONE,
+    progress=None,
+    flow=None,
+    context: ReadingContext = None,
+):
+    """
+    flow - имя сценария ("prediction", "question", ...): если для него
+    задан дедлайн в READING_DEADLINES, VOX гоняется с GPT (race_reading).
+    context - ReadingContext апдейта: общий для нескольких чтений в
+    одном сценарии, повторные get_user_id/ai_analytics берутся из него.
+    Остальные параметры - см. _process_user_nickname.
+    """
+    reading = _process_user_nickname(
+        context or vox,
+        nickname,
+        prompt,
+        fallback_prompt,
+        lean,
+        cache_policy,
+        progress,
+        flow,
+    )
+    deadline = READING_DEADLINES.get(flow)
+    if deadline is None or not nickname:
+        return await reading
+    return await race_reading(flow, reading, fallback_prompt or prompt, deadline)
+
+
+class Reading:
+    """
+    Состояние одного чтения, которое стадии пайплайна читают и дополняют.
+    Стадия завершает чтение через finish(text) или fall_back(prompt) -
+    тогда следующие шаги не выполняются.
+    """
+
+    def __init__(
+        self,
+        vox: AsyncVoxAPI,
+        nicknames: dict,
+        prompt,
+        fallback_prompt=None,
+        flow=None,
+        lean=None,
+        cache_policy: CachePolicy = CachePolicy.NONE,
+        progress=None,
+    ):
+        self.vox = vox
+        self.nicknames = nicknames
+        self.prompt = prompt
+        self.fallback_prompt = fallback_prompt
+        self.flow = flow
+        self.lean = lean
+        self.cache_policy = cache_policy
+        self.progress = progress
+        # По user_id строится custom_report; sections и instruction - его промпт
+        self.user_id = None
+        self.branches = {}
+        self.sections = []
+        self.instruction = prompt
+        self.report = None
+        self.started = None
+        self.timings = {}
+        self.done = False
+        self.result = None
+        self.gpt_prompt = None
+
+    def finish(self, result) -> None:
+        self.done = True
+        self.result = result
+
+    def fall_back(self, prompt) -> None:
+        self.done = True
+        self.gpt_prompt = prompt
+
+    def __str__(self) -> str:
+        return ", ".join(str(nickname) for nickname in self.nicknames.values())
+
+
+async def _timed(timings: dict, stage: str, coro, metric: str = None):
+    """Время coro в timings[stage] и в stage_seconds под metric (или stage)."""
+    started = time.monotonic()
+    try:
+        return await coro
+    finally:
+        timings[stage] = time.monotonic() - started
+        stage_seconds.observe(metric or stage, timings[stage])
+
+
+class Stage:
+    def __init__(self, name: str, run):
+        self.name = name
+        self.run = run
+
+
+class Pipeline:
+    """
+    Сценарий чтения: шаги выполняются по порядку, стадии внутри шага -
+    параллельно (они независимы друг от друга). Время каждой стадии
+    пишется в reading.timings и stage_seconds ("pipeline.stage").
+    Если стадия вызвала fall_back или VOX открыл circuit breaker,
+    отвечает стадия fallback - GPT.
+    """
+
+    def __init__(self, name: str, steps):
+        self.name = name
+        self.steps = steps
+
+    async def run(self, reading: Reading):
+        logger.info(f"[DEBUG] {self.name}: начинаем чтение для {reading}")
+        started = time.monotonic()
+        try:
             try:
-                report_data = json.loads(report["report"])
-                logger.info(f"[DEBUG] process_user_nickname: распарсенный JSON: {report_data}")
-                if "report" in report_data:
-                    report_text = report_data["report"]
-                    logger.info(f"[DEBUG] process_user_nickname: финальный report получен")
-                    return _process_report_lines(report_text)
-                else:
-                    logger.error(f"[DEBUG] process_user_nickname: нет 'report' в распарсенном JSON")
-            except json.JSONDecodeError:
-                logger.error(f"[DEBUG] process_user_nickname: ошибка парсинга JSON")
-        else:
-            logger.info(f"[DEBUG] process_user_nickname: нет 'report' в ответе API или пустой ответ, отправляем промпт напрямую в ChatGPT")
-            return ask_gpt(prompt)
-    except Exception as e:
-        logger.error(f"Error in process_user_nickname for {nickname}: {e}")
-        logger.exception(f"Full traceback for process_user_nickname error:")
-        raise
-    return None
+                for step in self.steps:
+                    await asyncio.gather(
+                        *(
+                            _timed(
+                                reading.timings,
+                                stage.name,
+                                stage.run(reading),
+                                metric=f"{self.name}.{stage.name}",
+                            )
+                            for stage in step
+                        )
+                    )
+                    if reading.done:
+                        break
+            except CircuitOpenError as e:
+                logger.warning(
+                    f"[VOX] {self.name}: {e}, отвечаем через GPT для {reading}"
+                )
+                reading.fall_back(reading.fallback_prompt or reading.prompt)
+            if reading.gpt_prompt is not None:
+                reading.result = await _timed(
+                    reading.timings,
+                    "fallback",
+                    _gpt(reading.gpt_prompt, reading.progress),
+                    metric=f"{self.name}.fallback",
+                )
+            return reading.result
+        except Exception as e:
+            logger.error(f"Error in {self.name} reading for {reading}: {e}")
+            logger.exception(f"Full traceback for {self.name} reading error:")
+            raise
+        finally:
+            reading.timings["total"] = time.monotonic() - started
+            logger.info(
+                f"[TIMING] {self.name}: "
+                + ", ".join(
+                    f"{stage}={seconds:.2f}s"
+                    for stage, seconds in reading.timings.items()
+                )
+            )
+
 
+async def _check_vox(reading: Reading):
+    if reading.vox.is_degraded():
+        logger.warning(f"[VOX] VOX недоступен, сразу отвечаем через GPT для {reading}")
+        reading.fall_back(reading.fallback_prompt or reading.prompt)
 
-async def process_user_nicknames(vox: AsyncVoxAPI, from_user, about_user, prompt):
+
+async def _resolve_user(reading: Reading):
+    nickname = reading.nicknames["user"]
+    if not nickname:
+        # Fallback: если нет ника, используем GPT напрямую
+        logger.info(
+            "[DEBUG] process_user_nickname: nickname is None or empty, fallback to GPT"
+        )
+        reading.fall_back(reading.prompt)
+        return
     logger.info(
-        f"run process_user_nicknames for {from_user} about {about_user}; prompt:\n{prompt}"
+        f"[DEBUG] process_user_nickname: вызываем get_user_id с nickname={nickname}"
     )
-    try:
-        from_user_id = await vox.get_user_id(from_user)
-        from_user_id = from_user_id["id"]
-        
-        airep_from_user = await vox.ai_analytics(
-            subject=Subject.USER, subject_id=from_user_id
+    user_id_response = await reading.vox.get_user_id(nickname)
+    logger.info(f"[DEBUG] process_user_nickname: ответ get_user_id: {user_id_response}")
+    reading.user_id = user_id_response["id"]
+    if reading.lean is None:
+        reading.lean = use_lean_mode(reading.user_id)
+
+
+async def _read_cache(reading: Reading):
+    cached = await reading_cache.get(
+        reading.user_id, reading.prompt, reading.cache_policy
+    )
+    if cached is not None:
+        logger.info(
+            f"[DEBUG] process_user_nickname: чтение для {reading} из кэша ({reading.cache_policy.value})"
         )
-        # Проверяем, есть ли данные от VOX для первого пользователя
-        if airep_from_user is None or (isinstance(airep_from_user, dict) and not airep_from_user.get("report")):
-            logger.info(f"[DEBUG] process_user_nicknames: нет данных от VOX для {from_user}")
-            airep_from_user = f"Пользователь: {from_user}"
-        else:
-            if "report" in airep_from_user:
-                airep_from_user = airep_from_user["report"]
-
-        about_user_id = await vox.get_user_id(about_user)
-        about_user_id = about_user_id["id"]
-        
-        airep_about_user = await vox.ai_analytics(
-            subject=Subject.USER, subject_id=about_user_id
+        reading.finish(cached)
+
+
+async def _enrich_user(reading: Reading):
+    reading.started = time.monotonic()
+    if reading.lean:
+        # custom_report сразу, на серверном контексте VOX
+        logger.info(
+            f"[DEBUG] process_user_nickname: lean-режим, без AI аналитики для {reading}"
         )
-        # Проверяем, есть ли данные от VOX для второго пользователя
-        if airep_about_user is None or (isinstance(airep_about_user, dict) and not airep_about_user.get("report")):
-            logger.info(f"[DEBUG] process_user_nicknames: нет данных от VOX для {about_user}")
-            airep_about_user = f"Пользователь: {about_user}"
-        else:
-            if "report" in airep_about_user:
-                airep_about_user = airep_about_user["report"]
-
-        report = await vox.custom_report(
-            subject=Subject.USER,
-            subject_id=about_user_id,
-            custom_prompt=f"Я {from_user}\n{str(airep_from_user)}\n\n"
-            + f"Спросил о {about_user}\n{str(airep_about_user)}\n\n{prompt}",
+        return
+    ai_analytic = await reading.vox.ai_analytics(
+        subject=Subject.USER, subject_id=reading.user_id
+    )
+    logger.info(
+        f"[DEBUG] process_user_nickname: AI аналитика получена: {type(ai_analytic)}"
+    )
+    # Проверяем, есть ли данные от VOX
+    report = _field(ai_analytic, "report")
+    if not report:
+        logger.info(
+            f"[DEBUG] process_user_nickname: нет данных от VOX для {reading}, отправляем промпт напрямую в ChatGPT"
         )
-        
-        # Проверяем, есть ли report в ответе
-        if report and "report" in report and report["report"]:
-            try:
-                report_data = json.loads(report["report"])
-                if "report" in report_data:
-                    report_text = report_data["report"]
-                    logger.info(report_text)
-                    report_processed = _process_report_lines(report_text)
-                    logger.info(report_processed)
-                    return report_processed
-            except json.JSONDecodeError:
-                logger.error(f"[DEBUG] process_user_nicknames: ошибка парсинга JSON")
-        else:
-            logger.info(f"[DEBUG] process_user_nicknames: нет 'report' в ответе API или пустой ответ, отправляем промпт напрямую в ChatGPT")
-            return ask_gpt(prompt)
-    except Exception as e:
-        logger.error(f"Error occurred in process_user_nicknames: {e}")
-        logger.exception(f"Full traceback for process_user_nicknames error:")
+        reading.fall_back(reading.prompt)
+        return
+    reading.sections = [(None, report)]
+
+
+def _branch_stage(label: str) -> Stage:
+    """get_user_id -> ai_analytics одного участника (см. _resolve_branch)."""
+
+    async def resolve(reading: Reading):
+        reading.branches[label] = await _resolve_branch(
+            reading.vox, reading.nicknames[label], label, reading.timings
+        )
+
+    return Stage(label, resolve)
+
+
+async def _compare(reading: Reading):
+    from_branch, about_branch = reading.branches["from"], reading.branches["about"]
+    if about_branch.user_id is None:
+        # custom_report строится по about_user - без его id только GPT
+        logger.info(
+            f"[DEBUG] process_user_nicknames: {about_branch.nickname} не найден в VOX, отвечаем через GPT"
+        )
+        reading.fall_back(reading.fallback_prompt or reading.prompt)
+        return
+    reading.user_id = about_branch.user_id
+
+    # Сходство профилей - локально по уже полученным эмбеддингам; если у
+    # кого-то из пары эмбеддинга нет, SimilarityEngine спросит VOX
+    similarity = None
+    if from_branch.user_id is not None:
+        similarity = await SimilarityEngine(reading.vox).similarity(
+            from_branch.user_id,
+            about_branch.user_id,
+            known={
+                from_branch.user_id: from_branch.embedding,
+                about_branch.user_id: about_branch.embedding,
+            },
+        )
+    similarity_line = ""
+    if similarity is not None:
+        logger.info(
+            f"[DEBUG] process_user_nicknames: cosine similarity = {similarity:.3f}"
+        )
+        similarity_line = (
+            f"Сходство профилей (косинусное, от -1 до 1): {similarity:.2f}\n\n"
+        )
+    reading.sections = [
+        (f"Я {from_branch.nickname}", from_branch.report),
+        (f"Спросил о {about_branch.nickname}", about_branch.report),
+    ]
+    reading.instruction = f"{similarity_line}{reading.prompt}"
+
+
+async def _generate(reading: Reading):
+    reading.report = await reading.vox.custom_report(
+        subject=Subject.USER,
+        subject_id=reading.user_id,
+        custom_prompt=prompt_budget.assemble(
+            reading.flow, reading.sections, reading.instruction
+        ),
+        parse_report=True,
+    )
+    logger.info(f"[DEBUG] {reading}: кастомный отчет получен: {type(reading.report)}")
+
+
+async def _post_process(reading: Reading):
+    report = reading.report
+    # Проверяем, есть ли report в ответе
+    if not _field(report, "report"):
+        logger.info(
+            f"[DEBUG] {reading}: нет 'report' в ответе API или пустой ответ, отправляем промпт напрямую в ChatGPT"
+        )
+        reading.fall_back(reading.prompt)
+        return
+    report_data = _field(report, "report_data")
+    if report_data is None:
+        logger.error(f"[DEBUG] {reading}: ошибка парсинга JSON")
+        reading.finish(None)
+        return
+    report_text = _field(report_data, "report")
+    if report_text is None:
+        logger.error(f"[DEBUG] {reading}: нет 'report' в распарсенном JSON")
+        reading.finish(None)
+        return
+    if reading.lean is not None:
+        mode = "lean" if reading.lean else "full"
+        reading_ab.observe(f"{mode}.seconds", time.monotonic() - reading.started)
+        reading_ab.observe(f"{mode}.chars", len(report_text))
+    result = _process_report_lines(report_text)
+    await reading_cache.set(
+        reading.user_id, reading.prompt, reading.cache_policy, result
+    )
+    reading.finish(result)
+
+
+# Одиночное чтение: resolve -> cache -> enrich -> generate -> post_process
+SINGLE_READING = Pipeline(
+    "single",
+    [
+        [Stage("guard", _check_vox)],
+        [Stage("resolve", _resolve_user)],
+        [Stage("cache", _read_cache)],
+        [Stage("enrich", _enrich_user)],
+        [Stage("generate", _generate)],
+        [Stage("post_process", _post_process)],
+    ],
+)
+# Чтение о двух людях: ветки from и about разрешаются параллельно
+PAIR_READING = Pipeline(
+    "pair",
+    [
+        [Stage("guard", _check_vox)],
+        [_branch_stage("from"), _branch_stage("about")],
+        [Stage("enrich", _compare)],
+        [Stage("generate", _generate)],
+        [Stage("post_process", _post_process)],
+    ],
+)
+
+
+async def _process_user_nickname(
+    vox: AsyncVoxAPI,
+    nickname,
+    prompt,
+    fallback_prompt=None,
+    lean=None,
+    cache_policy: CachePolicy = CachePolicy.NONE,
+    progress=None,
+    flow=None,
+):
+    """
+    fallback_prompt - промпт для GPT (*_gpt), которым отвечаем сразу,
+    если VOX недоступен (открыт circuit breaker).
+    lean=True - custom_report сразу, на серверном контексте VOX, без
+    предварительного ai_analytics; None - по доле VOX_LEAN_RATIO.
+    cache_policy - сколько живёт готовое чтение (DAILY для предсказания
+    на день, WEEKLY, NONE для свободных вопросов).
+    progress - utils.progressive.ProgressiveEditor: ответ GPT показывается
+    в сообщении по мере генерации (VOX отдаёт отчёт только целиком).
+    flow - сценарий для бюджета custom_prompt (utils.prompt_budget).
+    """
+    reading = Reading(
+        vox,
+        {"user": nickname},
+        prompt,
+        fallback_prompt=fallback_prompt,
+        flow=flow,
+        lean=lean,
+        cache_policy=cache_policy,
+        progress=progress,
+    )
+    return await SINGLE_READING.run(reading)
+
+
+class _Branch:
+    """Данные одного пользователя для совместимости."""
+
+    def __init__(self, nickname):
+        self.nickname = nickname
+        self.user_id = None
+        self.report = f"Пользователь: {nickname}"
+        self.embedding = None
+
+
+# Ошибки, после которых ветка остаётся заглушкой: ответ VOX или сеть/таймаут
+# после всех повторов. Открытый breaker и ошибка авторизации - не про
+# конкретного пользователя, они пробрасываются в Pipeline.run
+_BRANCH_ERRORS = (ApiError, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+async def _resolve_branch(
+    vox: AsyncVoxAPI, nickname, label: str, timings: dict
+) -> _Branch:
+    """
+    get_user_id -> ai_analytics для одного пользователя. Ошибка VOX не
+    роняет ветку: без id или отчёта остаётся заглушка "Пользователь: ник".
+    """
+    branch = _Branch(nickname)
+    try:
+        response = await _timed(timings, f"{label}.user_id", vox.get_user_id(nickname))
+        branch.user_id = response["id"]
+    except (CircuitOpenError, AuthenticationError):
         raise
-    return None
+    except _BRANCH_ERRORS as e:
+        logger.warning(
+            f"[VOX] process_user_nicknames: не удалось найти {nickname}: {e!r}"
+        )
+        return branch
+    try:
+        airep = await _timed(
+            timings,
+            f"{label}.ai_analytics",
+            vox.ai_analytics(
+                subject=Subject.USER, subject_id=branch.user_id, embedding=True
+            ),
+        )
+    except (CircuitOpenError, AuthenticationError):
+        raise
+    except _BRANCH_ERRORS as e:
+        logger.warning(
+            f"[VOX] process_user_nicknames: нет аналитики для {nickname}: {e!r}"
+        )
+        return branch
+    branch.embedding = _field(airep, "embedding")
+    # Проверяем, есть ли данные от VOX для пользователя
+    report = _field(airep, "report")
+    if not report:
+        logger.info(f"[DEBUG] process_user_nicknames: нет данных от VOX для {nickname}")
+    else:
+        branch.report = report
+    return branch
+
+
+async def process_user_nicknames(
+    vox: AsyncVoxAPI,
+    from_user,
+    about_user,
+    prompt,
+    fallback_prompt=None,
+    progress=None,
+    flow=None,
+    context: ReadingContext = None,
+):
+    """flow, context - как в process_user_nickname."""
+    reading = _process_user_nicknames(
+        context or vox, from_user, about_user, prompt, fallback_prompt, progress, flow
+    )
+    deadline = READING_DEADLINES.get(flow)
+    if deadline is None:
+        return await reading
+    return await race_reading(flow, reading, fallback_prompt or prompt, deadline)
+
+
+async def _process_user_nicknames(
+    vox: AsyncVoxAPI,
+    from_user,
+    about_user,
+    prompt,
+    fallback_prompt=None,
+    progress=None,
+    flow=None,
+):
+    """
+    Обе ветки (get_user_id -> ai_analytics для from_user и about_user)
+    выполняются параллельно и падают независимо, затем custom_report:
+    два последовательных похода в VOX вместо пяти.
+    progress, flow - как в _process_user_nickname.
+    """
+    logger.info(
+        f"run process_user_nicknames for {from_user} about {about_user}; prompt:\n{prompt}"
+    )
+    reading = Reading(
+        vox,
+        {"from": from_user, "about": about_user},
+        prompt,
+        fallback_prompt=fallback_prompt,
+        flow=flow,
+        progress=progress,
+    )
+    return await PAIR_READING.run(reading)
 
 
 # Пример вызова: